@@ -180,8 +180,16 @@ export default function Home() {
             const response = await fetch(`http://localhost:8000/gerar-pdf/${cleanUsername}`)
 
             if (response.ok) {
-                const data = await response.json()
-                alert(`✅ PDF gerado com sucesso! Local: ${data.pdf_path}`)
+                // A API transmite o PDF diretamente: baixar como arquivo
+                const blob = await response.blob()
+                const url = URL.createObjectURL(blob)
+                const link = document.createElement('a')
+                link.href = url
+                link.download = `relatorio_${cleanUsername}.pdf`
+                document.body.appendChild(link)
+                link.click()
+                link.remove()
+                URL.revokeObjectURL(url)
             } else {
                 alert('❌ Erro ao gerar PDF')
             }
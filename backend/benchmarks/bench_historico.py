@@ -0,0 +1,99 @@
+"""
+Benchmark da série temporal de coletas (GET /historico).
+
+Grava um ano de coletas diárias para N perfis num diretório temporário e
+mede a latência de consultas de período (consultar + resumir_historico)
+em perfis aleatórios, com os segmentos frios (primeira leitura) e quentes
+(já no cache). Uso (a partir de backend/):
+
+    python -m benchmarks.bench_historico --perfis 10000 --dias 365
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from services.timeseries import REGISTRO, SerieTemporal, resumir_historico
+
+DIA = 86400
+
+
+def serie(dias: int, rnd: np.random.Generator) -> np.ndarray:
+    registros = np.zeros(dias, dtype=REGISTRO)
+    registros["ts"] = time.time() - (dias - np.arange(dias)) * DIA
+    crescimento = rnd.normal(5, 20, dias).cumsum().astype(np.int64)
+    registros["seguidores"] = rnd.integers(500, 100000) + crescimento
+    registros["seguindo"] = 300
+    registros["total_posts"] = 100 + np.arange(dias) // 3
+    registros["taxa_engajamento"] = rnd.uniform(0.5, 8, dias)
+    return registros
+
+
+def percentis(tempos):
+    tempos = np.array(tempos) * 1000
+    return f"p50 {np.percentile(tempos, 50):6.2f} ms | p99 {np.percentile(tempos, 99):6.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--perfis", type=int, default=10000)
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--segmento", type=int, default=128)
+    parser.add_argument("--consultas", type=int, default=500)
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp(prefix="historico_")
+    try:
+        store = SerieTemporal(diretorio, segmento=args.segmento)
+        rnd = np.random.default_rng(42)
+        inicio = time.perf_counter()
+        for i in range(args.perfis):
+            store.acrescentar(f"perfil_{i}", serie(args.dias, rnd))
+        gravacao = time.perf_counter() - inicio
+
+        tamanho = sum(
+            os.path.getsize(os.path.join(raiz, nome))
+            for raiz, _, nomes in os.walk(diretorio)
+            for nome in nomes
+        )
+        total = args.perfis * args.dias
+        print(
+            f"{args.perfis} perfis x {args.dias} dias = {total} registros"
+            f" | gravação {gravacao:.1f} s"
+            f" | disco {tamanho / 2**20:.1f} MiB ({tamanho / total:.1f} B/registro)"
+        )
+
+        # Registro de uma coleta isolada (caminho do get_profile_data)
+        dados = {"username": "perfil_0", "seguidores": 1, "posts": []}
+        inicio = time.perf_counter()
+        for _ in range(200):
+            store.registrar(dados)
+        print(f"registrar(): {(time.perf_counter() - inicio) / 200 * 1000:.3f} ms")
+
+        alvos = [
+            f"perfil_{random.randrange(args.perfis)}" for _ in range(args.consultas)
+        ]
+        for rotulo in ("frio", "quente"):
+            ano, trimestre = [], []
+            for username in alvos:
+                t0 = time.perf_counter()
+                resumir_historico(store.consultar(username))
+                t1 = time.perf_counter()
+                resumir_historico(
+                    store.consultar(username, inicio=time.time() - 90 * DIA)
+                )
+                ano.append(t1 - t0)
+                trimestre.append(time.perf_counter() - t1)
+            print(
+                f"{rotulo:>6} | ano: {percentis(ano)} | 90 dias: {percentis(trimestre)}"
+            )
+    finally:
+        shutil.rmtree(diretorio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark dos logs: print (como era) contra o logging estruturado com fila.
+
+Simula um lote com muitos logs: N análises concorrentes no event loop,
+cada uma emitindo L linhas entre awaits (metade INFO, metade DEBUG). O
+print escreve tudo, com flush a cada linha (stdout de contêiner com
+PYTHONUNBUFFERED); o logging escreve JSON pelo QueueListener. Mede o tempo
+do lote no event loop, o tempo até a última linha chegar ao destino e as
+linhas escritas. O destino é um arquivo ou um pipe lido devagar (como o
+stdout de um contêiner sob um coletor de logs lento). Uso (a partir de
+backend/):
+
+    python -m benchmarks.bench_logging --perfis 2000 --linhas 20
+    python -m benchmarks.bench_logging --destino pipe --leitura-kb-s 2048
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from services.logging_config import (
+    ID_REQUISICAO,
+    FormatoJSON,
+    configurar_logs,
+    encerrar_logs,
+    novo_id,
+)
+
+logger = logging.getLogger("services.bench")
+
+# Lê o pipe em blocos de 4 KiB no ritmo pedido e grava o que leu no arquivo
+LEITOR_LENTO = """
+import sys, time
+intervalo = 4 / float(sys.argv[2])
+with open(sys.argv[1], "wb") as saida:
+    while bloco := sys.stdin.buffer.read1(4096):
+        saida.write(bloco)
+        time.sleep(intervalo)
+"""
+
+
+async def analise_print(username: str, linhas: int, destino):
+    for i in range(linhas):
+        print(f"🔍 Coletando dados do perfil @{username} (etapa {i})", file=destino)
+        destino.flush()
+        await asyncio.sleep(0)
+
+
+async def analise_logging(username: str, linhas: int, _destino):
+    ID_REQUISICAO.set(novo_id())
+    for i in range(linhas):
+        nivel = logging.INFO if i % 2 == 0 else logging.DEBUG
+        logger.log(
+            nivel, "Coletando dados do perfil", extra={"username": username, "etapa": i}
+        )
+        await asyncio.sleep(0)
+
+
+def configurar_sincrono(destino):
+    """Logging sem fila: formatação e escrita no próprio event loop"""
+    handler = logging.StreamHandler(destino)
+    handler.setFormatter(FormatoJSON())
+    raiz = logging.getLogger()
+    raiz.addHandler(handler)
+    logging.getLogger("services").setLevel(logging.DEBUG)
+    return lambda: raiz.removeHandler(handler)
+
+
+def configurar_fila(nivel: str):
+    """Logging como na API: JSON escrito pelo thread do QueueListener"""
+
+    def preparar(destino):
+        configurar_logs(nivel, "json", destino)
+        return encerrar_logs
+
+    return preparar
+
+
+def abrir_destino(tipo: str, caminho: str, leitura_kb_s: float):
+    """(stream de texto, função que fecha o destino e espera a última linha)"""
+    if tipo == "arquivo":
+        destino = open(caminho, "w", encoding="utf-8")
+        return destino, destino.close
+    leitor = subprocess.Popen(
+        [sys.executable, "-c", LEITOR_LENTO, caminho, str(leitura_kb_s)],
+        stdin=subprocess.PIPE,
+    )
+    destino = io.TextIOWrapper(leitor.stdin, encoding="utf-8")
+
+    def fechar():
+        destino.close()
+        leitor.wait()
+
+    return destino, fechar
+
+
+def medir(nome: str, analise, preparar, args, caminho: str):
+    destino, fechar = abrir_destino(args.destino, caminho, args.leitura_kb_s)
+    encerrar = preparar(destino)
+
+    async def lote():
+        await asyncio.gather(
+            *(analise(f"perfil_{i}", args.linhas, destino) for i in range(args.perfis))
+        )
+
+    inicio = time.perf_counter()
+    asyncio.run(lote())
+    no_loop = time.perf_counter() - inicio
+    encerrar()
+    fechar()
+    total = time.perf_counter() - inicio
+
+    with open(caminho, encoding="utf-8") as arquivo:
+        escritas = sum(1 for _ in arquivo)
+    print(
+        f"{nome:<24} | loop {no_loop * 1000:8.1f} ms"
+        f" | até a última linha {total * 1000:8.1f} ms"
+        f" | {escritas:>7} linhas"
+        f" | {args.perfis * args.linhas / no_loop:>9,.0f} chamadas/s no loop"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--perfis", type=int, default=2000)
+    parser.add_argument("--linhas", type=int, default=20)
+    parser.add_argument("--destino", choices=("arquivo", "pipe"), default="arquivo")
+    parser.add_argument("--leitura-kb-s", type=float, default=2048)
+    args = parser.parse_args()
+
+    caminho = os.path.join(tempfile.mkdtemp(), "logs.txt")
+    cenarios = [
+        ("print", analise_print, lambda destino: lambda: None),
+        ("logging com fila (DEBUG)", analise_logging, configurar_fila("DEBUG")),
+        ("logging com fila (INFO)", analise_logging, configurar_fila("INFO")),
+        # Depois das filas: mesmos ajustes de LogRecord de configurar_logs
+        ("logging síncrono (DEBUG)", analise_logging, configurar_sincrono),
+    ]
+    for nome, analise, preparar in cenarios:
+        medir(nome, analise, preparar, args, caminho)
+
+
+if __name__ == "__main__":
+    main()
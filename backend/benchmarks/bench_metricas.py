@@ -0,0 +1,110 @@
+"""
+Benchmark do motor de métricas vetorizado contra o cálculo por dict.
+
+Compara calcular_metricas_lote (colunas NumPy) com o laço Python que
+InstagramService/MockInstagramService usavam, perfil a perfil. O tempo do
+lote inclui a conversão dos dicts para colunas; "já em colunas" mede só o
+cálculo sobre um PostsColunares pronto. Uso (a partir
+de backend/):
+
+    python -m benchmarks.bench_metricas --perfis 1 100 1000 10000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from services.metrics_engine import (
+    PostsColunares,
+    calcular_metricas,
+    calcular_metricas_colunas,
+    calcular_metricas_lote,
+)
+
+HASHTAGS = ["moda", "look", "estilo", "promo", "verao", "praia", "fit", "food"]
+
+
+def gerar_perfis(n: int, posts_por_perfil: int = 12):
+    rnd = random.Random(42)
+    agora = datetime(2024, 6, 1)
+    perfis = []
+    for i in range(n):
+        posts = []
+        for j in range(posts_por_perfil):
+            tags = rnd.sample(HASHTAGS, 3)
+            posts.append(
+                {
+                    "likes": rnd.randint(10, 5000),
+                    "comments": rnd.randint(0, 300),
+                    "caption": f"Post {j} " + " ".join(f"#{t}" for t in tags),
+                    "date": (agora - timedelta(days=j * 2)).isoformat(),
+                    "is_video": rnd.random() < 0.4,
+                    "url": f"https://www.instagram.com/p/{i}_{j}/",
+                }
+            )
+        perfis.append({"seguidores": rnd.randint(500, 100000), "posts": posts})
+    return perfis
+
+
+def metricas_por_dict(dados):
+    """Cálculo anterior (laços por post), com hashtags e cadência"""
+    posts = dados.get("posts", [])
+    seguidores = dados.get("seguidores", 0)
+    if not posts or seguidores == 0:
+        return {}
+    total_likes = sum(p["likes"] for p in posts)
+    total_comments = sum(p["comments"] for p in posts)
+    total_interacoes = total_likes + total_comments
+    melhor_post = max(posts, key=lambda p: p["likes"] + p["comments"])
+    contador = {}
+    for post in posts:
+        for tag in post["caption"].split():
+            if tag.startswith("#"):
+                contador[tag[1:]] = contador.get(tag[1:], 0) + 1
+    datas = [datetime.fromisoformat(p["date"]) for p in posts]
+    semanas = max((max(datas) - min(datas)).days / 7, 1)
+    return {
+        "taxa_engajamento": round(total_interacoes / len(posts) / seguidores * 100, 2),
+        "media_likes": round(total_likes / len(posts), 2),
+        "media_comentarios": round(total_comments / len(posts), 2),
+        "total_interacoes": total_interacoes,
+        "melhor_post": melhor_post["url"],
+        "razao_video_foto": sum(1 for p in posts if p["is_video"]) / len(posts),
+        "posts_semanais": round(len(posts) / semanas, 1),
+        "principais_hashtags": sorted(contador, key=contador.get, reverse=True)[:5],
+    }
+
+
+def cronometrar(funcao, repeticoes: int = 3) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--perfis", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    args = parser.parse_args()
+
+    for n in args.perfis:
+        perfis = gerar_perfis(n)
+        por_dict = cronometrar(lambda: [metricas_por_dict(p) for p in perfis])
+        um_a_um = cronometrar(lambda: [calcular_metricas(p) for p in perfis[:1000]])
+        um_a_um *= n / min(n, 1000)  # extrapolado acima de 1000 perfis
+        lote = cronometrar(lambda: calcular_metricas_lote(perfis))
+        colunas = PostsColunares(perfis)
+        so_calculo = cronometrar(lambda: calcular_metricas_colunas(colunas))
+        print(
+            f"{n:>6} perfis | por dict {por_dict * 1000:8.2f} ms"
+            f" | motor 1 a 1 {um_a_um * 1000:8.2f} ms"
+            f" | lote {lote * 1000:8.2f} ms ({por_dict / lote:4.1f}x)"
+            f" | lote já em colunas {so_calculo * 1000:8.2f} ms"
+            f" ({por_dict / so_calculo:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
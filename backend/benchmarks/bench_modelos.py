@@ -0,0 +1,120 @@
+"""
+Memória do cache de análises: dicts soltos contra Analise/PostColumns.
+
+Monta N respostas de /analisar no formato real (perfil do instaloader, 12
+posts, métricas e relatório de IA) e mede com tracemalloc quanto ocupam
+como dicts e como registros compactos, além do custo de conversão. Uso (a
+partir de backend/):
+
+    python -m benchmarks.bench_modelos --perfis 10000
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from services.metrics_engine import calcular_metricas
+from services.models import Analise
+
+
+def gerar_resposta(i: int, rnd: random.Random):
+    agora = datetime(2024, 6, 1)
+    posts = [
+        {
+            "likes": rnd.randint(10, 5000),
+            "comments": rnd.randint(0, 300),
+            "caption": f"Post {j} do perfil {i} #moda #look #estilo",
+            "date": (agora - timedelta(days=j * 2)).isoformat(),
+            "is_video": rnd.random() < 0.4,
+            "url": f"https://www.instagram.com/p/{i:06d}{j:02d}/",
+        }
+        for j in range(12)
+    ]
+    dados = {
+        "username": f"perfil_{i}",
+        "nome_completo": f"Perfil {i}",
+        "biografia": f"Loja {i} | Moda feminina | Entregamos para todo o Brasil",
+        "seguidores": rnd.randint(500, 100000),
+        "seguindo": rnd.randint(100, 2000),
+        "total_posts": rnd.randint(50, 900),
+        "foto_perfil": f"https://cdn.instagram.com/{i}.jpg",
+        "is_private": False,
+        "is_verified": False,
+        "is_business": True,
+        "categoria": "Loja de roupas",
+        "url_externo": None,
+        "posts": posts,
+        "coletado_em": agora.isoformat(),
+        "_real_data": True,
+    }
+    return {
+        "perfil": f"@perfil_{i}",
+        "dados": dados,
+        "metricas": calcular_metricas(dados),
+        "relatorio_ia": {
+            "resumo_negocio": f"Resumo do perfil {i}",
+            "pontos_fortes": "Frequência de posts",
+            "pontos_fracos": "Pouca interação",
+            "oportunidades": "Reels",
+            "sugestao_prospeccao": "Tráfego pago",
+            "relatorio_completo": f"Relatório completo do perfil {i}",
+        },
+        "status": "success",
+        "data_source": "instagram",
+    }
+
+
+def medir(construir, n: int) -> float:
+    """Bytes retidos pelos N itens construídos"""
+    gc.collect()
+    tracemalloc.start()
+    itens = construir(n)
+    gc.collect()
+    retido, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del itens
+    return retido
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--perfis", type=int, default=10000)
+    args = parser.parse_args()
+    n = args.perfis
+
+    def dicts(n):
+        rnd = random.Random(42)
+        return [gerar_resposta(i, rnd) for i in range(n)]
+
+    def compactos(n):
+        rnd = random.Random(42)
+        return [Analise.from_dict(gerar_resposta(i, rnd)) for i in range(n)]
+
+    em_dicts = medir(dicts, n)
+    em_compactos = medir(compactos, n)
+
+    respostas = dicts(n)
+    inicio = time.perf_counter()
+    analises = [Analise.from_dict(r) for r in respostas]
+    tempo_from = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for analise in analises:
+        analise.to_dict()
+    tempo_to = time.perf_counter() - inicio
+
+    print(f"{n} análises em cache (12 posts cada)")
+    print(f"  dicts:     {em_dicts / 2**20:7.1f} MiB ({em_dicts / n:7.0f} B/perfil)")
+    print(
+        f"  compactos: {em_compactos / 2**20:7.1f} MiB"
+        f" ({em_compactos / n:7.0f} B/perfil, {em_compactos / em_dicts:.0%})"
+    )
+    print(
+        f"  from_dict: {tempo_from / n * 1e6:6.1f} µs/perfil"
+        f" | to_dict: {tempo_to / n * 1e6:6.1f} µs/perfil"
+    )
+
+
+if __name__ == "__main__":
+    main()
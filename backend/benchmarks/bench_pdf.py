@@ -0,0 +1,95 @@
+"""
+Benchmark de renderização de PDFs.
+
+Mede tempo por PDF e alocações (tracemalloc) para lotes de relatórios
+renderizados pela mesma instância de ReportService, como acontece em cada
+processo do pool. Uso (a partir de backend/):
+
+    python -m benchmarks.bench_pdf --lotes 1 100 1000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from services.report_service import ReportService
+
+RELATORIO = {
+    "resumo_negocio": "Loja de roupas femininas com foco em moda casual. " * 3,
+    "pontos_fortes": "Boa frequência de posts e identidade visual consistente.",
+    "pontos_fracos": "Pouca interação nos comentários e legendas curtas.",
+    "oportunidades": "Reels com bastidores e parcerias com microinfluenciadores.",
+    "sugestao_prospeccao": "Oferecer gestão de tráfego pago para coleções.",
+}
+METRICAS = {
+    "engajamento_medio": "3.42%",
+    "posts_semanais": 4,
+    "media_likes": 1532,
+    "media_comentarios": 48,
+    "principais_hashtags": ["#moda", "#look", "#estilo", "#promo", "#verao"],
+}
+
+
+def dados_perfil(i: int):
+    return {
+        "username": f"perfil_{i}",
+        "nome_completo": f"Perfil {i}",
+        "biografia": "Moda feminina | Entregamos para todo o Brasil",
+        "seguidores": 45000 + i,
+        "seguindo": 320,
+        "total_posts": 812,
+        "verificado": i % 2 == 0,
+        "conta_privada": False,
+        "posts": [
+            {
+                "legenda": f"Nova coleção {j} chegando! #moda #look",
+                "curtidas": 1500 + j,
+                "comentarios": 40 + j,
+                "tipo": "Foto",
+                "data_postagem": "2024-01-15T10:00:00",
+            }
+            for j in range(12)
+        ],
+    }
+
+
+def renderizar_lote(service: ReportService, n: int):
+    for i in range(n):
+        service.renderizar_pdf(f"perfil_{i}", dados_perfil(i), METRICAS, RELATORIO)
+
+
+def medir(n: int):
+    inicio = time.perf_counter()
+    service = ReportService()
+    construcao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    renderizar_lote(service, n)
+    tempo = time.perf_counter() - inicio
+
+    # Alocações medidas numa segunda passada (tracemalloc distorce o tempo)
+    amostra = min(n, 100)
+    tracemalloc.start()
+    renderizar_lote(ReportService(), amostra)
+    _, pico = tracemalloc.get_traced_memory()
+    gc.collect()
+    retido, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{n:>5} PDFs | serviço {construcao * 1000:6.2f} ms"
+        f" | {tempo / n * 1000:7.2f} ms/PDF | total {tempo:7.2f} s"
+        f" | pico {pico / 1024:7.1f} KiB | retido {retido / 1024:7.1f} KiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lotes", type=int, nargs="+", default=[1, 100, 1000])
+    args = parser.parse_args()
+    for n in args.lotes:
+        medir(n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark do motor de regras de relatórios.
+
+Mede relatórios por segundo para lotes de perfis sintéticos, separando a
+montagem das colunas da avaliação das regras, e compara com a geração
+perfil a perfil. Uso (a partir de backend/):
+
+    python -m benchmarks.bench_regras --perfis 1000 100000
+"""
+import argparse
+import random
+import time
+
+from services.rules_engine import MotorRegras
+
+UM_POR_VEZ_MAX = 5000
+
+
+def perfis_sinteticos(n: int):
+    aleatorio = random.Random(42)
+    perfis = [
+        {
+            "username": f"perfil_{i}",
+            "seguidores": int(10 ** aleatorio.uniform(1, 6)),
+            "verificado": aleatorio.random() < 0.1,
+            "conta_privada": aleatorio.random() < 0.2,
+        }
+        for i in range(n)
+    ]
+    metricas = [
+        {
+            "taxa_engajamento": aleatorio.uniform(0, 12),
+            "posts_semanais": aleatorio.uniform(0, 8),
+        }
+        for _ in range(n)
+    ]
+    return perfis, metricas
+
+
+def medir(motor: MotorRegras, n: int):
+    perfis, metricas = perfis_sinteticos(n)
+
+    inicio = time.perf_counter()
+    colunas = motor.colunas(perfis, metricas)
+    montagem = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    motor.gerar_colunas(colunas)
+    avaliacao = time.perf_counter() - inicio
+    total = montagem + avaliacao
+
+    amostra = min(n, UM_POR_VEZ_MAX)
+    inicio = time.perf_counter()
+    for perfil, metrica in zip(perfis[:amostra], metricas[:amostra]):
+        motor.gerar(perfil, metrica)
+    um_por_vez = (time.perf_counter() - inicio) / amostra
+
+    print(
+        f"{n:>7} perfis | colunas {montagem * 1000:8.1f} ms"
+        f" | regras {avaliacao * 1000:8.1f} ms"
+        f" | {n / total:>9,.0f} relatórios/s"
+        f" | um por vez {um_por_vez * 1e6:6.1f} µs/relatório"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--perfis", type=int, nargs="+", default=[1000, 100000])
+    args = parser.parse_args()
+    motor = MotorRegras.carregar()
+    for n in args.perfis:
+        medir(motor, n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark de relatórios de IA individuais vs. agrupados.
+
+Gera N relatórios contra o servidor fake (com latência por request) pelos
+dois caminhos do AIService e compara tempo total, requests e tokens de
+prompt por perfil. Uso (a partir de backend/):
+
+    python -m benchmarks.bench_relatorios_lote --perfis 40 --latencia 0.5
+"""
+import argparse
+import asyncio
+import time
+
+from services import fake_openai_server
+from services.ai_service import AIService
+
+METRICAS = {
+    "taxa_engajamento": 3.4,
+    "engajamento_medio": "3.4%",
+    "posts_semanais": 4,
+    "media_likes": 1532,
+    "media_comentarios": 48,
+    "principais_hashtags": ["moda", "look", "estilo"],
+}
+
+
+def dados_perfil(i: int):
+    return {
+        "username": f"perfil_{i}",
+        "nome_completo": f"Perfil {i}",
+        "biografia": "Moda feminina | Entregamos para todo o Brasil",
+        "seguidores": 45000 + i * 1000,
+        "seguindo": 320,
+        "total_posts": 812,
+        "posts": [],
+    }
+
+
+async def medir(agrupado: bool, perfis: int, latencia: float, tamanho: int):
+    app = fake_openai_server.criar_app(latencia=latencia)
+    runner, base_url = await fake_openai_server.iniciar(app=app)
+    service = AIService(base_url=base_url)
+    service.tamanho_lote = tamanho
+    service.espera_lote = 0.05
+    gerar = service.gerar_relatorio_agrupado if agrupado else service.gerar_relatorio
+    try:
+        inicio = time.perf_counter()
+        await asyncio.gather(*[gerar(dados_perfil(i), METRICAS) for i in range(perfis)])
+        tempo = time.perf_counter() - inicio
+    finally:
+        await service.aclose()
+        await runner.cleanup()
+
+    estatisticas = app[fake_openai_server.ESTATISTICAS]
+    print(
+        f"{'agrupado' if agrupado else 'individual':>10} | {perfis} perfis"
+        f" | {tempo:6.2f} s | {perfis / tempo:6.2f} perfis/s"
+        f" | {estatisticas['chamadas']:3d} requests"
+        f" | {estatisticas['prompt_tokens'] / perfis:6.1f} tokens de prompt/perfil"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--perfis", type=int, default=40)
+    parser.add_argument("--latencia", type=float, default=0.5)
+    parser.add_argument("--tamanho", type=int, default=4)
+    args = parser.parse_args()
+    for agrupado in (False, True):
+        asyncio.run(medir(agrupado, args.perfis, args.latencia, args.tamanho))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark do registro de métricas (endpoint /metrics).
+
+Mede o custo, por chamada, do que roda no caminho quente das requisições
+(incremento de contador, observação de histograma e o context manager de
+medição) e o tempo de exportação com muitas séries. Uso (a partir de
+backend/):
+
+    python -m benchmarks.bench_telemetria --chamadas 1000000
+"""
+import argparse
+import time
+
+from services.telemetry import Registro
+
+
+def por_chamada(funcao, chamadas: int) -> float:
+    """Nanossegundos por chamada, descontado o custo do próprio laço"""
+    inicio = time.perf_counter()
+    for _ in range(chamadas):
+        pass
+    vazio = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for _ in range(chamadas):
+        funcao()
+    return (time.perf_counter() - inicio - vazio) / chamadas * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chamadas", type=int, default=1_000_000)
+    parser.add_argument("--series", type=int, default=200)
+    args = parser.parse_args()
+
+    registro = Registro()
+    contador = registro.contador("fallback_mock_total", "", ("motivo",))
+    histograma = registro.histograma("etapa_segundos", "", ("etapa",))
+    http = registro.histograma("http_segundos", "", ("metodo", "rota", "status"))
+
+    def medir():
+        with histograma.medir("metricas"):
+            pass
+
+    casos = {
+        "Contador.inc": lambda: contador.inc("rate_limited"),
+        "Histograma.observar": lambda: histograma.observar(0.042, "openai"),
+        "Histograma.observar (3 rótulos)": lambda: http.observar(
+            0.042, "GET", "/analisar/{username}", "200"
+        ),
+        "with Histograma.medir()": medir,
+        "time.perf_counter (referência)": time.perf_counter,
+    }
+    for nome, funcao in casos.items():
+        print(f"{nome:<34} {por_chamada(funcao, args.chamadas):7.0f} ns/chamada")
+
+    for i in range(args.series):
+        http.observar(0.1, "GET", f"/rota/{i}", "200")
+    inicio = time.perf_counter()
+    texto = registro.exportar()
+    exportacao = time.perf_counter() - inicio
+    print(
+        f"exportar() com {args.series + 3} séries: {exportacao * 1000:.2f} ms"
+        f" ({len(texto.splitlines())} linhas)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,140 @@
+import logging
 import os
 from dotenv import load_dotenv  # pyright: ignore[reportMissingImports]
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Diretório do backend: caminhos de dados não dependem do CWD
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
 class Config:
     """Configurações centralizadas da aplicação"""
-    
+
     # Instagram
     INSTAGRAM_USERNAME = os.getenv("INSTAGRAM_USERNAME")
     INSTAGRAM_PASSWORD = os.getenv("INSTAGRAM_PASSWORD")
-    
+
     # OpenAI
-    [OPENAI_KEY_REMOVED].getenv("OPENAI_API_KEY")
-    
-    # Rate Limiting
-    MIN_REQUEST_INTERVAL = int(os.getenv("MIN_REQUEST_INTERVAL", "10"))  # segundos
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    # Aponte para o servidor fake (services/fake_openai_server.py) para testes offline
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+    OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))  # segundos
+    OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "4"))
+    OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "10"))
+    # Cache dos relatórios de IA por contexto normalizado (usa CACHE_BACKEND)
+    LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    # Análises em lote: relatórios pedidos juntos vão num único request
+    LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "4"))
+    LLM_BATCH_WAIT = float(os.getenv("LLM_BATCH_WAIT", "2"))  # segundos
+    # Camadas de relatório: motor de regras (JSON) ou IA
+    RELATORIO_REGRAS_PATH = os.getenv("RELATORIO_REGRAS_PATH") or None
+    # Em "auto", perfis com menos seguidores que isso usam só as regras
+    RELATORIO_MIN_SEGUIDORES_IA = int(os.getenv("RELATORIO_MIN_SEGUIDORES_IA", "1000"))
+
+    # Rate Limiting: orçamento global de requisições ao Instagram (token bucket)
+    MAX_REQUESTS_PER_HOUR = float(os.getenv("MAX_REQUESTS_PER_HOUR", "100"))
+    INSTAGRAM_BURST = int(os.getenv("INSTAGRAM_BURST", "3"))
+    # Espera máxima na fila de uma análise interativa antes de responder 429
+    INSTAGRAM_MAX_WAIT = float(os.getenv("INSTAGRAM_MAX_WAIT", "60"))  # segundos
+    # Tokens, bloqueio e backoff compartilhados entre workers; vazio = por processo
+    RATE_LIMIT_DB_PATH = os.getenv(
+        "RATE_LIMIT_DB_PATH", os.path.join(BASE_DIR, "data", "rate_limit.sqlite3")
+    )
     CACHE_DURATION_HOURS = int(os.getenv("CACHE_DURATION_HOURS", "1"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+    CACHE_MAX_MB = int(os.getenv("CACHE_MAX_MB", "64"))
+    CACHE_SWEEP_INTERVAL = int(os.getenv("CACHE_SWEEP_INTERVAL", "60"))  # segundos
+    # "sqlite" mantém as análises entre reinícios e entre workers; "memory" desliga
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite").lower()
+    CACHE_DB_PATH = os.getenv(
+        "CACHE_DB_PATH", os.path.join(BASE_DIR, "data", "cache.sqlite3")
+    )
+    CACHE_DB_MAX_ENTRIES = int(os.getenv("CACHE_DB_MAX_ENTRIES", "50000"))
+    # Incrementar quando o formato da resposta de /analisar mudar
+    CACHE_SCHEMA_VERSION = 1
     MAX_POSTS_PER_REQUEST = int(os.getenv("MAX_POSTS_PER_REQUEST", "12"))
+    # Coleta incremental: histórico de posts por perfil (mesmo banco do cache)
+    SNAPSHOT_MAX_POSTS = int(os.getenv("SNAPSHOT_MAX_POSTS", "60"))
+    SNAPSHOT_TTL_DAYS = int(os.getenv("SNAPSHOT_TTL_DAYS", "30"))
+    # Posts já conhecidos a revisitar, além da primeira página (que vem com o
+    # perfil e é sempre atualizada), só para atualizar curtidas/comentários
+    SNAPSHOT_REFRESH_RECENT = int(os.getenv("SNAPSHOT_REFRESH_RECENT", "0"))
+    # Série temporal das coletas (GET /historico); vazio desliga o registro
+    HISTORICO_DIR = os.getenv(
+        "HISTORICO_DIR", os.path.join(BASE_DIR, "data", "historico")
+    )
+    HISTORICO_SEGMENTO = int(os.getenv("HISTORICO_SEGMENTO", "512"))  # registros
+    HISTORICO_CACHE_MB = int(os.getenv("HISTORICO_CACHE_MB", "32"))
     GLOBAL_RATE_LIMIT_DURATION = 300  # 5 minutos quando detectar rate limit
-    
-    # Delays para parecer humano
-    MIN_DELAY_BETWEEN_REQUESTS = 2.0  # segundos
-    MAX_DELAY_BETWEEN_REQUESTS = 4.0
-    MIN_DELAY_BETWEEN_POSTS = 0.5
-    MAX_DELAY_BETWEEN_POSTS = 1.5
-    
+
+    # Executor das chamadas bloqueantes do instaloader
+    INSTAGRAM_EXECUTOR_WORKERS = int(os.getenv("INSTAGRAM_EXECUTOR_WORKERS", "4"))
+    INSTAGRAM_CALL_TIMEOUT = float(
+        os.getenv("INSTAGRAM_CALL_TIMEOUT", "60")
+    )  # segundos
+
+    # Análise em lote (POST /analisar/lote)
+    BATCH_MAX_USERNAMES = int(os.getenv("BATCH_MAX_USERNAMES", "500"))
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "2"))
+    BATCH_MAX_WAIT = int(os.getenv("BATCH_MAX_WAIT", "60"))  # segundos
+
+    # Jobs assíncronos (POST /jobs)
+    JOB_DB_PATH = os.getenv(
+        "JOB_DB_PATH", os.path.join(BASE_DIR, "data", "jobs.sqlite3")
+    )
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_MAX_WAIT = int(os.getenv("JOB_MAX_WAIT", "30"))  # long-poll máximo, segundos
+
+    # Relatórios PDF
+    PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+    # Por padrão o PDF só é transmitido na resposta; True também grava em disco
+    PDF_SAVE_TO_DISK = os.getenv("PDF_SAVE_TO_DISK", "false").lower() == "true"
+    PDF_REPORTS_DIR = os.getenv("PDF_REPORTS_DIR", os.path.join(BASE_DIR, "reports"))
+    PDF_RETENTION_HOURS = float(os.getenv("PDF_RETENTION_HOURS", "168"))
+    PDF_MAX_FILES = int(os.getenv("PDF_MAX_FILES", "200"))
+    PDF_CACHE_MAX_ENTRIES = int(os.getenv("PDF_CACHE_MAX_ENTRIES", "500"))
+    PDF_CACHE_MAX_MB = int(os.getenv("PDF_CACHE_MAX_MB", "64"))
+    PDF_CACHE_TTL_HOURS = float(os.getenv("PDF_CACHE_TTL_HOURS", "24"))
+
     # Retry settings
     MAX_RETRY_ATTEMPTS = 3
     RETRY_DELAY_MULTIPLIER = 3  # segundos * tentativa
-    
+
     # Session management
     SESSION_REFRESH_HOURS = 12
-    
+    # Se False, o login só acontece na primeira coleta real
+    INSTAGRAM_LOGIN_ON_STARTUP = (
+        os.getenv("INSTAGRAM_LOGIN_ON_STARTUP", "true").lower() == "true"
+    )
+
     # Application
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-    
+    # "json" (uma linha JSON por registro) ou "texto"
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
     @classmethod
     def validate(cls):
         """Valida se as configurações essenciais estão presentes"""
         errors = []
-        
+
         if not cls.INSTAGRAM_USERNAME:
             errors.append("INSTAGRAM_USERNAME não configurado no .env")
-        
+
         if not cls.INSTAGRAM_PASSWORD:
             errors.append("INSTAGRAM_PASSWORD não configurado no .env")
-        
+
         if errors:
-            print("⚠️ AVISOS DE CONFIGURAÇÃO:")
             for error in errors:
-                print(f"  - {error}")
-            print("\nA aplicação funcionará apenas com dados mock até que as credenciais sejam configuradas.")
-        
-        return len(errors) == 0
+                logger.warning(error)
+            logger.warning(
+                "A aplicação funcionará apenas com dados mock até que as"
+                " credenciais sejam configuradas"
+            )
 
-# Validar ao importar
-Config.validate()
\ No newline at end of file
+        return len(errors) == 0
@@ -1,19 +1,55 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
+import logging
 import os
 from dotenv import load_dotenv
 from services.instagram_service import InstagramService
-from services.ai_service import AIService
+from services.ai_service import CAMADAS, AIService
 from services.report_service import ReportService
+from services.report_parser import NOMES_SECOES
+from services.single_flight import SingleFlight
+from services.cache import TTLCache, estimar_peso
+from services.persistent_cache import SQLiteCache
+from services.models import Analise
+from services.timeseries import SerieTemporal, resumir_historico
+from services.batch_service import BatchAnalyzer
+from services.streaming import MEDIA_TYPES, formatar_evento
+from services.job_queue import AdiarJob, JobQueue, JobStore
+from services.scheduler import AgendadorRequisicoes, RequisicaoRecusada, Vez
+from services.rate_limit_state import EstadoLimite, EstadoLimiteSQLite
+from services.logging_config import (
+    CorrelacionarRequisicoes,
+    configurar_logs,
+    encerrar_logs,
+)
+from services.telemetry import (
+    FALLBACK_MOCK,
+    HTTP_EM_ANDAMENTO,
+    LATENCIA_HTTP,
+    MEDIA_TYPE,
+    REGISTRO,
+    MedirRequisicoes,
+)
+from config import Config
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Callable, List, Optional
 import asyncio
+import math
+import time
+import uuid
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Logs estruturados, escritos por um thread próprio (fora do event loop)
+configurar_logs(Config.LOG_LEVEL, Config.LOG_FORMAT)
+# Nome fixo: rodando como script, __name__ seria "__main__"
+logger = logging.getLogger("main")
+Config.validate()
+
 app = FastAPI(title="Instagram Analyzer API", version="1.0.0")
 
 # Configurar CORS
@@ -24,88 +60,220 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Latência e requisições em andamento por endpoint (ver /metrics)
+app.add_middleware(
+    MedirRequisicoes, latencia=LATENCIA_HTTP, em_andamento=HTTP_EM_ANDAMENTO
+)
+# Id de correlação (X-Request-ID) em todos os logs de cada requisição
+app.add_middleware(CorrelacionarRequisicoes)
 
 # Inicializar serviços
-instagram_service = InstagramService()
-ai_service = AIService()
+if Config.CACHE_BACKEND == "sqlite":
+    snapshot_store = SQLiteCache(
+        Config.CACHE_DB_PATH,
+        namespace="snapshots",
+        ttl_seconds=Config.SNAPSHOT_TTL_DAYS * 86400,
+        max_entries=Config.CACHE_DB_MAX_ENTRIES,
+    )
+else:
+    snapshot_store = TTLCache(
+        max_entries=Config.CACHE_MAX_ENTRIES,
+        ttl_seconds=Config.SNAPSHOT_TTL_DAYS * 86400,
+    )
+serie_temporal = (
+    SerieTemporal(
+        Config.HISTORICO_DIR,
+        segmento=Config.HISTORICO_SEGMENTO,
+        cache_mb=Config.HISTORICO_CACHE_MB,
+    )
+    if Config.HISTORICO_DIR
+    else None
+)
+# Orçamento global de requisições ao Instagram, por onde passa toda coleta;
+# com RATE_LIMIT_DB_PATH o estado é o mesmo para todos os workers
+agendador = AgendadorRequisicoes(
+    Config.MAX_REQUESTS_PER_HOUR,
+    rajada=Config.INSTAGRAM_BURST,
+    estado=(
+        EstadoLimiteSQLite(Config.RATE_LIMIT_DB_PATH)
+        if Config.RATE_LIMIT_DB_PATH
+        else EstadoLimite()
+    ),
+)
+instagram_service = InstagramService(
+    snapshots=snapshot_store, historico=serie_temporal, agendador=agendador
+)
+if Config.CACHE_BACKEND == "sqlite":
+    relatorios_ia_cache = SQLiteCache(
+        Config.CACHE_DB_PATH,
+        namespace="relatorios_ia",
+        ttl_seconds=Config.LLM_CACHE_TTL_HOURS * 3600,
+        max_entries=Config.LLM_CACHE_MAX_ENTRIES,
+    )
+else:
+    relatorios_ia_cache = TTLCache(
+        max_entries=Config.LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds=Config.LLM_CACHE_TTL_HOURS * 3600,
+    )
+ai_service = AIService(cache=relatorios_ia_cache)
 report_service = ReportService()
 
 
+# Tarefas de background iniciadas no startup (mantidas para não serem coletadas)
+background_tasks = set()
+
+
+@app.on_event("startup")
+async def iniciar_servicos():
+    """Dispara o login do Instagram em background para a API subir imediatamente"""
+    tarefas = [rate_limiter.sweep_loop(Config.CACHE_SWEEP_INTERVAL)]
+    if Config.INSTAGRAM_LOGIN_ON_STARTUP:
+        tarefas.append(instagram_service.ensure_login())
+
+    for coro in tarefas:
+        task = asyncio.create_task(coro)
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+    await job_queue.iniciar()
+
+
+@app.on_event("shutdown")
+async def encerrar_servicos():
+    """Libera recursos dos serviços ao desligar a API"""
+    for task in list(background_tasks):
+        task.cancel()
+    await job_queue.parar()
+    instagram_service.close()
+    await ai_service.aclose()
+    report_service.close()
+    encerrar_logs()
+
+
 # Sistema de controle de rate limiting global
 class RateLimiter:
     def __init__(self, instagram_service):
         self.instagram_service = instagram_service
-        self.last_requests: Dict[str, datetime] = {}
-        self.request_cache: Dict[str, tuple] = {}
-        self.min_interval = 10  # segundos entre requisições do mesmo perfil
-        self.cache_duration = timedelta(hours=1)  # Cache de 1 hora
-        self.global_blocked_until: Optional[datetime] = None
-
-    def check_rate_limit(self, username: str) -> tuple[bool, Optional[int]]:
-        """Verifica se pode fazer requisição. Retorna (pode_fazer, tempo_espera)"""
-
-        # Verificar rate limit do InstagramService primeiro
-        if self.instagram_service.rate_limit_until:
-            if datetime.now() < self.instagram_service.rate_limit_until:
-                wait_time = int(
-                    (self.instagram_service.rate_limit_until - datetime.now()).total_seconds()
-                )
-                print(f"⚠️ Instagram rate limit ativo: aguarde {wait_time}s")
-                return False, wait_time
-
-        # Verificar se há bloqueio global
-        if self.global_blocked_until:
-            if datetime.now() < self.global_blocked_until:
-                wait_time = int(
-                    (self.global_blocked_until - datetime.now()).total_seconds()
-                )
-                return False, wait_time
-            else:
-                self.global_blocked_until = None
-
-        # Verificar cache
-        if username in self.request_cache:
-            cached_data, timestamp = self.request_cache[username]
-            if datetime.now() - timestamp < self.cache_duration:
-                return True, 0  # Pode usar cache
+        self.cache_duration = timedelta(hours=Config.CACHE_DURATION_HOURS)
+
+        # Ambos são limitados: entradas expiram pelo TTL e as menos usadas
+        # são despejadas ao atingir o limite de entradas/memória. As análises
+        # ficam compactas (Analise, com posts em colunas); get_cached_data
+        # devolve sempre um dict novo.
+        self.request_cache = TTLCache(
+            max_entries=Config.CACHE_MAX_ENTRIES,
+            ttl_seconds=self.cache_duration.total_seconds(),
+            max_weight=Config.CACHE_MAX_MB * 1024 * 1024,
+            peso=lambda analise: estimar_peso(analise.to_dict()),
+        )
 
-        # Verificar rate limit por perfil
-        if username in self.last_requests:
-            elapsed = (datetime.now() - self.last_requests[username]).total_seconds()
-            if elapsed < self.min_interval:
-                wait_time = int(self.min_interval - elapsed)
-                return False, wait_time
+        # Segundo nível persistente, compartilhado entre reinícios e workers
+        self.persistent_cache = None
+        if Config.CACHE_BACKEND == "sqlite":
+            self.persistent_cache = SQLiteCache(
+                Config.CACHE_DB_PATH,
+                namespace="analisar",
+                ttl_seconds=self.cache_duration.total_seconds(),
+                max_entries=Config.CACHE_DB_MAX_ENTRIES,
+                versao=Config.CACHE_SCHEMA_VERSION,
+            )
 
-        return True, 0
+    def check_rate_limit(
+        self, username: str, vez: Optional[Vez] = None
+    ) -> tuple[bool, Optional[int]]:
+        """
+        Verifica se pode fazer requisição. Retorna (pode_fazer, tempo_espera)
+
+        Pergunta ao agendador quando sairia uma coleta completa do perfil: se
+        passar da espera máxima da vez, tempo_espera é a ETA em segundos.
+        """
+        vez = vez or _vez_interativa(username)
+        aceita, eta = self.instagram_service.agendador.admitir(
+            vez.faixa,
+            vez.chamador or username,
+            self.instagram_service.custo_coleta,
+            vez.espera_maxima,
+        )
+        if aceita:
+            return True, 0
+        logger.warning(
+            "Orçamento do Instagram esgotado",
+            extra={"username": username, "eta": math.ceil(eta)},
+        )
+        return False, max(1, math.ceil(eta))
 
-    def register_request(self, username: str, data: dict = None):
+    async def register_request(self, username: str, data: dict = None):
         """Registra uma requisição bem-sucedida"""
-        self.last_requests[username] = datetime.now()
         if data:
-            self.request_cache[username] = (data, datetime.now())
+            self.request_cache.set(username, Analise.from_dict(data))
+            if self.persistent_cache is not None:
+                await self.persistent_cache.set_async(username, data)
+
+    def has_cached_data(self, username: str) -> bool:
+        """Verifica se há dados em cache (memória ou disco) sem afetar contadores"""
+        if username in self.request_cache:
+            return True
+        return self.persistent_cache is not None and username in self.persistent_cache
 
     def get_cached_data(self, username: str) -> Optional[dict]:
         """Obtém dados do cache se disponível"""
-        if username in self.request_cache:
-            cached_data, timestamp = self.request_cache[username]
-            if datetime.now() - timestamp < self.cache_duration:
-                return cached_data
+        analise = self.request_cache.get(username)
+        if analise is not None:
+            return analise.to_dict()
+        if self.persistent_cache is not None:
+            entry = self.persistent_cache.get_entry(username)
+            if entry:
+                # Promove para a memória preservando a idade original
+                data, created_at = entry
+                self.request_cache.set(
+                    username, Analise.from_dict(data), created_at.timestamp()
+                )
+                return data
         return None
 
-    def set_global_block(self, seconds: int):
-        """Define um bloqueio global"""
-        self.global_blocked_until = datetime.now() + timedelta(seconds=seconds)
-        print(f"🔴 Bloqueio global ativado por {seconds} segundos")
+    def cache_age_minutes(self, username: str) -> int:
+        """Idade em minutos da entrada em cache (0 se ausente)"""
+        return int((self.request_cache.idade(username) or 0) / 60)
+
+    async def sweep_loop(self, interval: float):
+        """Remove periodicamente entradas expiradas dos caches"""
+        while True:
+            await asyncio.sleep(interval)
+            self.request_cache.purge_expired()
+            if self.persistent_cache is not None:
+                await asyncio.to_thread(self.persistent_cache.purge_expired)
+            report_service.pdf_cache.purge_expired()
+            for cache in (snapshot_store, relatorios_ia_cache):
+                if isinstance(cache, TTLCache):
+                    cache.purge_expired()
+
+
+def _vez_interativa(username: str) -> Vez:
+    """Coleta pedida por um cliente esperando a resposta"""
+    return Vez("interativo", username, Config.INSTAGRAM_MAX_WAIT)
 
 
 # Criar rate limiter passando o instagram_service
 rate_limiter = RateLimiter(instagram_service)
 
+# Coleta+análise em andamento, por (modo, username): requisições simultâneas
+# para o mesmo perfil aguardam uma única execução
+analises_em_andamento = SingleFlight()
+
 
 class UsernameRequest(BaseModel):
     username: str
 
 
+class LoteRequest(BaseModel):
+    usernames: List[str]
+    formato: str = "ndjson"
+
+
+class JobRequest(BaseModel):
+    username: str
+
+
 @app.get("/")
 async def root():
     return {
@@ -114,10 +282,14 @@ async def root():
         "status": "online",
         "endpoints": {
             "analisar": "/analisar/{username}",
+            "analisar_stream": "/analisar/{username}/stream",
             "perfil": "/perfil/{username}",
+            "lote": "POST /analisar/lote",
+            "jobs": "POST /jobs, GET /jobs/{job_id}",
             "mock": "/analisar-mock/{username}",
             "pdf": "/gerar-pdf/{username}",
             "status": "/status",
+            "metrics": "/metrics",
         },
     }
 
@@ -125,232 +297,631 @@ async def root():
 @app.get("/status")
 async def check_status():
     """Verifica o status do sistema e rate limiting"""
-    blocked_until = rate_limiter.global_blocked_until
-    is_blocked = blocked_until and datetime.now() < blocked_until
-    
-    # Verificar também o rate limit do Instagram Service
-    instagram_blocked = instagram_service.rate_limit_until and datetime.now() < instagram_service.rate_limit_until
+    blocked_until = agendador.bloqueado_ate()
+    is_blocked = blocked_until is not None
 
     return {
-        "status": "blocked" if (is_blocked or instagram_blocked) else "online",
-        "rate_limited": is_blocked or instagram_blocked,
+        "status": "blocked" if is_blocked else "online",
+        "rate_limited": is_blocked,
         "api_blocked_until": blocked_until.isoformat() if is_blocked else None,
-        "instagram_blocked_until": instagram_service.rate_limit_until.isoformat() if instagram_blocked else None,
+        "instagram_blocked_until": blocked_until.isoformat() if is_blocked else None,
+        "agendador": agendador.stats(),
         "cache_entries": len(rate_limiter.request_cache),
+        "cache": rate_limiter.request_cache.stats(),
+        "cache_persistente": (
+            rate_limiter.persistent_cache.stats()
+            if rate_limiter.persistent_cache
+            else None
+        ),
+        "instagram_login": instagram_service.login_info(),
+        "analises_em_andamento": analises_em_andamento.stats(),
+        "jobs": job_queue.stats(),
+        "pdf_cache": report_service.pdf_cache.stats(),
+        "ia": ai_service.stats(),
         "message": (
-            "Sistema operacional" if not (is_blocked or instagram_blocked) else "Sistema em rate limiting"
+            "Sistema operacional" if not is_blocked else "Sistema em rate limiting"
         ),
     }
 
 
+def _sem_progresso(evento: str, dados: dict):
+    pass
+
+
+def _eventos_analise(resposta: dict):
+    """Eventos (nome, dados) de uma análise completa, na ordem do streaming"""
+    yield "perfil", {"perfil": resposta["perfil"], "dados": resposta["dados"]}
+    yield "metricas", {"metricas": resposta["metricas"]}
+    for secao, texto in (resposta.get("relatorio_ia") or {}).items():
+        yield "secao", {"secao": secao, "texto": texto}
+
+
+async def _gerar_relatorio(
+    dados_perfil: dict,
+    metricas: dict,
+    ao_progredir: Callable[[str, dict], None],
+    agrupar: bool = False,
+    camada: str = "auto",
+) -> tuple:
+    """
+    Gera o relatório avisando cada seção assim que ela fica pronta
+
+    Retorna (relatório, camada usada: "regras" ou "ia"). Com agrupar=True
+    (análises em lote) o relatório de IA vai num request agrupado com os de
+    outros perfis e as seções saem todas ao final.
+    """
+    camada = ai_service.escolher_camada(dados_perfil, metricas, camada)
+    if agrupar:
+        relatorio_ia = await ai_service.gerar_relatorio_agrupado(
+            dados_perfil, metricas, camada
+        )
+        for secao, texto in relatorio_ia.items():
+            ao_progredir("secao", {"secao": secao, "texto": texto})
+        return relatorio_ia, camada
+
+    relatorio_ia = {}
+    async for secao, texto in ai_service.gerar_relatorio_stream(
+        dados_perfil, metricas, camada
+    ):
+        relatorio_ia[secao] = texto
+        ao_progredir("secao", {"secao": secao, "texto": texto})
+    return {secao: relatorio_ia[secao] for secao in NOMES_SECOES}, camada
+
+
+async def _analisar_com_mock(
+    username: str,
+    motivo: str,
+    ao_progredir: Callable[[str, dict], None],
+    agrupar: bool = False,
+    camada: str = "auto",
+) -> tuple:
+    """Gera a análise a partir dos dados mock (fallback quando o Instagram falha)"""
+    instagram_service.use_mock = True
+    dados_perfil = await instagram_service.get_profile_data(username)
+    dados_perfil["_mock_data"] = True
+    dados_perfil["_mock_reason"] = motivo
+    FALLBACK_MOCK.inc(motivo)
+    ao_progredir("perfil", {"perfil": f"@{username}", "dados": dados_perfil})
+
+    metricas = instagram_service.calcular_metricas(dados_perfil)
+    ao_progredir("metricas", {"metricas": metricas})
+
+    relatorio_ia, camada = await _gerar_relatorio(
+        dados_perfil, metricas, ao_progredir, agrupar, camada
+    )
+    return dados_perfil, metricas, relatorio_ia, camada
+
+
+async def _coletar_e_analisar(
+    username: str,
+    vez: Optional[Vez] = None,
+    ao_progredir: Callable[[str, dict], None] = _sem_progresso,
+    agrupar: bool = False,
+    camada: str = "auto",
+) -> dict:
+    """
+    Coleta dados reais (com fallback para mock), calcula métricas e gera o relatório
+
+    ao_progredir(evento, dados) é chamado assim que cada parte fica pronta
+    ("perfil", "metricas" e uma "secao" por seção do relatório), para quem
+    transmite a análise aos poucos. agrupar=True junta o relatório de IA
+    aos de outros perfis do lote num único request; camada escolhe entre
+    motor de regras e IA ("auto" segue a política do AIService). vez diz
+    como a coleta entra na fila do agendador (padrão: interativa).
+    """
+    # Tentar coletar dados reais do Instagram
+    try:
+        logger.info("Coletando dados reais do perfil", extra={"username": username})
+
+        dados_perfil = await instagram_service.get_profile_data(
+            username, vez=vez or _vez_interativa(username)
+        )
+        dados_perfil["_real_data"] = True
+
+        # Verificar se conseguiu coletar posts
+        if not dados_perfil.get("posts") or len(dados_perfil.get("posts", [])) == 0:
+            logger.warning(
+                "Perfil coletado sem posts: Instagram pode estar bloqueando",
+                extra={"username": username},
+            )
+            # Adicionar aviso
+            dados_perfil["_partial_data"] = True
+            dados_perfil["_partial_reason"] = "posts_blocked"
+
+        logger.info("Dados reais coletados", extra={"username": username})
+        ao_progredir("perfil", {"perfil": f"@{username}", "dados": dados_perfil})
+
+        metricas = instagram_service.calcular_metricas(dados_perfil)
+        ao_progredir("metricas", {"metricas": metricas})
+
+        # Gerar relatório com IA
+        relatorio_ia, camada = await _gerar_relatorio(
+            dados_perfil, metricas, ao_progredir, agrupar, camada
+        )
+
+        # Registrar requisição bem-sucedida
+        response_data = {
+            "perfil": f"@{username}",
+            "dados": dados_perfil,
+            "metricas": metricas,
+            "relatorio_ia": relatorio_ia,
+            "relatorio_camada": camada,
+            "status": "success",
+            "data_source": "instagram",
+        }
+        await rate_limiter.register_request(username, response_data)
+
+        return response_data
+
+    except Exception as instagram_error:
+        error_msg = str(instagram_error).lower()
+
+        # Perfil não encontrado ou privado
+        if (
+            "não encontrado" in error_msg
+            or "privado" in error_msg
+            or "not found" in error_msg
+        ):
+            logger.info(
+                "Perfil não encontrado ou privado, usando mock",
+                extra={"username": username},
+            )
+            motivo = "perfil_nao_encontrado"
+            status = "success"
+            extras = {
+                "warning": "Perfil não encontrado ou privado - usando dados de demonstração",
+            }
+
+        # Orçamento esgotado: a vez no agendador passaria da espera máxima
+        elif isinstance(instagram_error, RequisicaoRecusada):
+            logger.info(
+                "Coleta recusada pelo agendador",
+                extra={
+                    "username": username,
+                    "retry_after": instagram_error.retry_after,
+                },
+            )
+            motivo = "rate_limited"
+            status = "limited"
+            extras = {
+                "warning": "Limite de requisições ao Instagram atingido. Usando dados de demonstração.",
+                "retry_after": instagram_error.retry_after,
+            }
+
+        # Rate limiting detectado
+        elif (
+            "rate limiting" in error_msg
+            or "aguarde" in error_msg
+            or "wait" in error_msg
+        ):
+            logger.warning(
+                "Rate limiting detectado",
+                extra={"username": username, "erro": str(instagram_error)},
+            )
+
+            # Suspender todas as coletas
+            await agendador.bloquear(300)  # 5 minutos
+            motivo = "rate_limited"
+            status = "limited"
+            extras = {
+                "warning": "Instagram está limitando requisições. Usando dados de demonstração.",
+                "retry_after": 300,
+            }
+
+        # Acesso bloqueado (401, 403)
+        elif "bloqueou" in error_msg or "blocked" in error_msg or "401" in error_msg:
+            logger.warning(
+                "Acesso ao Instagram bloqueado",
+                extra={"username": username, "erro": str(instagram_error)},
+            )
+            await agendador.bloquear(1800)  # 30 minutos
+            motivo = "access_blocked"
+            status = "blocked"
+            extras = {
+                "warning": "Acesso ao Instagram temporariamente bloqueado. Usando dados de demonstração.",
+                "retry_after": 1800,
+            }
+
+        # Outros erros - usar mock como fallback
+        else:
+            logger.error(
+                "Erro inesperado na coleta, usando fallback mock",
+                extra={"username": username, "erro": str(instagram_error)},
+            )
+            motivo = "erro_instagram"
+            status = "fallback"
+            extras = {
+                "warning": f"Erro ao coletar dados reais: {str(instagram_error)[:100]}",
+            }
+
+        # Retornar dados mock ao invés de erro
+        dados_perfil, metricas, relatorio_ia, camada = await _analisar_com_mock(
+            username, motivo, ao_progredir, agrupar, camada
+        )
+        return {
+            "perfil": f"@{username}",
+            "dados": dados_perfil,
+            "metricas": metricas,
+            "relatorio_ia": relatorio_ia,
+            "relatorio_camada": camada,
+            "status": status,
+            "data_source": "mock",
+            **extras,
+        }
+
+
+def _validar_camada(relatorio: str):
+    if relatorio not in CAMADAS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"relatorio inválido: use {', '.join(CAMADAS)}",
+        )
+
+
+def _chave_analise(username: str, relatorio: str = "auto") -> tuple:
+    """Chave do single-flight: camadas forçadas não compartilham a execução"""
+    if relatorio == "auto":
+        return ("analisar", username)
+    return ("analisar", username, relatorio)
+
+
+def _analise_em_cache(username: str, relatorio: str = "auto") -> Optional[dict]:
+    """Análise em cache (memória ou SQLite) do perfil, marcada como cached"""
+    cached_data = rate_limiter.get_cached_data(username)
+    if not cached_data:
+        return None
+    if relatorio != "auto" and cached_data.get("relatorio_camada") != relatorio:
+        return None
+    logger.info("Análise servida do cache", extra={"username": username})
+    return {
+        **cached_data,
+        "cached": True,
+        "cache_age_minutes": rate_limiter.cache_age_minutes(username),
+    }
+
+
+def _verificar_limite(
+    username: str, relatorio: str = "auto", refresh: bool = False
+) -> Optional[dict]:
+    """
+    Aplica o cache e o rate limiting antes de uma nova coleta
+
+    Retorna a análise em cache se houver uma válida (inclusive a gravada por
+    outro worker ou antes de um reinício), None se a coleta pode seguir ou
+    levanta 429. Com refresh=True o cache só é usado se o perfil estiver
+    limitado.
+    """
+    if not refresh:
+        cached_data = _analise_em_cache(username, relatorio)
+        if cached_data:
+            return cached_data
+
+    can_proceed, wait_time = rate_limiter.check_rate_limit(username)
+    if can_proceed or wait_time <= 0:
+        return None
+
+    # Limitado: melhor uma análise em cache (de qualquer camada) que um 429
+    cached_data = _analise_em_cache(username)
+    if cached_data:
+        return cached_data
+
+    # Sem cache, retornar erro de rate limiting
+    raise HTTPException(
+        status_code=429,
+        detail={
+            "error": "rate_limited",
+            "message": f"Por favor, aguarde {wait_time} segundos antes de tentar novamente",
+            "retry_after": wait_time,
+            "backoff": agendador.backoff(),
+            "suggestion": "Use ?adiar=true para agendar a análise ou /analisar-mock/{username} para dados de demonstração",
+        },
+    )
+
+
+async def _adiar_analise(username: str, retry_after: int) -> JSONResponse:
+    """Agenda a análise como job para quando o bloqueio acabar (202)"""
+    job = await job_queue.enfileirar(
+        "analisar", {"username": username}, executar_apos=time.time() + retry_after
+    )
+    logger.info(
+        "Análise adiada",
+        extra={"username": username, "retry_after": retry_after, "job": job["id"]},
+    )
+    return JSONResponse(
+        status_code=202, content={**_resumo_job(job), "retry_after": retry_after}
+    )
+
+
 @app.get("/analisar/{username}")
-async def analisar_perfil(username: str, force_mock: bool = False):
+async def analisar_perfil(
+    username: str,
+    force_mock: bool = False,
+    relatorio: str = "auto",
+    adiar: bool = False,
+    refresh: bool = False,
+):
     """
     Analisa um perfil do Instagram e retorna dados + métricas
 
     Parâmetros:
     - username: Nome do perfil (sem @)
     - force_mock: Se True, usa dados mock diretamente (opcional)
+    - relatorio: "auto" (padrão), "regras" ou "ia" - quem gera o relatório
+    - adiar: em rate limiting, agenda a análise como job (202 com a URL do
+      job) em vez de responder 429 ou com dados de demonstração
+    - refresh: ignora a análise em cache e coleta de novo (o cache ainda
+      é usado se o perfil estiver limitado)
     """
+    _validar_camada(relatorio)
     try:
         # Verificar se deve usar dados mock forçadamente
         if force_mock:
-            print(f"⚠️ Modo mock forçado para @{username}")
+            logger.info("Modo mock forçado", extra={"username": username})
             instagram_service.use_mock = True
             dados_perfil = await instagram_service.get_profile_data(username)
             metricas = instagram_service.calcular_metricas(dados_perfil)
             dados_perfil["_mock_data"] = True
             dados_perfil["_mock_reason"] = "forced"
-            relatorio_ia = await ai_service.gerar_relatorio(dados_perfil, metricas)
+            FALLBACK_MOCK.inc("forced")
+            relatorio_ia, camada = await _gerar_relatorio(
+                dados_perfil, metricas, _sem_progresso, camada=relatorio
+            )
 
             return {
                 "perfil": f"@{username}",
                 "dados": dados_perfil,
                 "metricas": metricas,
                 "relatorio_ia": relatorio_ia,
+                "relatorio_camada": camada,
                 "status": "success",
                 "data_source": "mock",
             }
 
-        # Verificar rate limiting
-        can_proceed, wait_time = rate_limiter.check_rate_limit(username)
-
-        if not can_proceed and wait_time > 0:
-            # Verificar se tem dados em cache
-            cached_data = rate_limiter.get_cached_data(username)
+        # Se já há uma análise deste perfil em andamento, apenas aguardá-la
+        chave = _chave_analise(username, relatorio)
+        if not analises_em_andamento.em_andamento(chave):
+            try:
+                cached_data = _verificar_limite(username, relatorio, refresh)
+            except HTTPException as e:
+                if not adiar or e.status_code != 429:
+                    raise
+                return await _adiar_analise(username, e.detail["retry_after"])
             if cached_data:
-                print(f"📦 Usando dados do cache para @{username}")
-                return {
-                    **cached_data,
-                    "cached": True,
-                    "cache_age_minutes": int(
-                        (
-                            datetime.now() - rate_limiter.request_cache[username][1]
-                        ).total_seconds()
-                        / 60
-                    ),
-                }
+                return cached_data
 
-            # Sem cache, retornar erro de rate limiting
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "error": "rate_limited",
-                    "message": f"Por favor, aguarde {wait_time} segundos antes de tentar novamente",
-                    "retry_after": wait_time,
-                    "suggestion": "Use o endpoint /analisar-mock/{username} para dados de demonstração",
-                },
-            )
+        resultado = await analises_em_andamento.do(
+            chave, lambda: _coletar_e_analisar(username, camada=relatorio)
+        )
+        if adiar and resultado["status"] == "limited":
+            return await _adiar_analise(username, resultado["retry_after"])
+        return resultado
 
-        # Tentar coletar dados reais do Instagram
-        try:
-            print(f"🔍 Tentando coletar dados reais do perfil @{username}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Erro inesperado na análise", extra={"username": username})
+        raise HTTPException(
+            status_code=500, detail=f"Erro interno do servidor: {str(e)}"
+        )
 
-            # Adicionar delay antes da requisição
-            await asyncio.sleep(2)
 
-            dados_perfil = await instagram_service.get_profile_data(username)
-            metricas = instagram_service.calcular_metricas(dados_perfil)
-            dados_perfil["_real_data"] = True
+@app.get("/analisar/{username}/stream")
+async def analisar_perfil_stream(
+    username: str,
+    formato: str = "ndjson",
+    relatorio: str = "auto",
+    refresh: bool = False,
+):
+    """
+    Variante de /analisar que transmite cada parte assim que fica pronta
 
-            # Verificar se conseguiu coletar posts
-            if not dados_perfil.get("posts") or len(dados_perfil.get("posts", [])) == 0:
-                print(
-                    f"⚠️ Perfil coletado mas sem posts - Instagram pode estar bloqueando"
+    Eventos, em ordem: perfil (dados do perfil, logo após a coleta), metricas,
+    secao (uma por seção do relatório de IA) e fim (a resposta completa,
+    igual à de /analisar). Em caso de falha o último evento é erro.
+    Parâmetros:
+    - formato: "ndjson" (padrão) ou "sse"
+    - relatorio: "auto" (padrão), "regras" ou "ia", como em /analisar
+    - refresh: ignora a análise em cache, como em /analisar
+    """
+    if formato not in MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400, detail="Formato inválido: use 'ndjson' ou 'sse'"
+        )
+    _validar_camada(relatorio)
+
+    chave = _chave_analise(username, relatorio)
+    resposta = None
+    if not analises_em_andamento.em_andamento(chave):
+        resposta = _verificar_limite(username, relatorio, refresh)
+
+    async def gerar_eventos():
+        nonlocal resposta
+        enviados = set()
+        if resposta is None:
+            fila: asyncio.Queue = asyncio.Queue()
+            analise = asyncio.ensure_future(
+                analises_em_andamento.do(
+                    chave,
+                    lambda: _coletar_e_analisar(
+                        username,
+                        ao_progredir=lambda evento, dados: fila.put_nowait(
+                            (evento, dados)
+                        ),
+                        camada=relatorio,
+                    ),
+                )
+            )
+            analise.add_done_callback(lambda _: fila.put_nowait(None))
+            while (item := await fila.get()) is not None:
+                evento, dados = item
+                enviados.add((evento, dados.get("secao")))
+                yield formatar_evento(evento, dados, formato)
+            try:
+                resposta = analise.result()
+            except Exception as e:
+                logger.error(
+                    "Erro inesperado na análise",
+                    extra={"username": username, "erro": str(e)},
                 )
-                # Adicionar aviso
-                dados_perfil["_partial_data"] = True
-                dados_perfil["_partial_reason"] = "posts_blocked"
+                yield formatar_evento("erro", {"detail": str(e)}, formato)
+                return
 
-            print(f"✅ Dados reais coletados com sucesso para @{username}")
+        # Cache ou análise iniciada por outra requisição: enviar o que faltou
+        for evento, dados in _eventos_analise(resposta):
+            if (evento, dados.get("secao")) not in enviados:
+                yield formatar_evento(evento, dados, formato)
+        yield formatar_evento("fim", resposta, formato)
 
-            # Gerar relatório com IA
-            relatorio_ia = await ai_service.gerar_relatorio(dados_perfil, metricas)
+    return StreamingResponse(gerar_eventos(), media_type=MEDIA_TYPES[formato])
 
-            # Registrar requisição bem-sucedida
-            response_data = {
-                "perfil": f"@{username}",
-                "dados": dados_perfil,
-                "metricas": metricas,
-                "relatorio_ia": relatorio_ia,
-                "status": "success",
-                "data_source": "instagram",
-            }
-            rate_limiter.register_request(username, response_data)
-
-            return response_data
-
-        except Exception as instagram_error:
-            error_msg = str(instagram_error).lower()
-
-            # Perfil não encontrado ou privado
-            if (
-                "não encontrado" in error_msg
-                or "privado" in error_msg
-                or "not found" in error_msg
-            ):
-                print(f"⚠️ Perfil não encontrado/privado, usando mock")
-                instagram_service.use_mock = True
-                dados_perfil = await instagram_service.get_profile_data(username)
-                metricas = instagram_service.calcular_metricas(dados_perfil)
-                dados_perfil["_mock_data"] = True
-                dados_perfil["_mock_reason"] = "perfil_nao_encontrado"
-                relatorio_ia = await ai_service.gerar_relatorio(dados_perfil, metricas)
-
-                return {
-                    "perfil": f"@{username}",
-                    "dados": dados_perfil,
-                    "metricas": metricas,
-                    "relatorio_ia": relatorio_ia,
-                    "status": "success",
-                    "data_source": "mock",
-                    "warning": "Perfil não encontrado ou privado - usando dados de demonstração",
-                }
 
-            # Rate limiting detectado
-            elif (
-                "rate limiting" in error_msg
-                or "aguarde" in error_msg
-                or "wait" in error_msg
-            ):
-                print(f"🔴 Rate limiting detectado: {instagram_error}")
-
-                # Ativar bloqueio global
-                rate_limiter.set_global_block(300)  # 5 minutos
-
-                # Usar dados mock como fallback
-                instagram_service.use_mock = True
-                dados_perfil = await instagram_service.get_profile_data(username)
-                metricas = instagram_service.calcular_metricas(dados_perfil)
-                dados_perfil["_mock_data"] = True
-                dados_perfil["_mock_reason"] = "rate_limited"
-                relatorio_ia = await ai_service.gerar_relatorio(dados_perfil, metricas)
-
-                return {
-                    "perfil": f"@{username}",
-                    "dados": dados_perfil,
-                    "metricas": metricas,
-                    "relatorio_ia": relatorio_ia,
-                    "status": "limited",
-                    "data_source": "mock",
-                    "warning": "Instagram está limitando requisições. Usando dados de demonstração.",
-                    "retry_after": 300,
-                }
+async def _coletar_perfil(username: str) -> dict:
+    """Coleta apenas os dados básicos do perfil"""
+    dados_perfil = await instagram_service.get_profile_data(
+        username, vez=_vez_interativa(username)
+    )
+    await rate_limiter.register_request(username)
+    return dados_perfil
 
-            # Acesso bloqueado (401, 403)
-            elif (
-                "bloqueou" in error_msg or "blocked" in error_msg or "401" in error_msg
-            ):
-                print(f"🚫 Acesso bloqueado: {instagram_error}")
-                rate_limiter.set_global_block(1800)  # 30 minutos
-
-                # Retornar dados mock ao invés de erro
-                instagram_service.use_mock = True
-                dados_perfil = await instagram_service.get_profile_data(username)
-                metricas = instagram_service.calcular_metricas(dados_perfil)
-                dados_perfil["_mock_data"] = True
-                dados_perfil["_mock_reason"] = "access_blocked"
-                relatorio_ia = await ai_service.gerar_relatorio(dados_perfil, metricas)
-
-                return {
-                    "perfil": f"@{username}",
-                    "dados": dados_perfil,
-                    "metricas": metricas,
-                    "relatorio_ia": relatorio_ia,
-                    "status": "blocked",
-                    "data_source": "mock",
-                    "warning": "Acesso ao Instagram temporariamente bloqueado. Usando dados de demonstração.",
-                    "retry_after": 1800,
-                }
 
-            # Outros erros - usar mock como fallback
-            else:
-                print(f"⚠️ Erro inesperado, usando fallback mock: {instagram_error}")
-                instagram_service.use_mock = True
-                dados_perfil = await instagram_service.get_profile_data(username)
-                metricas = instagram_service.calcular_metricas(dados_perfil)
-                dados_perfil["_mock_data"] = True
-                dados_perfil["_mock_reason"] = "erro_instagram"
-                relatorio_ia = await ai_service.gerar_relatorio(dados_perfil, metricas)
-
-                return {
-                    "perfil": f"@{username}",
-                    "dados": dados_perfil,
-                    "metricas": metricas,
-                    "relatorio_ia": relatorio_ia,
-                    "status": "fallback",
-                    "data_source": "mock",
-                    "warning": f"Erro ao coletar dados reais: {str(instagram_error)[:100]}",
-                }
+async def _analisar_para_lote(username: str, vez: Vez) -> dict:
+    """Análise de um perfil do lote, compartilhando execuções em andamento"""
+    return await analises_em_andamento.do(
+        ("analisar", username),
+        lambda: _coletar_e_analisar(username, vez=vez, agrupar=True),
+    )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"❌ Erro inesperado na análise: {e}")
+
+def _criar_analisador_lote() -> BatchAnalyzer:
+    """Um analisador por lote: cada lote é um chamador no rodízio do agendador"""
+    vez = Vez("lote", f"lote-{uuid.uuid4().hex[:8]}", Config.BATCH_MAX_WAIT)
+    return BatchAnalyzer(
+        processar=lambda username: _analisar_para_lote(username, vez),
+        buscar_cache=rate_limiter.get_cached_data,
+        verificar_limite=lambda username: rate_limiter.check_rate_limit(username, vez),
+        concorrencia=Config.BATCH_CONCURRENCY,
+    )
+
+
+@app.post("/analisar/lote")
+async def analisar_lote(request: LoteRequest):
+    """
+    Analisa uma lista de perfis e transmite cada resultado assim que fica pronto
+
+    Corpo: {"usernames": [...], "formato": "ndjson" | "sse"}
+    Perfis em cache saem primeiro; os demais passam pela fila com rate limiting.
+    """
+    if request.formato not in MEDIA_TYPES:
         raise HTTPException(
-            status_code=500, detail=f"Erro interno do servidor: {str(e)}"
+            status_code=400, detail="Formato inválido: use 'ndjson' ou 'sse'"
+        )
+    usernames = BatchAnalyzer.normalizar(request.usernames)
+    if not usernames:
+        raise HTTPException(status_code=400, detail="Nenhum username informado")
+    if len(usernames) > Config.BATCH_MAX_USERNAMES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo de {Config.BATCH_MAX_USERNAMES} perfis por lote",
+        )
+
+    async def gerar_eventos():
+        contagem = {}
+        async for resultado in _criar_analisador_lote().executar(usernames):
+            contagem[resultado["status"]] = contagem.get(resultado["status"], 0) + 1
+            yield formatar_evento("resultado", resultado, request.formato)
+        yield formatar_evento(
+            "fim", {"total": len(usernames), **contagem}, request.formato
         )
 
+    return StreamingResponse(gerar_eventos(), media_type=MEDIA_TYPES[request.formato])
+
+
+async def _executar_job_analise(params: dict) -> dict:
+    """Pipeline de /analisar executado pelos workers de jobs"""
+    username = params["username"]
+    cached_data = rate_limiter.get_cached_data(username)
+    if cached_data:
+        return {**cached_data, "cached": True}
+
+    # Em rate limiting o job volta para a fila até o bloqueio acabar, em vez
+    # de segurar um worker esperando
+    vez = Vez("lote", "jobs", Config.BATCH_MAX_WAIT)
+    can_proceed, wait_time = rate_limiter.check_rate_limit(username, vez)
+    if not can_proceed:
+        raise AdiarJob(wait_time, f"Rate limiting: retomando em {wait_time}s")
+
+    resultado = await analises_em_andamento.do(
+        ("analisar", username), lambda: _coletar_e_analisar(username, vez=vez)
+    )
+    if resultado["status"] == "limited":
+        retry_after = resultado["retry_after"]
+        raise AdiarJob(retry_after, f"Rate limiting: retomando em {retry_after}s")
+    return resultado
+
+
+job_queue = JobQueue(
+    JobStore(Config.JOB_DB_PATH),
+    handlers={"analisar": _executar_job_analise},
+    workers=Config.JOB_WORKERS,
+)
+
+
+def _resumo_job(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "url": f"/jobs/{job['id']}",
+    }
+
+
+@app.post("/jobs", status_code=202)
+async def criar_job(request: JobRequest):
+    """Agenda a análise de um perfil e retorna imediatamente o id do job"""
+    username = request.username.strip().lstrip("@")
+    if not username:
+        raise HTTPException(status_code=400, detail="Username não informado")
+    job = await job_queue.enfileirar("analisar", {"username": username})
+    return _resumo_job(job)
+
+
+@app.get("/jobs/{job_id}")
+async def obter_job(job_id: str, wait: float = 0):
+    """
+    Status/resultado de um job
+
+    Parâmetros:
+    - wait: segundos para aguardar a conclusão (long-poll, opcional)
+    """
+    job = await job_queue.aguardar(job_id, min(max(wait, 0), Config.JOB_MAX_WAIT))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return {**_resumo_job(job), **job}
+
+
+@app.get("/historico/{username}")
+async def historico_perfil(username: str, dias: float = 365, janela: float = 7):
+    """
+    Evolução do perfil a partir das coletas já registradas (sem acessar o Instagram)
+
+    - dias: período consultado, contando a partir de agora
+    - janela: janela (em dias) das taxas móveis de cada ponto
+    """
+    if serie_temporal is None:
+        raise HTTPException(status_code=404, detail="Histórico desativado")
+    try:
+        agora = time.time()
+        # consultar espera o lock do perfil e descomprime segmentos: fora do loop
+        registros = await asyncio.to_thread(
+            serie_temporal.consultar, username, inicio=agora - dias * 86400
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not len(registros):
+        raise HTTPException(
+            status_code=404, detail=f"Nenhuma coleta registrada para @{username}"
+        )
+    return {"perfil": f"@{username}", **resumir_historico(registros, janela)}
+
 
 @app.get("/perfil/{username}")
 async def obter_dados_perfil(username: str):
@@ -361,21 +932,25 @@ async def obter_dados_perfil(username: str):
         if cached_data and "dados" in cached_data:
             return {**cached_data["dados"], "cached": True}
 
-        # Verificar rate limit
-        can_proceed, wait_time = rate_limiter.check_rate_limit(username)
-        if not can_proceed:
-            raise HTTPException(
-                status_code=429,
-                detail=f"Aguarde {wait_time} segundos antes de tentar novamente",
-            )
-
-        await asyncio.sleep(2)
-        dados_perfil = await instagram_service.get_profile_data(username)
-        rate_limiter.register_request(username)
+        chave = ("perfil", username)
+        if not analises_em_andamento.em_andamento(chave):
+            # Verificar rate limit
+            can_proceed, wait_time = rate_limiter.check_rate_limit(username)
+            if not can_proceed:
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Aguarde {wait_time} segundos antes de tentar novamente",
+                )
 
-        return dados_perfil
+        return await analises_em_andamento.do(chave, lambda: _coletar_perfil(username))
     except HTTPException:
         raise
+    except RequisicaoRecusada as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Aguarde {e.retry_after} segundos antes de tentar novamente",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erro ao obter dados: {str(e)}")
 
@@ -384,7 +959,7 @@ async def obter_dados_perfil(username: str):
 async def analisar_perfil_mock(username: str):
     """Analisa um perfil usando dados mock (para teste/demonstração)"""
     try:
-        print(f"🎭 Usando dados mock para @{username}")
+        logger.info("Análise com dados mock", extra={"username": username})
         instagram_service.use_mock = True
         dados_perfil = await instagram_service.get_profile_data(username)
         metricas = instagram_service.calcular_metricas(dados_perfil)
@@ -408,70 +983,208 @@ async def analisar_perfil_mock(username: str):
         )
 
 
+async def _coletar_e_gerar_pdf(username: str) -> dict:
+    """Coleta dados (com fallback para mock), gera o relatório de IA e o PDF"""
+    # Tentar coletar dados reais
+    try:
+        can_proceed, wait_time = rate_limiter.check_rate_limit(username)
+        if not can_proceed:
+            raise Exception(f"Rate limiting: aguarde {wait_time}s")
+
+        dados_perfil = await instagram_service.get_profile_data(
+            username, vez=_vez_interativa(username)
+        )
+        metricas = instagram_service.calcular_metricas(dados_perfil)
+
+    except Exception as instagram_error:
+        logger.warning(
+            "Usando dados mock para o PDF",
+            extra={"username": username, "erro": str(instagram_error)},
+        )
+        instagram_service.use_mock = True
+        dados_perfil = await instagram_service.get_profile_data(username)
+        metricas = instagram_service.calcular_metricas(dados_perfil)
+        dados_perfil["_mock_data"] = True
+
+    camada = ai_service.escolher_camada(dados_perfil, metricas)
+    relatorio_ia = await ai_service.gerar_relatorio(dados_perfil, metricas, camada)
+    data_source = "mock" if dados_perfil.get("_mock_data") else "instagram"
+    if data_source == "instagram":
+        # Guarda a análise como /analisar: o próximo pedido do PDF sai do
+        # cache e pode ser revalidado pelo ETag desta resposta
+        await rate_limiter.register_request(
+            username,
+            {
+                "perfil": f"@{username}",
+                "dados": dados_perfil,
+                "metricas": metricas,
+                "relatorio_ia": relatorio_ia,
+                "relatorio_camada": camada,
+                "status": "success",
+                "data_source": data_source,
+            },
+        )
+
+    conteudo = await report_service.gerar_pdf_async(
+        username, dados_perfil, metricas, relatorio_ia
+    )
+    chave = report_service.chave_conteudo(
+        username, dados_perfil, metricas, relatorio_ia
+    )
+    return {"pdf": conteudo, "etag": f'"{chave}"', "data_source": data_source}
+
+
+def _resposta_pdf(username: str, conteudo: bytes, headers: dict) -> StreamingResponse:
+    """Transmite o PDF em blocos; grava uma cópia em disco se configurado"""
+    if Config.PDF_SAVE_TO_DISK:
+        headers["X-PDF-Path"] = report_service.salvar_pdf(username, conteudo)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    nome_arquivo = f"relatorio_{username}_{timestamp}.pdf"
+    headers["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
+    headers["Content-Length"] = str(len(conteudo))
+    tamanho_bloco = 64 * 1024
+    blocos = (
+        conteudo[i : i + tamanho_bloco] for i in range(0, len(conteudo), tamanho_bloco)
+    )
+    return StreamingResponse(blocos, media_type="application/pdf", headers=headers)
+
+
 @app.get("/gerar-pdf/{username}")
-async def gerar_pdf(username: str, use_cache: bool = True):
+async def gerar_pdf(
+    username: str,
+    use_cache: bool = True,
+    if_none_match: Optional[str] = Header(None),
+):
     """Gera um relatório PDF para o perfil"""
     try:
         # Verificar cache se permitido
         if use_cache:
             cached_data = rate_limiter.get_cached_data(username)
             if cached_data:
-                print(f"📦 Usando dados do cache para PDF de @{username}")
+                logger.info("PDF com dados do cache", extra={"username": username})
                 dados_perfil = cached_data.get("dados", {})
                 metricas = cached_data.get("metricas", {})
                 relatorio_ia = cached_data.get("relatorio_ia", {})
 
-                pdf_path = report_service.gerar_pdf(
+                # Mesmas entradas => mesmo PDF: o hash serve de ETag
+                chave = report_service.chave_conteudo(
                     username, dados_perfil, metricas, relatorio_ia
                 )
-                return {
-                    "pdf_path": pdf_path,
-                    "message": "PDF gerado com sucesso (dados em cache)",
-                    "cached": True,
-                }
-
-        # Tentar coletar dados reais
-        try:
-            can_proceed, wait_time = rate_limiter.check_rate_limit(username)
-            if not can_proceed:
-                raise Exception(f"Rate limiting: aguarde {wait_time}s")
+                etag = f'"{chave}"'
+                if if_none_match == etag:
+                    return Response(status_code=304, headers={"ETag": etag})
 
-            await asyncio.sleep(2)
-            dados_perfil = await instagram_service.get_profile_data(username)
-            metricas = instagram_service.calcular_metricas(dados_perfil)
-            rate_limiter.register_request(username)
-
-        except Exception as instagram_error:
-            print(f"⚠️ Usando dados mock para PDF: {instagram_error}")
-            instagram_service.use_mock = True
-            dados_perfil = await instagram_service.get_profile_data(username)
-            metricas = instagram_service.calcular_metricas(dados_perfil)
-            dados_perfil["_mock_data"] = True
+                pdf_em_cache = chave in report_service.pdf_cache
+                conteudo = await report_service.gerar_pdf_async(
+                    username, dados_perfil, metricas, relatorio_ia
+                )
+                headers = {
+                    "X-Data-Source": cached_data.get("data_source", ""),
+                    "X-Cached": "true",
+                    "X-PDF-Cache": "hit" if pdf_em_cache else "miss",
+                    "ETag": etag,
+                }
+                return _resposta_pdf(username, conteudo, headers)
 
-        relatorio_ia = await ai_service.gerar_relatorio(dados_perfil, metricas)
-        pdf_path = report_service.gerar_pdf(
-            username, dados_perfil, metricas, relatorio_ia
+        resultado = await analises_em_andamento.do(
+            ("pdf", username), lambda: _coletar_e_gerar_pdf(username)
         )
-
-        return {
-            "pdf_path": pdf_path,
-            "message": "PDF gerado com sucesso",
-            "data_source": "mock" if dados_perfil.get("_mock_data") else "instagram",
+        headers = {
+            "X-Data-Source": resultado["data_source"],
+            "ETag": resultado["etag"],
         }
+        return _resposta_pdf(username, resultado["pdf"], headers)
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erro ao gerar PDF: {str(e)}")
 
 
+# Métricas que só leem contadores já mantidos pelos serviços: calculadas
+# quando /metrics é consultado, sem custo nas requisições
+def _caches() -> dict:
+    caches = {
+        "analises": rate_limiter.request_cache,
+        "analises_persistente": rate_limiter.persistent_cache,
+        "snapshots": snapshot_store,
+        "relatorios_ia": relatorios_ia_cache,
+        "pdf": report_service.pdf_cache,
+    }
+    return {nome: cache for nome, cache in caches.items() if cache is not None}
+
+
+def _taxas_de_acerto() -> dict:
+    taxas = {}
+    for nome, cache in _caches().items():
+        consultas = cache.hits + cache.misses
+        taxas[(nome,)] = cache.hits / consultas if consultas else 0.0
+    return taxas
+
+
+REGISTRO.contador(
+    "cache_hits_total",
+    "Consultas aos caches que encontraram a entrada",
+    ("cache",),
+    coletar=lambda: {(nome,): cache.hits for nome, cache in _caches().items()},
+)
+REGISTRO.contador(
+    "cache_misses_total",
+    "Consultas aos caches que não encontraram a entrada",
+    ("cache",),
+    coletar=lambda: {(nome,): cache.misses for nome, cache in _caches().items()},
+)
+REGISTRO.medidor(
+    "cache_hit_ratio",
+    "Fração das consultas aos caches que encontraram a entrada",
+    ("cache",),
+    coletar=_taxas_de_acerto,
+)
+REGISTRO.medidor(
+    "execucoes_em_andamento",
+    "Coletas, análises e PDFs em execução (single-flight)",
+    coletar=lambda: analises_em_andamento.stats()["em_andamento"],
+)
+REGISTRO.medidor(
+    "agendador_fila",
+    "Requisições ao Instagram aguardando a vez, por faixa",
+    ("faixa",),
+    coletar=lambda: {(faixa,): n for faixa, n in agendador.stats()["fila"].items()},
+)
+REGISTRO.contador(
+    "agendador_recusadas_total",
+    "Requisições ao Instagram recusadas por passar da espera máxima",
+    coletar=lambda: agendador.recusadas,
+)
+REGISTRO.medidor(
+    "jobs",
+    "Jobs de análise por status",
+    ("status",),
+    coletar=lambda: {(status,): n for status, n in job_queue.store.contagem().items()},
+)
+REGISTRO.contador(
+    "llm_chamadas_total",
+    "Chamadas à API da OpenAI",
+    coletar=lambda: ai_service.chamadas_api,
+)
+REGISTRO.medidor(
+    "llm_lote_aguardando",
+    "Relatórios aguardando para entrar num request agrupado",
+    coletar=lambda: (ai_service.stats()["lotes"] or {}).get("aguardando", 0),
+)
+
+
+@app.get("/metrics")
+async def metricas_prometheus():
+    """Métricas no formato texto do Prometheus"""
+    return Response(REGISTRO.exportar(), media_type=MEDIA_TYPE)
+
+
 if __name__ == "__main__":
-    print("🚀 Iniciando Instagram Analyzer API...")
-    print("📝 Endpoints disponíveis:")
-    print("   - GET /analisar/{username}")
-    print("   - GET /analisar-mock/{username}")
-    print("   - GET /perfil/{username}")
-    print("   - GET /gerar-pdf/{username}")
-    print("   - GET /status")
-    print("\n⚙️  Configurações:")
-    print(f"   - Rate limit por perfil: {rate_limiter.min_interval}s")
-    print(f"   - Duração do cache: {rate_limiter.cache_duration}")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    logger.info(
+        "Iniciando Instagram Analyzer API (endpoints em GET /)",
+        extra={
+            "requisicoes_por_hora": Config.MAX_REQUESTS_PER_HOUR,
+            "duracao_cache": str(rate_limiter.cache_duration),
+        },
+    )
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,73 +1,455 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import re
+import httpx
 import openai
 import os
 from dotenv import load_dotenv
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from config import Config
+from services.micro_batch import MicroLote
+from services.rules_engine import MotorRegras
+from services.telemetry import ETAPAS, TOKENS_LLM
+from services.report_parser import (
+    NOMES_SECOES,
+    SEM_ANALISE,
+    ParserSecoes,
+    extrair_secoes,
+)
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Incrementar quando o prompt mudar, para não reaproveitar relatórios antigos
+VERSAO_PROMPT = 2
+# Contadores na chave do cache são agrupados em faixas de ~5%
+FAIXA_RELATIVA = 0.05
+
+PROMPT_SISTEMA = "Você é um especialista em marketing digital e análise de perfis do Instagram para prospecção comercial."
+ESTRUTURA_RELATORIO = """
+        Gere um relatório estruturado com:
+        1. Resumo do negócio (2-3 frases)
+        2. Pontos fortes (3-4 itens)
+        3. Pontos fracos (2-3 itens)
+        4. Oportunidades de melhoria (4-5 itens)
+        5. Sugestão de abordagem de prospecção (3-4 frases)
+        """
+# Camadas de relatório aceitas por escolher_camada
+CAMADAS = ("auto", "regras", "ia")
+
+# Pedidos agrupados: cada relatório da resposta começa com este marcador
+MARCADOR_PERFIL = "=== PERFIL {} ==="
+SEPARADOR_PERFIL = re.compile(r"^\W*=+\s*PERFIL\s+(\d+)\s*=+\W*$", re.M | re.I)
+
+
+def _faixa(valor: Any) -> int:
+    """Faixa logarítmica de um contador: valores a até ~5% um do outro se juntam"""
+    return round(math.log1p(max(valor or 0, 0)) / math.log1p(FAIXA_RELATIVA))
+
+
+def _meio_ponto(valor: Any) -> float:
+    """Taxas arredondadas para o meio ponto mais próximo"""
+    return round((valor or 0) * 2) / 2
+
+
+def _texto(valor: Any) -> str:
+    """Texto sem diferenças de espaços e maiúsculas"""
+    return re.sub(r"\s+", " ", str(valor or "")).strip().lower()
+
+
+def _flag(dados_perfil: Dict[str, Any], chave: str, chave_mock: str) -> bool:
+    """is_verified/is_private nas coletas; verificado/conta_privada nos dados mock"""
+    return bool(dados_perfil.get(chave, dados_perfil.get(chave_mock, False)))
+
+
+def _tipo_post(post: Dict[str, Any]) -> str:
+    return "Vídeo" if post.get("is_video") else "Foto"
+
+
+def _registrar_uso(uso: Any):
+    """Soma os tokens de uma resposta (objeto ou dict, no chunk final do stream)"""
+    if uso is None:
+        return
+    for tipo in ("prompt_tokens", "completion_tokens"):
+        tokens = uso.get(tipo) if isinstance(uso, dict) else getattr(uso, tipo, None)
+        if tokens:
+            TOKENS_LLM.inc(tipo.split("_")[0], valor=tokens)
+
 
 class AIService:
-    def __init__(self):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        cache: Optional[Any] = None,
+    ):
         # Configurar OpenAI
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key or self.api_key == "your_openai_api_key_here":
-            print("Aviso: OPENAI_API_KEY não configurada. Usando relatórios mock.")
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or Config.OPENAI_BASE_URL
+        self.model = Config.OPENAI_MODEL
+        self.timeout = Config.OPENAI_TIMEOUT
+        self.max_concurrency = Config.OPENAI_MAX_CONCURRENCY
+
+        # Cliente e semáforo são criados sob demanda e reutilizados entre chamadas
+        self._client: Optional[openai.AsyncOpenAI] = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+
+        # Relatórios já gerados por chave_contexto (TTLCache ou SQLiteCache)
+        self.cache = cache
+        self.chamadas_api = 0
+
+        # Agrupamento de relatórios das análises em lote
+        self.tamanho_lote = Config.LLM_BATCH_SIZE
+        self.espera_lote = Config.LLM_BATCH_WAIT
+        self._lote: Optional[MicroLote] = None
+
+        # Camada de regras: relatórios determinísticos, sem custo de API
+        self.regras = MotorRegras.carregar(Config.RELATORIO_REGRAS_PATH)
+        self.min_seguidores_ia = Config.RELATORIO_MIN_SEGUIDORES_IA
+
+        if not self._api_configurada():
+            logger.warning(
+                "OPENAI_API_KEY não configurada: relatórios do motor de regras"
+            )
         else:
-            print("OpenAI API configurada. Relatórios de IA funcionarão.")
+            logger.info(
+                "OpenAI API configurada",
+                extra={"base_url": self.base_url or "padrão", "modelo": self.model},
+            )
+
+    def _api_configurada(self) -> bool:
+        """Há chave válida ou um servidor compatível (ex.: fake local) configurado"""
+        if self.base_url:
+            return True
+        return bool(self.api_key) and self.api_key != "your_openai_api_key_here"
+
+    def _get_client(self) -> openai.AsyncOpenAI:
+        """Cliente assíncrono único, com pool de conexões HTTP reaproveitado"""
+        if self._client is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=Config.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.OPENAI_MAX_CONNECTIONS,
+                ),
+                timeout=self.timeout,
+            )
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key or "fake-key",
+                base_url=self.base_url,
+                timeout=self.timeout,
+                http_client=http_client,
+            )
+        return self._client
+
+    def _get_semaforo(self) -> asyncio.Semaphore:
+        """Limita o número de chamadas simultâneas ao modelo"""
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_concurrency)
+        return self._semaforo
+
+    async def aclose(self):
+        """Fecha o pool de conexões do cliente OpenAI"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def escolher_camada(
+        self,
+        dados_perfil: Dict[str, Any],
+        metricas: Dict[str, Any],
+        preferencia: str = "auto",
+    ) -> str:
+        """
+        Decide quem gera o relatório: "regras" ou "ia"
+
+        preferencia "regras"/"ia" força a camada. Em "auto": sem API
+        configurada vão as regras; um relatório de IA já em cache é
+        reaproveitado (custo zero); perfis com menos de
+        RELATORIO_MIN_SEGUIDORES_IA seguidores ficam com as regras.
+        """
+        if preferencia not in CAMADAS:
+            raise ValueError(f"Camada inválida: {preferencia}")
+        if not self._api_configurada():
+            return "regras"
+        if preferencia != "auto":
+            return preferencia
+        if (
+            self.cache is not None
+            and self.chave_contexto(dados_perfil, metricas) in self.cache
+        ):
+            return "ia"
+        if (dados_perfil.get("seguidores") or 0) < self.min_seguidores_ia:
+            return "regras"
+        return "ia"
 
     async def gerar_relatorio(
-        self, dados_perfil: Dict[str, Any], metricas: Dict[str, Any]
+        self,
+        dados_perfil: Dict[str, Any],
+        metricas: Dict[str, Any],
+        camada: str = "auto",
     ) -> Dict[str, str]:
         """
         Gera um relatório estratégico usando IA
         """
-        if not self.api_key or self.api_key == "your_openai_api_key_here":
-            # Gerar relatório mock baseado nos dados
-            return self._gerar_relatorio_mock(dados_perfil, metricas)
+        relatorio = {secao: SEM_ANALISE for secao in NOMES_SECOES}
+        async for secao, texto in self.gerar_relatorio_stream(
+            dados_perfil, metricas, camada
+        ):
+            relatorio[secao] = texto
+        return relatorio
 
+    async def gerar_relatorio_stream(
+        self,
+        dados_perfil: Dict[str, Any],
+        metricas: Dict[str, Any],
+        camada: str = "auto",
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Gera o relatório com a resposta do modelo em streaming
+
+        Emite (seção, texto) assim que cada seção fica completa, sem esperar
+        o fim da resposta; todas as cinco seções são emitidas. Se a API
+        falhar, as seções que ainda não saíram vêm do motor de regras.
+        Relatórios completos vão para o cache e, num hit, saem de uma vez
+        sem chamar a API.
+        """
+        if self.escolher_camada(dados_perfil, metricas, camada) == "regras":
+            for secao in self.gerar_relatorio_regras(dados_perfil, metricas).items():
+                yield secao
+            return
+
+        chave = self.chave_contexto(dados_perfil, metricas)
+        if self.cache is not None:
+            relatorio = self.cache.get(chave)
+            if relatorio is not None:
+                for secao in relatorio.items():
+                    yield secao
+                return
+
+        parser = ParserSecoes()
+        emitidas = set()
         try:
-            # Preparar dados para análise
-            contexto = self._preparar_contexto(dados_perfil, metricas)
-
-            # Gerar relatório com GPT
-            prompt = f"""
-            Analise este perfil do Instagram e gere um relatório estratégico para prospecção comercial:
-            
-            {contexto}
-            
-            Gere um relatório estruturado com:
-            1. Resumo do negócio (2-3 frases)
-            2. Pontos fortes (3-4 itens)
-            3. Pontos fracos (2-3 itens)
-            4. Oportunidades de melhoria (4-5 itens)
-            5. Sugestão de abordagem de prospecção (3-4 frases)
-            
-            Seja objetivo e focado em oportunidades comerciais.
-            """
+            self.chamadas_api += 1
+            async with self._get_semaforo(), ETAPAS.medir("openai"):
+                stream = await self._get_client().chat.completions.create(
+                    model=self.model,
+                    messages=self._mensagens(dados_perfil, metricas),
+                    max_tokens=1000,
+                    temperature=0.7,
+                    stream=True,
+                    # Pede o uso de tokens num último chunk, sem choices
+                    extra_body={"stream_options": {"include_usage": True}},
+                )
+                try:
+                    async for chunk in stream:
+                        _registrar_uso(getattr(chunk, "usage", None))
+                        if not chunk.choices:
+                            continue
+                        for secao, texto in parser.alimentar(
+                            chunk.choices[0].delta.content or ""
+                        ):
+                            emitidas.add(secao)
+                            yield secao, texto
+                finally:
+                    await stream.response.aclose()
 
-            client = openai.OpenAI(api_key=self.api_key)
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Você é um especialista em marketing digital e análise de perfis do Instagram para prospecção comercial.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=1000,
-                temperature=0.7,
+            finais = parser.finalizar()
+            if self.cache is not None:
+                await self.cache.set_async(chave, parser.secoes)
+            for secao, texto in finais:
+                yield secao, texto
+
+        except Exception as e:
+            # Se houver erro (incluindo quota), usar relatório mock
+            logger.warning(
+                "Erro na API da OpenAI, usando o motor de regras",
+                extra={"erro": str(e), "secoes_emitidas": len(emitidas)},
             )
+            regras = self.gerar_relatorio_regras(dados_perfil, metricas)
+            for secao, texto in regras.items():
+                if secao not in emitidas:
+                    yield secao, texto
 
-            relatorio_completo = response.choices[0].message.content
+    def _mensagens(
+        self, dados_perfil: Dict[str, Any], metricas: Dict[str, Any]
+    ) -> List[Dict[str, str]]:
+        """Mensagens do chat com o prompt do relatório"""
+        # Preparar dados para análise
+        contexto = self._preparar_contexto(dados_perfil, metricas)
 
-            # Extrair seções do relatório
-            return self._extrair_secoes_relatorio(relatorio_completo)
+        # Gerar relatório com GPT
+        prompt = f"""
+        Analise este perfil do Instagram e gere um relatório estratégico para prospecção comercial:
+        
+        {contexto}
+        {ESTRUTURA_RELATORIO}
+        Seja objetivo e focado em oportunidades comerciais.
+        """
+        return [
+            {"role": "system", "content": PROMPT_SISTEMA},
+            {"role": "user", "content": prompt},
+        ]
+
+    def _mensagens_lote(
+        self, perfis: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> List[Dict[str, str]]:
+        """Um único prompt com os contextos de vários perfis numerados"""
+        contextos = "".join(
+            f"\n        {MARCADOR_PERFIL.format(i)}\n"
+            + self._preparar_contexto(dados_perfil, metricas)
+            for i, (dados_perfil, metricas) in enumerate(perfis, 1)
+        )
+        prompt = f"""
+        Analise cada um dos {len(perfis)} perfis do Instagram abaixo e gere um relatório estratégico para prospecção comercial de cada um:
+        {contextos}
+        Para CADA perfil, comece com a linha "{MARCADOR_PERFIL.format('N')}" (N = número do perfil) e siga a estrutura abaixo.
+        {ESTRUTURA_RELATORIO}
+        Seja objetivo e focado em oportunidades comerciais.
+        """
+        return [
+            {"role": "system", "content": PROMPT_SISTEMA},
+            {"role": "user", "content": prompt},
+        ]
+
+    @staticmethod
+    def _separar_perfis(resposta: str, quantidade: int) -> List[Optional[str]]:
+        """Texto de cada perfil de uma resposta agrupada (None se faltou)"""
+        textos: List[Optional[str]] = [None] * quantidade
+        partes = SEPARADOR_PERFIL.split(resposta)
+        # split com grupo: [antes, n1, texto1, n2, texto2, ...]
+        for numero, texto in zip(partes[1::2], partes[2::2]):
+            indice = int(numero) - 1
+            if 0 <= indice < quantidade and textos[indice] is None:
+                textos[indice] = texto
+        return textos
+
+    async def gerar_relatorio_agrupado(
+        self,
+        dados_perfil: Dict[str, Any],
+        metricas: Dict[str, Any],
+        camada: str = "auto",
+    ) -> Dict[str, str]:
+        """
+        Como gerar_relatorio, mas agrupa chamadas simultâneas
+
+        Usado nas análises em lote: relatórios pedidos dentro da janela de
+        LLM_BATCH_WAIT segundos (até LLM_BATCH_SIZE) vão num único request,
+        dividindo o prompt de sistema e as instruções entre os perfis.
+        """
+        if self.escolher_camada(dados_perfil, metricas, camada) == "regras":
+            return self.gerar_relatorio_regras(dados_perfil, metricas)
+        if self.cache is not None:
+            relatorio = self.cache.get(self.chave_contexto(dados_perfil, metricas))
+            if relatorio is not None:
+                return relatorio
+        if self._lote is None:
+            self._lote = MicroLote(
+                self._gerar_lote, tamanho=self.tamanho_lote, espera=self.espera_lote
+            )
+        return await self._lote.submeter((dados_perfil, metricas))
+
+    async def _gerar_lote(
+        self, perfis: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> List[Dict[str, str]]:
+        """Gera os relatórios de um lote numa chamada só"""
+        if len(perfis) == 1:
+            return [await self.gerar_relatorio(*perfis[0], camada="ia")]
 
+        try:
+            self.chamadas_api += 1
+            async with self._get_semaforo(), ETAPAS.medir("openai_lote"):
+                response = await self._get_client().chat.completions.create(
+                    model=self.model,
+                    messages=self._mensagens_lote(perfis),
+                    max_tokens=1000 * len(perfis),
+                    temperature=0.7,
+                )
+            _registrar_uso(response.usage)
+            textos = self._separar_perfis(
+                response.choices[0].message.content or "", len(perfis)
+            )
         except Exception as e:
-            # Se houver erro (incluindo quota), usar relatório mock
-            print(f"Erro na API da OpenAI: {e}. Usando relatório mock.")
-            return self._gerar_relatorio_mock(dados_perfil, metricas)
+            logger.warning(
+                "Erro na API da OpenAI (lote)",
+                extra={"erro": str(e), "perfis": len(perfis)},
+            )
+            textos = [None] * len(perfis)
+
+        relatorios: List[Optional[Dict[str, str]]] = []
+        for (dados_perfil, metricas), texto in zip(perfis, textos):
+            if texto is None:
+                relatorios.append(None)
+                continue
+            secoes = extrair_secoes(texto)
+            if self.cache is not None:
+                await self.cache.set_async(
+                    self.chave_contexto(dados_perfil, metricas), secoes
+                )
+            relatorios.append(secoes)
+
+        # Perfis que não vieram na resposta: chamada individual
+        faltantes = [i for i, relatorio in enumerate(relatorios) if relatorio is None]
+        if faltantes:
+            logger.info(
+                "Perfis fora da resposta agrupada, gerando um a um",
+                extra={"perfis": len(faltantes)},
+            )
+            individuais = await asyncio.gather(
+                *[self.gerar_relatorio(*perfis[i], camada="ia") for i in faltantes]
+            )
+            for i, relatorio in zip(faltantes, individuais):
+                relatorios[i] = relatorio
+        return relatorios
+
+    def chave_contexto(
+        self, dados_perfil: Dict[str, Any], metricas: Dict[str, Any]
+    ) -> str:
+        """
+        Chave do cache: os campos que _preparar_contexto envia ao modelo,
+        normalizados. Contadores entram por faixa, então seguidores que
+        oscilam um pouco entre coletas não invalidam o relatório.
+        """
+        posts = [
+            [
+                _texto(post.get("caption"))[:100],
+                _faixa(post.get("likes", 0)),
+                _faixa(post.get("comments", 0)),
+                _tipo_post(post),
+            ]
+            for post in dados_perfil.get("posts", [])[:3]
+        ]
+        campos = [
+            VERSAO_PROMPT,
+            self.model,
+            _texto(dados_perfil.get("username")),
+            _texto(dados_perfil.get("nome_completo")),
+            _texto(dados_perfil.get("biografia")),
+            _faixa(dados_perfil.get("seguidores", 0)),
+            _faixa(dados_perfil.get("seguindo", 0)),
+            _faixa(dados_perfil.get("total_posts", 0)),
+            _flag(dados_perfil, "is_verified", "verificado"),
+            _flag(dados_perfil, "is_private", "conta_privada"),
+            _meio_ponto(metricas.get("taxa_engajamento", 0)),
+            _meio_ponto(metricas.get("posts_semanais", 0)),
+            _faixa(metricas.get("media_likes", 0)),
+            _faixa(metricas.get("media_comentarios", 0)),
+            sorted(metricas.get("principais_hashtags", [])[:5]),
+            posts,
+        ]
+        serializado = json.dumps(campos, ensure_ascii=False)
+        return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para o endpoint /status"""
+        return {
+            "chamadas_api": self.chamadas_api,
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "lotes": self._lote.stats() if self._lote is not None else None,
+        }
 
     def _preparar_contexto(
         self, dados_perfil: Dict[str, Any], metricas: Dict[str, Any]
@@ -80,13 +462,13 @@ class AIService:
         Seguidores: {dados_perfil.get('seguidores', 0):,}
         Seguindo: {dados_perfil.get('seguindo', 0):,}
         Total de posts: {dados_perfil.get('total_posts', 0):,}
-        Verificado: {'Sim' if dados_perfil.get('verificado', False) else 'Não'}
-        Conta privada: {'Sim' if dados_perfil.get('conta_privada', False) else 'Não'}
+        Verificado: {'Sim' if _flag(dados_perfil, 'is_verified', 'verificado') else 'Não'}
+        Conta privada: {'Sim' if _flag(dados_perfil, 'is_private', 'conta_privada') else 'Não'}
         
         MÉTRICAS:
-        - Engajamento médio: {metricas.get('engajamento_medio', 'N/A')}
+        - Engajamento médio: {metricas.get('taxa_engajamento', 0):.1f}%
         - Posts por semana: {metricas.get('posts_semanais', 0)}
-        - Média de curtidas: {metricas.get('media_curtidas', 0):,}
+        - Média de curtidas: {metricas.get('media_likes', 0):,}
         - Média de comentários: {metricas.get('media_comentarios', 0):,}
         - Principais hashtags: {', '.join(metricas.get('principais_hashtags', [])[:5])}
         
@@ -96,151 +478,21 @@ class AIService:
         for i, post in enumerate(dados_perfil.get("posts", [])[:3], 1):
             contexto += f"""
             Post {i}:
-            - Legenda: {post.get('legenda', 'N/A')[:100]}...
-            - Curtidas: {post.get('curtidas', 0):,}
-            - Comentários: {post.get('comentarios', 0):,}
-            - Tipo: {post.get('tipo', 'N/A')}
+            - Legenda: {(post.get('caption') or 'N/A')[:100]}...
+            - Curtidas: {post.get('likes', 0):,}
+            - Comentários: {post.get('comments', 0):,}
+            - Tipo: {_tipo_post(post)}
             """
 
         return contexto
 
     def _extrair_secoes_relatorio(self, relatorio: str) -> Dict[str, str]:
         """Extrai seções específicas do relatório gerado"""
-        secoes = {
-            "resumo_negocio": "Análise não disponível",
-            "pontos_fortes": "Análise não disponível",
-            "pontos_fracos": "Análise não disponível",
-            "oportunidades": "Análise não disponível",
-            "sugestao_prospeccao": "Análise não disponível",
-        }
-
-        # Dividir por seções (método simples)
-        linhas = relatorio.split("\n")
-        secao_atual = None
-        conteudo_atual = []
-
-        for linha in linhas:
-            linha = linha.strip()
-            if not linha:
-                continue
+        return extrair_secoes(relatorio)
 
-            # Detectar início de seção
-            if any(
-                palavra in linha.lower()
-                for palavra in ["resumo", "negócio", "business"]
-            ):
-                secao_atual = "resumo_negocio"
-                conteudo_atual = [linha]
-            elif any(
-                palavra in linha.lower()
-                for palavra in ["fortes", "strengths", "pontos fortes"]
-            ):
-                secao_atual = "pontos_fortes"
-                conteudo_atual = [linha]
-            elif any(
-                palavra in linha.lower()
-                for palavra in ["fracos", "weaknesses", "pontos fracos"]
-            ):
-                secao_atual = "pontos_fracos"
-                conteudo_atual = [linha]
-            elif any(
-                palavra in linha.lower()
-                for palavra in ["oportunidades", "opportunities"]
-            ):
-                secao_atual = "oportunidades"
-                conteudo_atual = [linha]
-            elif any(
-                palavra in linha.lower()
-                for palavra in ["prospecção", "prospecting", "abordagem"]
-            ):
-                secao_atual = "sugestao_prospeccao"
-                conteudo_atual = [linha]
-            elif secao_atual and linha:
-                conteudo_atual.append(linha)
-
-            # Salvar seção quando encontrar próxima ou fim
-            if secao_atual and conteudo_atual:
-                secoes[secao_atual] = "\n".join(conteudo_atual)
-
-        return secoes
-
-    def _gerar_relatorio_mock(
+    def gerar_relatorio_regras(
         self, dados_perfil: Dict[str, Any], metricas: Dict[str, Any]
     ) -> Dict[str, str]:
-        """
-        Gera um relatório mock baseado nos dados do perfil
-        """
-        username = dados_perfil.get("username", "perfil")
-        seguidores = dados_perfil.get("seguidores", 0)
-        engajamento = metricas.get("taxa_engajamento", 0)
-        posts_semanais = metricas.get("posts_semanais", 0)
-
-        # Resumo do negócio
-        if seguidores > 10000:
-            resumo = f"@{username} é um perfil estabelecido com {seguidores:,} seguidores, demonstrando forte presença digital e potencial comercial significativo."
-        elif seguidores > 1000:
-            resumo = f"@{username} é um perfil em crescimento com {seguidores:,} seguidores, mostrando engajamento consistente e oportunidades de expansão."
-        else:
-            resumo = f"@{username} é um perfil emergente com {seguidores:,} seguidores, apresentando potencial de crescimento e desenvolvimento de audiência."
-
-        # Pontos fortes
-        pontos_fortes = []
-        if engajamento > 5:
-            pontos_fortes.append(f"Alta taxa de engajamento ({engajamento:.1f}%)")
-        if posts_semanais > 3:
-            pontos_fortes.append(
-                f"Frequência consistente de posts ({posts_semanais:.1f} posts/semana)"
-            )
-        if dados_perfil.get("verificado", False):
-            pontos_fortes.append("Perfil verificado (maior credibilidade)")
-        if not dados_perfil.get("conta_privada", False):
-            pontos_fortes.append("Perfil público (conteúdo acessível)")
-
-        if not pontos_fortes:
-            pontos_fortes = [
-                "Perfil ativo no Instagram",
-                "Presença digital estabelecida",
-            ]
-
-        # Pontos fracos
-        pontos_fracos = []
-        if engajamento < 2:
-            pontos_fracos.append(f"Baixa taxa de engajamento ({engajamento:.1f}%)")
-        if posts_semanais < 1:
-            pontos_fracos.append("Frequência baixa de posts")
-        if dados_perfil.get("conta_privada", False):
-            pontos_fracos.append("Perfil privado (conteúdo restrito)")
-
-        if not pontos_fracos:
-            pontos_fracos = [
-                "Oportunidade de crescimento",
-                "Potencial de melhoria na estratégia",
-            ]
-
-        # Oportunidades
-        oportunidades = []
-        if engajamento < 5:
-            oportunidades.append(
-                "Melhorar estratégia de conteúdo para aumentar engajamento"
-            )
-        if posts_semanais < 3:
-            oportunidades.append("Aumentar frequência de posts para maior visibilidade")
-        oportunidades.append("Desenvolver parcerias estratégicas")
-        oportunidades.append("Otimizar uso de hashtags relevantes")
-        oportunidades.append("Criar conteúdo interativo (stories, reels)")
-
-        # Sugestão de abordagem
-        if seguidores > 5000:
-            sugestao = f"Abordagem direta e profissional. @{username} tem audiência estabelecida e pode ser um parceiro valioso. Foque em propostas de valor claras e benefícios mútuos."
-        elif seguidores > 1000:
-            sugestao = f"Abordagem colaborativa. @{username} está em crescimento e pode estar aberto a parcerias. Ofereça suporte e crescimento mútuo."
-        else:
-            sugestao = f"Abordagem de mentoria. @{username} é um perfil emergente que pode se beneficiar de orientação e parcerias estratégicas."
-
-        return {
-            "resumo_negocio": resumo,
-            "pontos_fortes": " • ".join(pontos_fortes),
-            "pontos_fracos": " • ".join(pontos_fracos),
-            "oportunidades": " • ".join(oportunidades),
-            "sugestao_prospeccao": sugestao,
-        }
+        """Relatório determinístico do motor de regras (sem chamar a API)"""
+        with ETAPAS.medir("regras"):
+            return self.regras.gerar(dados_perfil, metricas)
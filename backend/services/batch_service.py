@@ -0,0 +1,88 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class BatchAnalyzer:
+    """
+    Analisa listas de perfis em fila, respeitando o rate limiting.
+
+    Perfis em cache são devolvidos imediatamente; os demais são processados
+    por um pool pequeno de workers (o espaçamento das requisições fica com o
+    agendador do InstagramService). verificar_limite admite o perfil na fila
+    do agendador ou recusa com a ETA em segundos, que volta no resultado
+    como retry_after. Os resultados saem na ordem em que ficam prontos.
+    """
+
+    def __init__(
+        self,
+        processar: Callable[[str], Awaitable[Dict[str, Any]]],
+        buscar_cache: Callable[[str], Optional[Dict[str, Any]]],
+        verificar_limite: Callable[[str], Tuple[bool, Optional[int]]],
+        concorrencia: int = 2,
+    ):
+        self.processar = processar
+        self.buscar_cache = buscar_cache
+        self.verificar_limite = verificar_limite
+        self.concorrencia = concorrencia
+
+    @staticmethod
+    def normalizar(usernames: List[str]) -> List[str]:
+        """Remove @, espaços e duplicados preservando a ordem"""
+        vistos, resultado = set(), []
+        for username in usernames:
+            username = username.strip().lstrip("@")
+            if username and username not in vistos:
+                vistos.add(username)
+                resultado.append(username)
+        return resultado
+
+    async def _analisar(self, username: str) -> Dict[str, Any]:
+        """Processa um perfil, ou o devolve como rate_limited se for recusado"""
+        try:
+            pode, espera = self.verificar_limite(username)
+            if not pode:
+                return {
+                    "username": username,
+                    "status": "rate_limited",
+                    "retry_after": espera,
+                }
+            resultado = await self.processar(username)
+            return {"username": username, "status": "ok", "resultado": resultado}
+        except Exception as e:
+            return {"username": username, "status": "erro", "erro": str(e)}
+
+    async def executar(self, usernames: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Gera os resultados de cada perfil conforme ficam prontos"""
+        pendentes: asyncio.Queue = asyncio.Queue()
+        prontos: asyncio.Queue = asyncio.Queue()
+
+        for username in self.normalizar(usernames):
+            cached = self.buscar_cache(username)
+            if cached is not None:
+                yield {"username": username, "status": "cached", "resultado": cached}
+            else:
+                pendentes.put_nowait(username)
+
+        faltam = pendentes.qsize()
+        if not faltam:
+            return
+
+        async def worker():
+            while True:
+                try:
+                    username = pendentes.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await prontos.put(await self._analisar(username))
+
+        workers = [
+            asyncio.ensure_future(worker())
+            for _ in range(min(self.concorrencia, faltam))
+        ]
+        try:
+            for _ in range(faltam):
+                yield await prontos.get()
+        finally:
+            # Cliente desconectou ou lote terminou: não deixar workers órfãos
+            for task in workers:
+                task.cancel()
@@ -0,0 +1,142 @@
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+def estimar_peso(valor: Any) -> int:
+    """Tamanho aproximado em bytes de um valor serializável em JSON"""
+    try:
+        return len(json.dumps(valor, default=str, ensure_ascii=False))
+    except (TypeError, ValueError):
+        return 0
+
+
+class TTLCache:
+    """
+    Cache em memória com despejo LRU, TTL e limite de peso.
+
+    Cada entrada guarda (valor, criado_em, peso). Entradas expiradas são
+    descartadas na leitura e por purge_expired(), que deve ser chamado
+    periodicamente (ver RateLimiter.sweep_loop em main.py). Quando o número de
+    entradas ou o peso total passa do limite, as menos usadas recentemente são
+    removidas.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        max_weight: Optional[int] = None,
+        peso: Callable[[Any], int] = estimar_peso,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_weight = max_weight
+        self._peso = peso
+        self._dados: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self.peso_total = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._dados)
+
+    def __contains__(self, chave: Hashable) -> bool:
+        """Verifica presença sem alterar contadores nem a ordem LRU"""
+        entrada = self._dados.get(chave)
+        return entrada is not None and not self._expirada(entrada)
+
+    def _expirada(self, entrada: Tuple[Any, float, int]) -> bool:
+        return time.time() - entrada[1] >= self.ttl_seconds
+
+    def _remover(self, chave: Hashable):
+        _, _, peso = self._dados.pop(chave)
+        self.peso_total -= peso
+
+    def get_entry(self, chave: Hashable) -> Optional[Tuple[Any, datetime]]:
+        """Retorna (valor, criado_em) ou None se ausente/expirado"""
+        entrada = self._dados.get(chave)
+        if entrada is None:
+            self.misses += 1
+            return None
+        if self._expirada(entrada):
+            self._remover(chave)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._dados.move_to_end(chave)
+        self.hits += 1
+        return entrada[0], datetime.fromtimestamp(entrada[1])
+
+    def get(self, chave: Hashable) -> Optional[Any]:
+        """Retorna o valor ou None se ausente/expirado"""
+        entrada = self.get_entry(chave)
+        return entrada[0] if entrada else None
+
+    def set(self, chave: Hashable, valor: Any, criado_em: Optional[float] = None):
+        """Insere/atualiza uma entrada e aplica os limites de tamanho"""
+        if chave in self._dados:
+            self._remover(chave)
+
+        peso = self._peso(valor)
+        self._dados[chave] = (valor, criado_em or time.time(), peso)
+        self.peso_total += peso
+
+        while len(self._dados) > self.max_entries or (
+            self.max_weight is not None
+            and self.peso_total > self.max_weight
+            and len(self._dados) > 1
+        ):
+            chave_antiga = next(iter(self._dados))
+            self._remover(chave_antiga)
+            self.evictions += 1
+
+    async def set_async(self, chave: Hashable, valor: Any):
+        """Mesma interface do SQLiteCache; em memória grava direto, sem thread"""
+        self.set(chave, valor)
+
+    def pop(self, chave: Hashable, padrao: Any = None) -> Any:
+        """Remove uma entrada e retorna seu valor"""
+        if chave not in self._dados:
+            return padrao
+        valor = self._dados[chave][0]
+        self._remover(chave)
+        return valor
+
+    def idade(self, chave: Hashable) -> Optional[float]:
+        """Idade em segundos de uma entrada válida, sem afetar contadores"""
+        entrada = self._dados.get(chave)
+        if entrada is None or self._expirada(entrada):
+            return None
+        return time.time() - entrada[1]
+
+    def purge_expired(self) -> int:
+        """Remove todas as entradas expiradas. Retorna quantas foram removidas"""
+        limite = time.time() - self.ttl_seconds
+        expiradas = [c for c, (_, criado, _) in self._dados.items() if criado <= limite]
+        for chave in expiradas:
+            self._remover(chave)
+        self.expirations += len(expiradas)
+        return len(expiradas)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para o endpoint /status"""
+        consultas = self.hits + self.misses
+        return {
+            "entradas": len(self._dados),
+            "max_entradas": self.max_entries,
+            "peso_bytes": self.peso_total,
+            "max_peso_bytes": self.max_weight,
+            "ttl_segundos": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / consultas, 4) if consultas else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,180 @@
+"""
+Servidor fake compatível com a API de chat completions da OpenAI.
+
+Permite testar o AIService offline:
+
+    python -m services.fake_openai_server --port 8765
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python main.py
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+from typing import List, Optional
+from aiohttp import web
+
+RELATORIO_EXEMPLO = """1. Resumo do negócio
+Perfil comercial com presença digital consistente e público engajado.
+
+2. Pontos fortes
+- Conteúdo visual de qualidade
+- Boa frequência de publicações
+
+3. Pontos fracos
+- Baixo uso de vídeos curtos
+
+4. Oportunidades de melhoria
+- Explorar reels e parcerias locais
+- Padronizar chamadas para ação
+
+5. Sugestão de abordagem de prospecção
+Contato direto destacando ganhos de alcance com uma estratégia de vídeos.
+"""
+
+# Marcadores dos perfis num prompt agrupado (AIService.gerar_relatorio_agrupado)
+PERFIL_AGRUPADO = re.compile(r"^\s*=== PERFIL (\d+) ===\s*$", re.M)
+
+# Contadores acessíveis pelos testes: app[ESTATISTICAS]["chamadas"]
+ESTATISTICAS = web.AppKey("estatisticas", dict)
+
+
+def _trechos(texto: str) -> List[str]:
+    """Divide a resposta em "tokens" (palavras com o espaço que as segue)"""
+    return re.findall(r"\S+\s*|\s+", texto)
+
+
+def criar_app(
+    resposta: str = RELATORIO_EXEMPLO,
+    latencia: float = 0.0,
+    intervalo_tokens: float = 0.0,
+    max_perfis_agrupados: Optional[int] = None,
+) -> web.Application:
+    """
+    Cria a aplicação aiohttp que responde /v1/chat/completions
+
+    Com "stream": true a resposta sai em chunks SSE, um por token, com
+    intervalo_tokens segundos entre eles (simula a geração do modelo).
+    Prompts agrupados ("=== PERFIL n ===") recebem um relatório por perfil,
+    no máximo max_perfis_agrupados (simula uma resposta truncada).
+    """
+    app = web.Application()
+    estatisticas = {"chamadas": 0, "prompt_tokens": 0}
+    app[ESTATISTICAS] = estatisticas
+
+    def _conteudo(corpo: dict) -> str:
+        mensagens = corpo.get("messages") or [{}]
+        perfis = PERFIL_AGRUPADO.findall(str(mensagens[-1].get("content", "")))
+        if not perfis:
+            return resposta
+        return "\n".join(
+            f"=== PERFIL {n} ===\n{resposta}" for n in perfis[:max_perfis_agrupados]
+        )
+
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        corpo = await request.json()
+        estatisticas["chamadas"] += 1
+        prompt_tokens = sum(
+            len(str(m.get("content", "")).split()) for m in corpo.get("messages", [])
+        )
+        estatisticas["prompt_tokens"] += prompt_tokens
+        if latencia:
+            await asyncio.sleep(latencia)
+        if corpo.get("stream"):
+            return await _responder_stream(request, corpo, prompt_tokens)
+
+        conteudo = _conteudo(corpo)
+        completion_tokens = len(conteudo.split())
+        return web.json_response(
+            {
+                "id": f"chatcmpl-fake-{estatisticas['chamadas']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": corpo.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": conteudo},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+        )
+
+    async def _responder_stream(
+        request: web.Request, corpo: dict, prompt_tokens: int
+    ) -> web.StreamResponse:
+        stream = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await stream.prepare(request)
+        base = {
+            "id": f"chatcmpl-fake-{estatisticas['chamadas']}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": corpo.get("model", "fake"),
+        }
+        conteudo = _conteudo(corpo)
+        deltas = [{"role": "assistant", "content": ""}]
+        deltas += [{"content": trecho} for trecho in _trechos(conteudo)]
+        for delta in deltas:
+            if intervalo_tokens:
+                await asyncio.sleep(intervalo_tokens)
+            chunk = {
+                **base,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            }
+            await stream.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        fim = {
+            **base,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        await stream.write(f"data: {json.dumps(fim)}\n\n".encode())
+        if (corpo.get("stream_options") or {}).get("include_usage"):
+            uso = {
+                **base,
+                "choices": [],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(conteudo.split()),
+                    "total_tokens": prompt_tokens + len(conteudo.split()),
+                },
+            }
+            await stream.write(f"data: {json.dumps(uso)}\n\n".encode())
+        await stream.write(b"data: [DONE]\n\n")
+        await stream.write_eof()
+        return stream
+
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    return app
+
+
+async def iniciar(
+    host: str = "127.0.0.1", port: int = 0, app: Optional[web.Application] = None
+) -> tuple:
+    """Sobe o servidor em background. Retorna (runner, base_url)"""
+    runner = web.AppRunner(app or criar_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    porta = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{porta}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor fake da API OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.0)
+    parser.add_argument("--intervalo-tokens", type=float, default=0.0)
+    args = parser.parse_args()
+
+    web.run_app(
+        criar_app(latencia=args.latencia, intervalo_tokens=args.intervalo_tokens),
+        host=args.host,
+        port=args.port,
+    )
@@ -1,64 +1,144 @@
 import instaloader
+import logging
+import math
 import os
 import asyncio
 import time
 import random
-import json
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from dotenv import load_dotenv
+from config import Config
+from services import metrics_engine
+from services.scheduler import AgendadorRequisicoes, RequisicaoRecusada, Vez
+from services.telemetry import ETAPAS
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Os primeiros posts vêm junto com o perfil; os demais, em páginas do GraphQL
+POSTS_NO_PERFIL = 12
+POSTS_POR_PAGINA = 50
+
 
 class InstagramService:
-    def __init__(self):
+    def __init__(self, snapshots=None, historico=None, agendador=None):
         self.username = os.getenv("INSTAGRAM_USERNAME")
         self.password = os.getenv("INSTAGRAM_PASSWORD")
         self.L = None
         self.session_file = None
         self.last_login = None
-        self.rate_limit_until = None
         self.use_mock = os.getenv("USE_MOCK_DATA", "false").lower() == "true"
         self.mock_service = None  # Será inicializado sob demanda
 
-        self._load_rate_limit_state()  # Carrega rate limit salvo antes de tentar login
+        # Chamadas do instaloader são bloqueantes: rodam num pool limitado
+        # para não travar o event loop do uvicorn
+        self.call_timeout = Config.INSTAGRAM_CALL_TIMEOUT
+        self.max_threads = Config.INSTAGRAM_EXECUTOR_WORKERS
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_threads, thread_name_prefix="instaloader"
+        )
+        # Chamadas que passaram do timeout mas seguem rodando no pool
+        self._presas: Set[Future] = set()
+
+        # Posts já coletados por perfil (get/set por username), para que uma
+        # nova coleta pare no primeiro post conhecido em vez de refazer tudo
+        self.snapshots = snapshots
+        # Série temporal (SerieTemporal) onde cada coleta real é registrada
+        self.historico = historico
+        self.max_posts = Config.MAX_POSTS_PER_REQUEST
+        self.refresh_recentes = Config.SNAPSHOT_REFRESH_RECENT
+        self.max_historico = Config.SNAPSHOT_MAX_POSTS
+
+        # Toda chamada ao Instagram passa pelo orçamento global de requisições;
+        # bloqueios e backoff ficam no estado do agendador (compartilhável)
+        self.agendador = agendador or AgendadorRequisicoes(
+            Config.MAX_REQUESTS_PER_HOUR, rajada=Config.INSTAGRAM_BURST
+        )
 
         if self.use_mock:
             from services.mock_service import MockInstagramService
 
             self.mock_service = MockInstagramService()
 
-        try:
-            self._login()
-        except Exception as e:
-            print(f"⚠️ Erro no login, usando dados mock: {str(e)}")
-            self.use_mock = True
+        # O login é adiado: roda em background no startup da API ou na
+        # primeira coleta real (ver ensure_login)
+        self.login_status = "mock" if self.use_mock else "pendente"
+        self.login_error = None
+        self._login_lock = None
 
     # ==========================================================
     # LOGIN
     # ==========================================================
     async def _handle_rate_limit_error(self, wait_time: int = 300):
-        """Gerencia erros de rate limiting com backoff exponencial"""
-        if not hasattr(self, "_backoff_time"):
-            self._backoff_time = 300  # Começa com 5 minutos (não 60s)
-        else:
-            self._backoff_time = min(self._backoff_time * 2, 7200)  # Máximo 2 horas
+        """
+        Gerencia erros de rate limiting com backoff exponencial
+
+        Bloqueia o agendador (5 min dobrando a cada rate limit seguido, até
+        2 h, com contador compartilhado) e falha na hora com retry_after, em
+        vez de segurar a requisição durante o bloqueio.
+        """
+        wait_time, expoente = await self.agendador.registrar_rate_limit(wait_time)
+        logger.warning(
+            "Rate limiting do Instagram",
+            extra={"backoff": expoente, "segundos": round(wait_time)},
+        )
+        raise RequisicaoRecusada(wait_time)
+
+    async def ensure_login(self) -> bool:
+        """Garante o login sem bloquear o event loop. Retorna True se autenticado"""
+        if self.use_mock:
+            return False
+        if self.login_status == "pronto":
+            return True
+
+        if self._login_lock is None:
+            self._login_lock = asyncio.Lock()
+
+        async with self._login_lock:
+            # Outra corrotina pode ter concluído o login enquanto esperávamos
+            if self.login_status == "pronto":
+                return True
+            if self.login_status == "falhou":
+                return False
+
+            self.login_status = "em_andamento"
+            loop = asyncio.get_running_loop()
+            try:
+                # Sem timeout: o login inclui a pausa anti-bot de 15-30s
+                await self.agendador.aguardar("interativo", "login")
+                await loop.run_in_executor(self.executor, self._login)
+                self.login_status = "pronto"
+                return True
+            except Exception as e:
+                logger.warning(
+                    "Erro no login, usando dados mock", extra={"erro": str(e)}
+                )
+                self.login_status = "falhou"
+                self.login_error = str(e)
+                self.use_mock = True
+                return False
 
-        wait_time = max(wait_time, self._backoff_time)
-        print(f"⏳ Rate limiting detectado - aguardando {wait_time//60} minutos...")
-        self._set_rate_limit(wait_time)
-        await asyncio.sleep(wait_time)
+    def login_info(self) -> Dict:
+        """Estado do login para o endpoint /status"""
+        return {
+            "estado": self.login_status,
+            "pronto": self.login_status in ("pronto", "mock", "falhou"),
+            "ultimo_login": self.last_login.isoformat() if self.last_login else None,
+            "erro": self.login_error,
+        }
 
     def _login(self):
         """Faz login no Instagram com gerenciamento de sessão e suporte a 2FA"""
         if self.use_mock:
-            print("🔄 Usando modo mock - sem login necessário")
+            logger.info("Modo mock: login não é necessário")
             return
 
         try:
-            print("🔄 Iniciando processo de login...")
+            logger.info("Iniciando login no Instagram")
 
             # Lista de user agents para rotação
             user_agents = [
@@ -79,7 +159,7 @@ class InstagramService:
             ]
 
             # Aguardar um tempo aleatório antes de tentar login (sincrono aqui)
-            print("⏳ Aguardando alguns segundos antes de tentar login...")
+            logger.info("Aguardando alguns segundos antes de tentar o login")
             time.sleep(random.uniform(15, 30))
 
             self.L = instaloader.Instaloader(
@@ -102,21 +182,26 @@ class InstagramService:
             # 1️⃣ Tenta carregar sessão anterior
             if self.session_file.exists():
                 try:
-                    print(f"📦 Carregando sessão salva para {self.username}...")
+                    logger.info(
+                        "Carregando sessão salva", extra={"usuario": self.username}
+                    )
                     self.L.load_session_from_file(self.username, str(self.session_file))
-                    print("✅ Sessão carregada com sucesso.")
                     self.last_login = datetime.now()
-                    print(f"🔐 Sessão autenticada como: {self.L.test_login()}")
+                    logger.info(
+                        "Sessão carregada", extra={"usuario": self.L.test_login()}
+                    )
                     return
                 except Exception as session_error:
-                    print(f"⚠️ Erro ao carregar sessão: {session_error}")
+                    logger.warning(
+                        "Erro ao carregar sessão", extra={"erro": str(session_error)}
+                    )
                     self.session_file.unlink(missing_ok=True)
 
             # 2️⃣ Se não existir sessão, faz login
             if not self.username or not self.password:
                 raise Exception("Credenciais do Instagram não configuradas no .env")
 
-            print(f"🔑 Fazendo login no Instagram com usuário: {self.username}")
+            logger.info("Fazendo login no Instagram", extra={"usuario": self.username})
             self.L.login(self.username, self.password)
 
             # 3️⃣ Verifica se o login foi aceito
@@ -133,11 +218,11 @@ class InstagramService:
 
             # 5️⃣ Salva sessão
             self.L.save_session_to_file(str(self.session_file))
-            print(f"✅ Login bem-sucedido! Sessão salva em {self.session_file}")
+            logger.info("Login concluído", extra={"sessao": str(self.session_file)})
             self.last_login = datetime.now()
 
         except Exception as e:
-            print(f"❌ Erro no login do Instagram: {e}")
+            logger.error("Erro no login do Instagram", extra={"erro": str(e)})
             raise Exception(f"Falha ao fazer login: {str(e)}")
 
     # ==========================================================
@@ -146,153 +231,153 @@ class InstagramService:
     def _check_and_refresh_session(self):
         """Renova sessão se estiver antiga"""
         if self.last_login and datetime.now() - self.last_login > timedelta(hours=12):
-            print("🔄 Sessão antiga detectada — renovando...")
+            logger.info("Sessão antiga, renovando")
             try:
                 self._login()
             except Exception as e:
-                print(f"⚠️ Erro ao renovar sessão: {e}")
+                logger.warning("Erro ao renovar sessão", extra={"erro": str(e)})
 
-    def _load_rate_limit_state(self):
-        """Carrega estado de rate limit de arquivo"""
-        rate_limit_file = Path("rate_limit_state.json")
-        if rate_limit_file.exists():
-            try:
-                import json
-
-                with open(rate_limit_file, "r") as f:
-                    data = json.load(f)
-                    if "rate_limit_until" in data:
-                        until = datetime.fromisoformat(data["rate_limit_until"])
-                        if until > datetime.now():
-                            self.rate_limit_until = until
-                            print(f"⚠️ Rate limit ativo até {until}")
-            except Exception as e:
-                print(f"Erro ao carregar estado de rate limit: {e}")
-
-    def _save_rate_limit_state(self):
-        """Salva estado de rate limit em arquivo"""
-        if self.rate_limit_until:
-            try:
-                import json
-
-                rate_limit_file = Path("rate_limit_state.json")
-                with open(rate_limit_file, "w") as f:
-                    json.dump(
-                        {"rate_limit_until": self.rate_limit_until.isoformat()}, f
-                    )
-            except Exception as e:
-                print(f"Erro ao salvar estado de rate limit: {e}")
-
-    def _check_rate_limit(self):
-        """Verifica se há bloqueio ativo"""
-        if self.rate_limit_until and datetime.now() < self.rate_limit_until:
-            wait_seconds = int((self.rate_limit_until - datetime.now()).total_seconds())
-            raise Exception(f"⏱️ Rate limiting ativo — aguarde {wait_seconds} segundos")
-
-    def _set_rate_limit(self, seconds: int):
+    async def _set_rate_limit(self, seconds: int):
         """Ativa temporariamente bloqueio de requisições"""
-        self.rate_limit_until = datetime.now() + timedelta(seconds=seconds)
-        print(f"🚫 Rate limiting detectado — aguardando {seconds} segundos")
-        self._save_rate_limit_state()
-
-    async def _random_delay(self, min_sec: float = 3.0, max_sec: float = 8.0):
-        """Delay aleatório entre ações com jitter"""
-        base_delay = random.uniform(min_sec, max_sec)
-        jitter = random.uniform(0.5, 1.5)  # 50% menos até 50% mais
-        final_delay = base_delay * jitter
-        print(f"⏱️ Aguardando {final_delay:.1f} segundos antes da próxima ação...")
-        await asyncio.sleep(final_delay)
+        logger.warning("Bloqueio do Instagram detectado", extra={"segundos": seconds})
+        await self.agendador.bloquear(seconds)
+
+    @property
+    def custo_coleta(self) -> int:
+        """Requisições de uma coleta completa: o perfil e as páginas de posts"""
+        restantes = max(0, self.max_posts - POSTS_NO_PERFIL)
+        return 1 + math.ceil(restantes / POSTS_POR_PAGINA)
+
+    async def _chamar(self, vez: Vez, func: Callable[..., Any], *args) -> Any:
+        """Chamada que vai ao Instagram: aguarda a vez no agendador e executa"""
+        espera = await self.agendador.aguardar(
+            vez.faixa, vez.chamador, espera_maxima=vez.espera_maxima
+        )
+        ETAPAS.observar(espera, "agendador")
+        with ETAPAS.medir("instagram"):
+            return await self._run_blocking(func, *args)
+
+    async def _run_blocking(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Executa uma chamada bloqueante no executor com timeout por chamada
+
+        O timeout só libera quem espera: não há como interromper o
+        instaloader, então a thread segue na chamada e ocupa sua vaga no pool
+        até ela voltar. Essas chamadas ficam em _presas; com todas as vagas
+        presas, novas chamadas falham na hora em vez de esperar na fila do
+        pool até o próprio timeout.
+        """
+        self._presas = {futuro for futuro in self._presas if not futuro.done()}
+        if len(self._presas) >= self.max_threads:
+            raise Exception(
+                "Chamadas ao Instagram travadas: todas as threads do instaloader"
+                " passaram do tempo limite e ainda não voltaram"
+            )
+        futuro = self.executor.submit(func, *args)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(futuro), self.call_timeout
+            )
+        except asyncio.TimeoutError:
+            # Ainda na fila do pool: sai sem ocupar thread
+            if not futuro.cancel():
+                self._presas.add(futuro)
+            raise Exception(
+                f"Tempo limite de {self.call_timeout:.0f}s excedido na chamada ao Instagram"
+            )
+
+    def close(self):
+        """Libera o pool de threads do instaloader"""
+        self.executor.shutdown(wait=False)
 
     # ==========================================================
     # COLETA DE DADOS
     # ==========================================================
-    async def get_profile_data(self, username: str, tentativas: int = 3) -> Dict:
-        """Coleta dados de um perfil do Instagram com retry e fallback para mock"""
-        # Se estiver em modo mock, use o serviço mock
+    async def get_profile_data(
+        self, username: str, tentativas: int = 3, vez: Optional[Vez] = None
+    ) -> Dict:
+        """
+        Coleta dados de um perfil do Instagram com retry e fallback para mock
+
+        vez define a faixa, o chamador (padrão: o próprio perfil) e a espera
+        máxima de cada requisição no agendador; se a espera passar disso, a
+        coleta levanta RequisicaoRecusada.
+        """
+        vez = vez or Vez()
+        if vez.chamador is None:
+            vez = vez._replace(chamador=username)
+        if not self.use_mock:
+            await self.ensure_login()
+
+        # Se estiver em modo mock (ou o login falhou), use o serviço mock
         if self.use_mock:
             if not self.mock_service:
                 from .mock_service import MockInstagramService
 
                 self.mock_service = MockInstagramService()
-            print(f"🔄 Usando dados mock para @{username}")
+            logger.debug("Usando dados mock", extra={"username": username})
             return await self.mock_service.get_profile_data(username)
 
-        self._check_rate_limit()
-        self._check_and_refresh_session()
+        await self._run_blocking(self._check_and_refresh_session)
 
         for tentativa in range(1, tentativas + 1):
             try:
-                print(
-                    f"📸 Coletando dados do perfil @{username} (tentativa {tentativa}/{tentativas})"
+                logger.info(
+                    "Coletando dados do perfil",
+                    extra={"username": username, "tentativa": tentativa},
                 )
 
-                # Delay maior entre tentativas
-                if tentativa > 1:
-                    await self._random_delay(
-                        10.0 * (tentativa - 1), 20.0 * (tentativa - 1)
-                    )
-                else:
-                    await self._random_delay(5, 10)
-
                 try:
-                    profile = instaloader.Profile.from_username(
-                        self.L.context, username
+                    profile = await self._chamar(
+                        vez, instaloader.Profile.from_username, self.L.context, username
                     )
                 except instaloader.exceptions.ConnectionException as e:
                     error_msg = str(e).lower()
                     if "401" in error_msg or "unauthorized" in error_msg:
-                        print(
-                            f"⚠️ Erro 401 (Unauthorized) detectado - aguardando 10 minutos"
-                        )
+                        logger.warning("Erro 401 (Unauthorized) do Instagram")
                         await self._handle_rate_limit_error(600)  # 10 minutos
-                        continue
                     if "429" in error_msg or "too many" in error_msg:
-                        print(f"⚠️ Rate limiting (429) detectado")
+                        logger.warning("Erro 429 (Too Many Requests) do Instagram")
                         await self._handle_rate_limit_error(300)  # 5 minutos
-                        continue
                     raise
 
-                # Coleta posts com limite
-                posts_list, max_posts = [], 12
-                for i, post in enumerate(profile.get_posts()):
-                    if i >= max_posts:
-                        break
-                    posts_list.append(
+                # Coleta só o que mudou desde o último snapshot do perfil
+                snapshot = self.snapshots.get(username) if self.snapshots else None
+                anteriores = snapshot["posts"] if snapshot else []
+                posts_iter = await self._run_blocking(profile.get_posts)
+                novos, atualizados = await self._coletar_posts(
+                    posts_iter, anteriores, vez
+                )
+                historico = self.mesclar_posts(
+                    anteriores, novos + atualizados, self.max_historico
+                )
+                if self.snapshots is not None:
+                    await self.snapshots.set_async(
+                        username,
                         {
-                            "likes": post.likes,
-                            "comments": post.comments,
-                            "caption": post.caption[:200] if post.caption else "",
-                            "date": post.date_local.isoformat(),
-                            "is_video": post.is_video,
-                            "url": f"https://www.instagram.com/p/{post.shortcode}/",
-                        }
+                            "posts": historico,
+                            "atualizado_em": datetime.now().isoformat(),
+                        },
                     )
-                    await self._random_delay(0.5, 1.5)
-
-                dados = {
-                    "username": profile.username,
-                    "nome_completo": profile.full_name or profile.username,
-                    "biografia": profile.biography or "Sem biografia",
-                    "seguidores": profile.followers,
-                    "seguindo": profile.followees,
-                    "total_posts": profile.mediacount,
-                    "foto_perfil": profile.profile_pic_url,
-                    "is_private": profile.is_private,
-                    "is_verified": profile.is_verified,
-                    "is_business": profile.is_business_account,
-                    "categoria": (
-                        profile.business_category_name
-                        if profile.is_business_account
-                        else None
-                    ),
-                    "url_externo": profile.external_url,
-                    "posts": posts_list,
-                    "coletado_em": datetime.now().isoformat(),
+
+                dados = await self._run_blocking(
+                    self._montar_dados_perfil, profile, historico[: self.max_posts]
+                )
+                dados["coleta"] = {
+                    "modo": "incremental" if anteriores else "completa",
+                    "posts_novos": len(novos),
+                    "posts_atualizados": len(atualizados),
+                    "posts_em_historico": len(historico),
                 }
+                await self._registrar_historico(dados)
 
-                print(f"✅ Dados coletados com sucesso para @{username}")
+                await self.agendador.zerar_backoff()
+                logger.info("Dados coletados", extra={"username": username})
                 return dados
 
+            except RequisicaoRecusada:
+                raise
+
             except instaloader.exceptions.ProfileNotExistsException:
                 raise Exception(f"Perfil @{username} não encontrado.")
 
@@ -302,19 +387,25 @@ class InstagramService:
                 )
 
             except instaloader.exceptions.LoginRequiredException:
-                print("🔐 Sessão expirada — renovando...")
-                self._login()
+                logger.info("Sessão expirada, renovando")
+                await self._chamar(vez, self._login)
                 continue
 
             except instaloader.exceptions.ConnectionException as e:
                 msg = str(e).lower()
                 if "wait" in msg or "401" in msg or "rate" in msg:
-                    self._set_rate_limit(300)
-                    print("⚠️ Bloqueio temporário detectado — retornando dados mock.")
+                    await self._set_rate_limit(300)
+                    logger.warning(
+                        "Bloqueio temporário, retornando dados mock",
+                        extra={"username": username},
+                    )
                     return self._mock_profile(username)
                 if tentativa < tentativas:
                     wait_time = tentativa * 5
-                    print(f"⚠️ Erro de conexão, tentando novamente em {wait_time}s...")
+                    logger.warning(
+                        "Erro de conexão, tentando novamente",
+                        extra={"username": username, "segundos": wait_time},
+                    )
                     await asyncio.sleep(wait_time)
                     continue
                 raise
@@ -322,17 +413,150 @@ class InstagramService:
             except Exception as e:
                 msg = str(e).lower()
                 if "rate" in msg or "wait" in msg or "401" in msg:
-                    self._set_rate_limit(300)
-                    print("⚠️ Rate limiting detectado — retornando dados mock.")
+                    await self._set_rate_limit(300)
+                    logger.warning(
+                        "Rate limiting, retornando dados mock",
+                        extra={"username": username},
+                    )
                     return self._mock_profile(username)
                 if tentativa < tentativas:
-                    print(f"⚠️ Erro na tentativa {tentativa}: {e}")
+                    logger.warning(
+                        "Erro na coleta, tentando novamente",
+                        extra={
+                            "username": username,
+                            "tentativa": tentativa,
+                            "erro": str(e),
+                        },
+                    )
                     await asyncio.sleep(tentativa * 3)
                     continue
                 raise Exception(f"Erro ao coletar dados do perfil: {e}")
 
         raise Exception(f"Não foi possível coletar dados após {tentativas} tentativas.")
 
+    async def _registrar_historico(self, dados: Dict):
+        """Grava a coleta na série temporal; falhas aqui não derrubam a coleta"""
+        if self.historico is None:
+            return
+        try:
+            await self._run_blocking(self.historico.registrar, dados)
+        except Exception as e:
+            logger.warning(
+                "Histórico não registrado",
+                extra={"username": dados["username"], "erro": str(e)},
+            )
+
+    async def _coletar_posts(
+        self, posts_iter, anteriores: List[Dict], vez: Optional[Vez] = None
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Percorre o feed do mais novo para o mais antigo até o primeiro post já
+        conhecido depois da primeira página. A primeira página vem junto com o
+        perfil, então curtidas/comentários dos posts dela são sempre
+        atualizados sem custo; com SNAPSHOT_REFRESH_RECENT > 0, segue por mais
+        N posts conhecidos além dela. Posts fixados (fora da ordem
+        cronológica) não interrompem. Retorna (novos, atualizados).
+        """
+        conhecidos = {p["shortcode"] for p in anteriores if p.get("shortcode")}
+        novos, atualizados = [], []
+        revisitados = 0
+        lidos = 0
+        while len(novos) + len(atualizados) < self.max_posts:
+            pagina_nova = (
+                lidos >= POSTS_NO_PERFIL
+                and (lidos - POSTS_NO_PERFIL) % POSTS_POR_PAGINA == 0
+            )
+            if pagina_nova:
+                # O próximo post abre uma página do GraphQL: é uma requisição
+                post = await self._chamar(vez or Vez(), self._proximo_post, posts_iter)
+            else:
+                post = await self._run_blocking(self._proximo_post, posts_iter)
+            lidos += 1
+            if post is None:
+                break
+            if post["shortcode"] not in conhecidos:
+                novos.append(post)
+            else:
+                atualizados.append(post)
+                if not post["is_pinned"]:
+                    if lidos > POSTS_NO_PERFIL:
+                        revisitados += 1
+                    if (
+                        lidos >= POSTS_NO_PERFIL
+                        and revisitados >= self.refresh_recentes
+                    ):
+                        break
+        return novos, atualizados
+
+    @staticmethod
+    def mesclar_posts(
+        anteriores: List[Dict], coletados: List[Dict], limite: int
+    ) -> List[Dict]:
+        """
+        Junta os coletados ao histórico (por shortcode), mais novos primeiro
+
+        A coleta lê o feed sem buracos do post mais novo até o mais antigo
+        coletado: posts do histórico nesse intervalo que não vieram foram
+        apagados no Instagram e saem do histórico. Os mais antigos que isso
+        não foram conferidos e ficam.
+        """
+        datas = [
+            p["date"] for p in coletados if p.get("date") and not p.get("is_pinned")
+        ]
+        if datas:
+            desde = min(datas)
+            vistos = {p["shortcode"] for p in coletados}
+            anteriores = [
+                p
+                for p in anteriores
+                if p.get("shortcode") in vistos or (p.get("date") or "") < desde
+            ]
+        por_shortcode = {p["shortcode"]: p for p in anteriores if p.get("shortcode")}
+        por_shortcode.update((p["shortcode"], p) for p in coletados)
+        historico = sorted(
+            por_shortcode.values(), key=lambda p: p.get("date") or "", reverse=True
+        )
+        return historico[:limite]
+
+    @staticmethod
+    def _proximo_post(posts_iter) -> Optional[Dict]:
+        """Avança o iterador de posts (bloqueante) e converte o post em dict"""
+        post = next(posts_iter, None)
+        if post is None:
+            return None
+        return {
+            "likes": post.likes,
+            "comments": post.comments,
+            "caption": post.caption[:200] if post.caption else "",
+            "date": post.date_local.isoformat(),
+            "is_video": post.is_video,
+            "url": f"https://www.instagram.com/p/{post.shortcode}/",
+            "shortcode": post.shortcode,
+            "is_pinned": post.is_pinned,
+        }
+
+    @staticmethod
+    def _montar_dados_perfil(profile, posts_list) -> Dict:
+        """Monta o dict do perfil (alguns atributos fazem requisições extras)"""
+        return {
+            "username": profile.username,
+            "nome_completo": profile.full_name or profile.username,
+            "biografia": profile.biography or "Sem biografia",
+            "seguidores": profile.followers,
+            "seguindo": profile.followees,
+            "total_posts": profile.mediacount,
+            "foto_perfil": profile.profile_pic_url,
+            "is_private": profile.is_private,
+            "is_verified": profile.is_verified,
+            "is_business": profile.is_business_account,
+            "categoria": (
+                profile.business_category_name if profile.is_business_account else None
+            ),
+            "url_externo": profile.external_url,
+            "posts": posts_list,
+            "coletado_em": datetime.now().isoformat(),
+        }
+
     # ==========================================================
     # MOCK DE DADOS
     # ==========================================================
@@ -369,41 +593,8 @@ class InstagramService:
     def calcular_metricas(self, dados: Dict) -> Dict:
         """Calcula métricas de engajamento"""
         try:
-            posts = dados.get("posts", [])
-            seguidores = dados.get("seguidores", 0)
-            if not posts or seguidores == 0:
-                return {
-                    "taxa_engajamento": 0,
-                    "media_likes": 0,
-                    "media_comentarios": 0,
-                    "total_interacoes": 0,
-                    "melhor_post": None,
-                    "posts_analisados": 0,
-                }
-
-            total_likes = sum(p["likes"] for p in posts)
-            total_comments = sum(p["comments"] for p in posts)
-            total_interacoes = total_likes + total_comments
-            media_likes = total_likes / len(posts)
-            media_comentarios = total_comments / len(posts)
-            media_interacoes = total_interacoes / len(posts)
-            taxa_engajamento = (media_interacoes / seguidores) * 100
-
-            melhor_post = max(posts, key=lambda p: p["likes"] + p["comments"])
-            return {
-                "taxa_engajamento": round(taxa_engajamento, 2),
-                "media_likes": round(media_likes, 2),
-                "media_comentarios": round(media_comentarios, 2),
-                "total_interacoes": total_interacoes,
-                "melhor_post": {
-                    "likes": melhor_post["likes"],
-                    "comments": melhor_post["comments"],
-                    "url": melhor_post["url"],
-                    "caption": melhor_post["caption"][:100],
-                },
-                "posts_analisados": len(posts),
-                "razao_video_foto": sum(1 for p in posts if p["is_video"]) / len(posts),
-            }
+            with ETAPAS.medir("metricas"):
+                return metrics_engine.calcular_metricas(dados)
         except Exception as e:
-            print(f"Erro ao calcular métricas: {e}")
+            logger.exception("Erro ao calcular métricas")
             return {"erro": str(e)}
@@ -0,0 +1,339 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from services.logging_config import ID_REQUISICAO
+from services.persistent_cache import abrir_conexao
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_FINAIS = ("concluido", "falhou")
+
+
+class AdiarJob(Exception):
+    """Levantada pelo handler para devolver o job à fila por N segundos"""
+
+    def __init__(self, segundos: float, motivo: str = ""):
+        self.segundos = segundos
+        super().__init__(motivo or f"Adiado por {segundos:.0f}s")
+
+
+class JobStore:
+    """
+    Armazena jobs em SQLite para que sobrevivam a reinícios.
+
+    Vários processos podem compartilhar o mesmo arquivo: um job só é executado
+    por quem conseguir reivindicá-lo (UPDATE condicional dentro de uma
+    transação IMMEDIATE). Jobs em execução renovam um heartbeat; os que ficam
+    sem heartbeat (processo morto) voltam para a fila.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._local = threading.local()
+        self._criar_tabela()
+
+    def _conexao(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = abrir_conexao(self.caminho)
+            self._local.conn = conn
+        return conn
+
+    def _criar_tabela(self):
+        conn = self._conexao()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                tipo TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                resultado TEXT,
+                erro TEXT,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                criado_em REAL NOT NULL,
+                atualizado_em REAL NOT NULL,
+                executar_apos REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_fila ON jobs (status, executar_apos)"
+        )
+
+    @staticmethod
+    def _para_dict(row) -> Dict[str, Any]:
+        return {
+            "id": row[0],
+            "tipo": row[1],
+            "params": json.loads(row[2]),
+            "status": row[3],
+            "resultado": json.loads(row[4]) if row[4] else None,
+            "erro": row[5],
+            "tentativas": row[6],
+            "criado_em": row[7],
+            "atualizado_em": row[8],
+            "executar_apos": row[9],
+        }
+
+    def criar(
+        self, tipo: str, params: Dict[str, Any], executar_apos: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Registra um novo job pendente"""
+        agora = time.time()
+        job_id = uuid.uuid4().hex
+        self._conexao().execute(
+            "INSERT INTO jobs (id, tipo, params, status, criado_em, atualizado_em,"
+            " executar_apos) VALUES (?, ?, ?, 'pendente', ?, ?, ?)",
+            (job_id, tipo, json.dumps(params), agora, agora, executar_apos or agora),
+        )
+        return self.obter(job_id)
+
+    def obter(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna o job ou None"""
+        conn = self._conexao()
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._para_dict(row) if row else None
+
+    def reivindicar_proximo(self) -> Optional[Dict[str, Any]]:
+        """Marca como em execução o job pendente mais antigo que já pode rodar"""
+        conn = self._conexao()
+        agora = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'pendente' AND executar_apos <= ?"
+                " ORDER BY executar_apos, criado_em LIMIT 1",
+                (agora,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'executando', tentativas = tentativas + 1,"
+                " atualizado_em = ? WHERE id = ?",
+                (agora, row[0]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.obter(row[0])
+
+    def heartbeat(self, job_id: str):
+        """Renova o heartbeat de um job em execução"""
+        self._conexao().execute(
+            "UPDATE jobs SET atualizado_em = ? WHERE id = ? AND status = 'executando'",
+            (time.time(), job_id),
+        )
+
+    def concluir(self, job_id: str, resultado: Any):
+        self._conexao().execute(
+            "UPDATE jobs SET status = 'concluido', resultado = ?, erro = NULL,"
+            " atualizado_em = ? WHERE id = ?",
+            (json.dumps(resultado, default=str), time.time(), job_id),
+        )
+
+    def falhar(self, job_id: str, erro: str):
+        self._conexao().execute(
+            "UPDATE jobs SET status = 'falhou', erro = ?, atualizado_em = ?"
+            " WHERE id = ?",
+            (erro, time.time(), job_id),
+        )
+
+    def adiar(self, job_id: str, executar_apos: float, motivo: str):
+        """Devolve o job à fila só a partir de executar_apos"""
+        self._conexao().execute(
+            "UPDATE jobs SET status = 'pendente', executar_apos = ?, erro = ?,"
+            " atualizado_em = ? WHERE id = ?",
+            (executar_apos, motivo, time.time(), job_id),
+        )
+
+    def devolver(self, job_id: str):
+        """Devolve um job interrompido (ex.: desligamento) para a fila"""
+        self._conexao().execute(
+            "UPDATE jobs SET status = 'pendente', atualizado_em = ? WHERE id = ?",
+            (time.time(), job_id),
+        )
+
+    def recuperar_orfaos(self, sem_heartbeat_ha: float) -> int:
+        """Devolve à fila jobs 'executando' cujo processo parou de dar sinal"""
+        cursor = self._conexao().execute(
+            "UPDATE jobs SET status = 'pendente' WHERE status = 'executando'"
+            " AND atualizado_em < ?",
+            (time.time() - sem_heartbeat_ha,),
+        )
+        return cursor.rowcount
+
+    def limpar_finalizados(self, mais_antigos_que: float) -> int:
+        """Remove jobs finalizados há mais de N segundos"""
+        cursor = self._conexao().execute(
+            "DELETE FROM jobs WHERE status IN ('concluido', 'falhou')"
+            " AND atualizado_em < ?",
+            (time.time() - mais_antigos_que,),
+        )
+        return cursor.rowcount
+
+    def contagem(self) -> Dict[str, int]:
+        """Número de jobs por status"""
+        rows = self._conexao().execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+        )
+        return {status: total for status, total in rows}
+
+
+class JobQueue:
+    """
+    Pool de workers assíncronos que executa jobs persistidos no JobStore.
+
+    Os workers buscam trabalho no próprio store (e não numa fila em memória),
+    então jobs criados antes de um reinício ou por outro processo também são
+    executados. Jobs enfileirados localmente acordam os workers na hora.
+    Um handler que levanta AdiarJob devolve o job à fila para mais tarde, sem
+    ocupar o worker durante a espera.
+
+    As escritas no store (BEGIN IMMEDIATE, que pode esperar o busy_timeout
+    pelo lock de outro processo) rodam em threads, fora do event loop.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]],
+        workers: int = 2,
+        intervalo_busca: float = 1.0,
+        heartbeat: float = 30.0,
+        retencao: float = 7 * 24 * 3600,
+    ):
+        self.store = store
+        self.handlers = handlers
+        self.num_workers = workers
+        self.intervalo_busca = intervalo_busca
+        self.intervalo_heartbeat = heartbeat
+        self.retencao = retencao
+
+        self._tasks: List[asyncio.Task] = []
+        self._novo_job: Optional[asyncio.Event] = None
+        # Eventos de conclusão só enquanto há long-polls esperando o job
+        self._concluidos: Dict[str, asyncio.Event] = {}
+        self._aguardando: Dict[str, int] = {}
+        self._ultima_recuperacao = 0.0
+
+    async def iniciar(self):
+        """Recupera jobs órfãos e inicia os workers"""
+        self._novo_job = asyncio.Event()
+        await self._recuperar_orfaos()
+        await asyncio.to_thread(self.store.limpar_finalizados, self.retencao)
+        self._tasks = [
+            asyncio.ensure_future(self._worker()) for _ in range(self.num_workers)
+        ]
+
+    async def parar(self):
+        """Cancela os workers (jobs em execução voltam à fila no próximo início)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enfileirar(
+        self, tipo: str, params: Dict[str, Any], executar_apos: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Cria um job e acorda os workers"""
+        if tipo not in self.handlers:
+            raise ValueError(f"Tipo de job desconhecido: {tipo}")
+        job = await asyncio.to_thread(self.store.criar, tipo, params, executar_apos)
+        if self._novo_job is not None:
+            self._novo_job.set()
+        return job
+
+    async def aguardar(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Long-poll: retorna o job quando finalizar ou quando o timeout expirar"""
+        limite = time.monotonic() + timeout
+        self._aguardando[job_id] = self._aguardando.get(job_id, 0) + 1
+        try:
+            while True:
+                job = self.store.obter(job_id)
+                restante = limite - time.monotonic()
+                if job is None or job["status"] in ESTADOS_FINAIS or restante <= 0:
+                    return job
+                evento = self._concluidos.setdefault(job_id, asyncio.Event())
+                try:
+                    # Acorda na conclusão local ou re-checa o store (outro processo)
+                    await asyncio.wait_for(evento.wait(), min(restante, 0.5))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # O último long-poll do job leva o evento junto: jobs concluídos
+            # por outro processo ou que passaram do timeout não ficam no dict
+            restantes = self._aguardando.pop(job_id) - 1
+            if restantes:
+                self._aguardando[job_id] = restantes
+            else:
+                self._concluidos.pop(job_id, None)
+
+    async def _recuperar_orfaos(self):
+        """Reenfileira jobs de processos que morreram sem finalizá-los"""
+        self._ultima_recuperacao = time.monotonic()
+        recuperados = await asyncio.to_thread(
+            self.store.recuperar_orfaos, self.intervalo_heartbeat * 4
+        )
+        if recuperados:
+            logger.warning(
+                "Jobs interrompidos voltaram para a fila", extra={"jobs": recuperados}
+            )
+
+    async def _worker(self):
+        while True:
+            job = await asyncio.to_thread(self.store.reivindicar_proximo)
+            if job is None:
+                if (
+                    time.monotonic() - self._ultima_recuperacao
+                    > self.intervalo_heartbeat
+                ):
+                    await self._recuperar_orfaos()
+                self._novo_job.clear()
+                try:
+                    await asyncio.wait_for(self._novo_job.wait(), self.intervalo_busca)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._executar(job)
+
+    async def _executar(self, job: Dict[str, Any]):
+        # Logs do job saem com o id dele como id de correlação
+        token = ID_REQUISICAO.set(f"job-{job['id']}")
+        heartbeat = asyncio.ensure_future(self._manter_heartbeat(job["id"]))
+        try:
+            resultado = await self.handlers[job["tipo"]](job["params"])
+            await asyncio.to_thread(self.store.concluir, job["id"], resultado)
+        except AdiarJob as e:
+            logger.info("Job adiado", extra={"job": job["id"], "motivo": str(e)})
+            await asyncio.to_thread(
+                self.store.adiar, job["id"], time.time() + e.segundos, str(e)
+            )
+        except asyncio.CancelledError:
+            # Encerrando: grava aqui mesmo, sem outro await que possa ser cancelado
+            self.store.devolver(job["id"])
+            raise
+        except Exception as e:
+            logger.error("Job falhou", extra={"job": job["id"], "erro": str(e)})
+            await asyncio.to_thread(self.store.falhar, job["id"], str(e))
+        finally:
+            heartbeat.cancel()
+            ID_REQUISICAO.reset(token)
+            evento = self._concluidos.pop(job["id"], None)
+            if evento is not None:
+                evento.set()
+
+    async def _manter_heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.intervalo_heartbeat)
+            await asyncio.to_thread(self.store.heartbeat, job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para o endpoint /status"""
+        return {"workers": len(self._tasks), "jobs": self.store.contagem()}
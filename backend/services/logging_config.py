@@ -0,0 +1,185 @@
+import contextvars
+import json
+import logging
+import queue
+import sys
+import uuid
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+
+# Loggers da aplicação seguem LOG_LEVEL; os das bibliotecas ficam em WARNING
+LOGGERS_DA_APP = ("main", "services", "config")
+FORMATOS = ("json", "texto")
+
+# Id de correlação da requisição (ou job) em andamento; "-" fora delas
+ID_REQUISICAO: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "id_requisicao", default="-"
+)
+
+# Atributos que todo LogRecord tem: o resto veio em extra={...}
+_ATRIBUTOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "id_requisicao",
+}
+_formatador_erros = logging.Formatter()
+_listener: Optional[QueueListener] = None
+
+
+def novo_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def _campos_extras(record: logging.LogRecord) -> dict:
+    return {
+        chave: valor
+        for chave, valor in vars(record).items()
+        if chave not in _ATRIBUTOS_PADRAO
+    }
+
+
+def _horario(record: logging.LogRecord) -> str:
+    return datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds")
+
+
+class FormatoJSON(logging.Formatter):
+    """Uma linha JSON por registro, com os campos passados em extra={...}"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        linha = {
+            "ts": _horario(record),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "id_requisicao": getattr(record, "id_requisicao", "-"),
+            **_campos_extras(record),
+        }
+        if record.exc_text:
+            linha["erro"] = record.exc_text
+        return json.dumps(linha, default=str, ensure_ascii=False)
+
+
+class FormatoTexto(logging.Formatter):
+    """Uma linha legível por registro; os campos de extra saem como chave=valor"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        campos = " ".join(f"{k}={v}" for k, v in _campos_extras(record).items())
+        linha = (
+            f"{_horario(record)} {record.levelname:<7}"
+            f" [{getattr(record, 'id_requisicao', '-')}] {record.name}:"
+            f" {record.getMessage()}"
+        )
+        if campos:
+            linha += f" {campos}"
+        if record.exc_text:
+            linha += f"\n{record.exc_text}"
+        return linha
+
+
+class _HandlerFila(QueueHandler):
+    """
+    Handler dos loggers: só enfileira o registro.
+
+    No thread de quem loga ficam apenas o id de correlação (que vive no
+    contexto da requisição) e a mensagem já montada; formatação e escrita
+    acontecem no thread do QueueListener, fora do event loop.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.id_requisicao = ID_REQUISICAO.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _formatador_erros.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configurar_logs(
+    nivel: str = "INFO", formato: str = "json", destino: Optional[TextIO] = None
+) -> QueueListener:
+    """
+    Liga os loggers a uma fila escrita por um thread próprio (QueueListener)
+
+    nivel vale para os loggers da aplicação; formato é "json" ou "texto";
+    destino padrão: stderr. Chamar de novo substitui a configuração anterior.
+    """
+    global _listener
+    if formato not in FORMATOS:
+        raise ValueError(f"LOG_FORMAT inválido: use {', '.join(FORMATOS)}")
+    if not isinstance(logging.getLevelName(nivel.upper()), int):
+        raise ValueError(f"LOG_LEVEL inválido: {nivel}")
+    encerrar_logs()
+    # Os formatos não usam thread, processo nem arquivo/linha de quem logou:
+    # sem esses campos (e sem procurar o chamador na pilha) cada registro
+    # custa quase metade (ver "Optimization" no Logging HOWTO)
+    logging.logThreads = logging.logProcesses = logging.logMultiprocessing = False
+    logging._srcfile = None
+
+    saida = logging.StreamHandler(destino or sys.stderr)
+    saida.setFormatter(FormatoJSON() if formato == "json" else FormatoTexto())
+    fila = queue.SimpleQueue()
+
+    raiz = logging.getLogger()
+    raiz.addHandler(_HandlerFila(fila))
+    raiz.setLevel(logging.WARNING)
+    for nome in LOGGERS_DA_APP:
+        logging.getLogger(nome).setLevel(nivel.upper())
+
+    _listener = QueueListener(fila, saida)
+    _listener.start()
+    return _listener
+
+
+def encerrar_logs():
+    """Escreve o que ainda está na fila e para o thread do listener"""
+    global _listener
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        if isinstance(handler, _HandlerFila):
+            raiz.removeHandler(handler)
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class CorrelacionarRequisicoes:
+    """
+    Middleware ASGI: id de correlação por requisição.
+
+    Usa o X-Request-ID enviado pelo cliente (ou gera um), o deixa em
+    ID_REQUISICAO para todos os logs da requisição - inclusive das tarefas
+    criadas por ela - e o devolve no header X-Request-ID da resposta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _id_do_cliente(scope) -> Optional[str]:
+        for nome, valor in scope["headers"]:
+            if nome == b"x-request-id":
+                valor = valor.decode("latin-1")
+                if 0 < len(valor) <= 64 and valor.isprintable():
+                    return valor
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        id_requisicao = self._id_do_cliente(scope) or novo_id()
+        header = (b"x-request-id", id_requisicao.encode("latin-1"))
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                mensagem["headers"] = [*mensagem.get("headers", ()), header]
+            await send(mensagem)
+
+        token = ID_REQUISICAO.set(id_requisicao)
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            ID_REQUISICAO.reset(token)
@@ -0,0 +1,240 @@
+import math
+import re
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+HASHTAG = re.compile(r"#(\w+)")
+TOP_HASHTAGS = 5
+# Obsoleto: media_curtidas repete media_likes para clientes antigos da API.
+# O código novo lê media_likes; o alias é acrescentado só em _com_aliases
+ALIASES_OBSOLETOS = {"media_curtidas": "media_likes"}
+
+
+def _timestamp(data: Any) -> float:
+    """Data ISO 8601 em segundos desde a época; NaN se ausente/inválida"""
+    try:
+        return datetime.fromisoformat(data).timestamp()
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _com_aliases(metricas: Dict[str, Any]) -> Dict[str, Any]:
+    for alias, chave in ALIASES_OBSOLETOS.items():
+        metricas[alias] = metricas[chave]
+    return metricas
+
+
+def metricas_vazias() -> Dict[str, Any]:
+    """Métricas de um perfil sem posts ou sem seguidores"""
+    return _com_aliases(
+        {
+            "taxa_engajamento": 0,
+            "engajamento_medio": "0%",
+            "media_likes": 0,
+            "media_comentarios": 0,
+            "total_interacoes": 0,
+            "melhor_post": None,
+            "posts_analisados": 0,
+            "razao_video_foto": 0,
+            "posts_semanais": 0,
+            "principais_hashtags": [],
+        }
+    )
+
+
+class PostsColunares:
+    """
+    Posts de N perfis em colunas NumPy, na ordem dos perfis.
+
+    perfil[i] é o índice (na lista de perfis) do dono do post i. Como os
+    posts de cada perfil ficam contíguos, inicio/fim delimitam a fatia de
+    cada perfil e as agregações usam bincount/reduceat em vez de loops.
+    As hashtags ficam achatadas em tag_ids/tag_perfil, com os nomes em
+    nomes_tags (ids na ordem de primeira aparição).
+    """
+
+    def __init__(self, perfis: List[Dict[str, Any]]):
+        posts = [p.get("posts") or [] for p in perfis]
+        contagens = np.fromiter((len(p) for p in posts), dtype=np.int64)
+        planos = [post for lista in posts for post in lista]
+        total = len(planos)
+
+        self.n_perfis = len(perfis)
+        self.contagens = contagens
+        self.fim = np.cumsum(contagens)
+        self.inicio = self.fim - contagens
+        self.perfil = np.repeat(np.arange(self.n_perfis), contagens)
+        self.seguidores = np.fromiter(
+            (p.get("seguidores") or 0 for p in perfis), dtype=np.float64
+        )
+
+        self.likes = np.fromiter(
+            (p.get("likes") or 0 for p in planos), dtype=np.int64, count=total
+        )
+        self.comments = np.fromiter(
+            (p.get("comments") or 0 for p in planos), dtype=np.int64, count=total
+        )
+        self.is_video = np.fromiter(
+            (bool(p.get("is_video")) for p in planos), dtype=bool, count=total
+        )
+        # Segundos desde a época; NaN para datas ausentes/inválidas
+        self.timestamps = np.fromiter(
+            (_timestamp(p.get("date")) for p in planos), dtype=np.float64, count=total
+        )
+        self.urls = [p.get("url", "") for p in planos]
+        self.legendas = [p.get("caption") or "" for p in planos]
+        self._extrair_hashtags(planos)
+
+    def _extrair_hashtags(self, planos: List[Dict[str, Any]]):
+        """Usa o campo "hashtags" do post quando existe e, senão, a legenda"""
+        ids: Dict[str, int] = {}
+        tags: List[int] = []
+        por_post: List[int] = []
+        for post, legenda in zip(planos, self.legendas):
+            lista = post.get("hashtags")
+            if lista is None:
+                lista = HASHTAG.findall(legenda)
+            tags.extend([ids.setdefault(tag, len(ids)) for tag in lista])
+            por_post.append(len(lista))
+        self.tag_ids = np.asarray(tags, dtype=np.int64)
+        self.tag_perfil = np.repeat(self.perfil, np.asarray(por_post, dtype=np.int64))
+        self.nomes_tags = list(ids)
+
+    def resumo_post(self, i: int) -> Dict[str, Any]:
+        """Resumo do i-ésimo post (formato do campo melhor_post)"""
+        return {
+            "likes": int(self.likes[i]),
+            "comments": int(self.comments[i]),
+            "url": self.urls[i],
+            "caption": self.legendas[i][:100],
+        }
+
+
+def _principais_hashtags(colunas: PostsColunares) -> List[List[str]]:
+    """Hashtags mais frequentes por perfil (empates: a que apareceu primeiro)"""
+    resultado: List[List[str]] = [[] for _ in range(colunas.n_perfis)]
+    perfis, tags, nomes = colunas.tag_perfil, colunas.tag_ids, colunas.nomes_tags
+    if not len(tags):
+        return resultado
+
+    # Uma chave por par (perfil, tag): contagem e primeira ocorrência
+    chaves = perfis * len(nomes) + tags
+    unicas, primeira, total = np.unique(chaves, return_index=True, return_counts=True)
+    perfil_da_chave = unicas // len(nomes)
+    ordem = np.lexsort((primeira, -total, perfil_da_chave))
+    perfil_ordenado = perfil_da_chave[ordem]
+
+    # Posição de cada chave dentro do seu perfil, para cortar o top N
+    inicio_grupo = np.flatnonzero(np.r_[True, np.diff(perfil_ordenado) != 0])
+    tamanho_grupo = np.diff(np.r_[inicio_grupo, len(ordem)])
+    posicao = np.arange(len(ordem)) - np.repeat(inicio_grupo, tamanho_grupo)
+
+    for chave in unicas[ordem[posicao < TOP_HASHTAGS]]:
+        resultado[chave // len(nomes)].append(nomes[chave % len(nomes)])
+    return resultado
+
+
+def calcular_metricas_lote(perfis: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Calcula as métricas de vários perfis de uma vez, no esquema unificado"""
+    if not perfis:
+        return []
+    return calcular_metricas_colunas(PostsColunares(perfis))
+
+
+def calcular_metricas_colunas(c: PostsColunares) -> List[Dict[str, Any]]:
+    """Métricas de perfis já convertidos para colunas"""
+    n = c.n_perfis
+
+    interacoes = c.likes + c.comments
+    total_likes = np.bincount(c.perfil, weights=c.likes, minlength=n)
+    total_comments = np.bincount(c.perfil, weights=c.comments, minlength=n)
+    total_videos = np.bincount(c.perfil, weights=c.is_video, minlength=n)
+    total_interacoes = total_likes + total_comments
+
+    validos = (c.contagens > 0) & (c.seguidores > 0)
+    qtd = np.maximum(c.contagens, 1)
+    media_likes = total_likes / qtd
+    media_comentarios = total_comments / qtd
+    taxa = (
+        np.divide(
+            total_interacoes / qtd,
+            c.seguidores,
+            out=np.zeros(n),
+            where=c.seguidores > 0,
+        )
+        * 100
+    )
+
+    # Melhor post: maior interação do perfil (empate: o primeiro, como max())
+    ordem = np.lexsort((-interacoes, c.perfil))
+    melhor = np.full(n, -1)
+    com_posts = c.contagens > 0
+    melhor[com_posts] = ordem[c.inicio[com_posts]]
+
+    # Cadência: posts datados divididos pelas semanas entre o 1º e o último
+    datados = ~np.isnan(c.timestamps)
+    n_datados = np.bincount(c.perfil, weights=datados, minlength=n)
+    ts_min = np.full(n, np.nan)
+    ts_max = np.full(n, np.nan)
+    if len(c.timestamps):
+        inicio = c.inicio[com_posts]
+        ts_min[com_posts] = np.fmin.reduceat(c.timestamps, inicio)
+        ts_max[com_posts] = np.fmax.reduceat(c.timestamps, inicio)
+    semanas = np.maximum(np.nan_to_num(ts_max - ts_min) / (7 * 86400), 1)
+    posts_semanais = n_datados / semanas
+
+    hashtags = _principais_hashtags(c)
+
+    # Listas Python: indexar escalares NumPy no laço custaria mais que o cálculo
+    colunas = zip(
+        validos.tolist(),
+        taxa.tolist(),
+        media_likes.tolist(),
+        media_comentarios.tolist(),
+        total_interacoes.tolist(),
+        melhor.tolist(),
+        c.contagens.tolist(),
+        total_videos.tolist(),
+        posts_semanais.tolist(),
+        hashtags,
+    )
+    resultado = []
+    for (
+        valido,
+        tx,
+        likes,
+        comentarios,
+        inter,
+        mp,
+        qtd_posts,
+        videos,
+        ps,
+        tags,
+    ) in colunas:
+        if not valido:
+            resultado.append(metricas_vazias())
+            continue
+        resultado.append(
+            _com_aliases(
+                {
+                    "taxa_engajamento": round(tx, 2),
+                    "engajamento_medio": f"{tx:.1f}%",
+                    "media_likes": round(likes, 2),
+                    "media_comentarios": round(comentarios, 2),
+                    "total_interacoes": int(inter),
+                    "melhor_post": c.resumo_post(mp),
+                    "posts_analisados": qtd_posts,
+                    "razao_video_foto": videos / qtd_posts,
+                    "posts_semanais": round(ps, 1),
+                    "principais_hashtags": tags,
+                }
+            )
+        )
+    return resultado
+
+
+def calcular_metricas(dados_perfil: Dict[str, Any]) -> Dict[str, Any]:
+    """Métricas de um único perfil (atalho para calcular_metricas_lote)"""
+    return calcular_metricas_lote([dados_perfil])[0]
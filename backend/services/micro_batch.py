@@ -0,0 +1,75 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class MicroLote:
+    """
+    Junta chamadas concorrentes em lotes processados de uma vez.
+
+    Cada submeter() entra no lote aberto e aguarda o próprio resultado. O
+    lote é despachado quando atinge `tamanho` itens ou quando o item mais
+    antigo já esperou `espera` segundos, o que vier primeiro. processar()
+    recebe a lista de itens e devolve os resultados na mesma ordem; se ele
+    falhar, todos os itens do lote recebem a exceção.
+    """
+
+    def __init__(
+        self,
+        processar: Callable[[List[Any]], Awaitable[List[Any]]],
+        tamanho: int = 4,
+        espera: float = 1.0,
+    ):
+        self.processar = processar
+        self.tamanho = tamanho
+        self.espera = espera
+
+        self._pendentes: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.lotes = 0
+        self.itens = 0
+
+    async def submeter(self, item: Any) -> Any:
+        """Adiciona o item ao lote aberto e retorna o seu resultado"""
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._pendentes.append((item, futuro))
+        if len(self._pendentes) >= self.tamanho:
+            self._despachar()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.espera, self._despachar)
+        return await futuro
+
+    def _despachar(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        lote, self._pendentes = self._pendentes, []
+        if not lote:
+            return
+        self.lotes += 1
+        self.itens += len(lote)
+        task = asyncio.ensure_future(self._executar(lote))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _executar(self, lote: List[Tuple[Any, asyncio.Future]]):
+        try:
+            resultados = await self.processar([item for item, _ in lote])
+        except Exception as e:
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+        for (_, futuro), resultado in zip(lote, resultados):
+            if not futuro.done():
+                futuro.set_result(resultado)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para o endpoint /status"""
+        return {
+            "lotes": self.lotes,
+            "itens": self.itens,
+            "media_por_lote": round(self.itens / self.lotes, 2) if self.lotes else 0,
+            "aguardando": len(self._pendentes),
+        }
@@ -1,6 +1,7 @@
 from typing import Dict, Any
 import random
 from datetime import datetime, timedelta
+from services import metrics_engine
 
 
 class MockInstagramService:
@@ -64,49 +65,4 @@ class MockInstagramService:
         """
         Calcula métricas baseadas nos dados mock
         """
-        posts = dados_perfil.get("posts", [])
-        seguidores = dados_perfil.get("seguidores", 0)
-
-        if not posts or seguidores == 0:
-            return {
-                "engajamento_medio": "0%",
-                "posts_semanais": 0,
-                "principais_hashtags": [],
-                "media_curtidas": 0,
-                "media_comentarios": 0,
-                "taxa_engajamento": 0,
-            }
-
-        # Calcular métricas
-        total_curtidas = sum(post.get("likes", 0) for post in posts)
-        total_comentarios = sum(post.get("comments", 0) for post in posts)
-        total_engajamento = total_curtidas + total_comentarios
-
-        media_curtidas = total_curtidas / len(posts)
-        media_comentarios = total_comentarios / len(posts)
-        engajamento_medio = (total_engajamento / len(posts)) / seguidores * 100
-
-        # Simular frequência de posts
-        posts_semanais = random.uniform(2, 7)
-
-        # Hashtags mais usadas
-        todas_hashtags = []
-        for post in posts:
-            todas_hashtags.extend(post.get("hashtags", []))
-
-        contador_hashtags = {}
-        for hashtag in todas_hashtags:
-            contador_hashtags[hashtag] = contador_hashtags.get(hashtag, 0) + 1
-
-        principais_hashtags = sorted(
-            contador_hashtags.items(), key=lambda x: x[1], reverse=True
-        )[:5]
-
-        return {
-            "engajamento_medio": f"{engajamento_medio:.1f}%",
-            "posts_semanais": round(posts_semanais, 1),
-            "principais_hashtags": [tag[0] for tag in principais_hashtags],
-            "media_curtidas": round(media_curtidas, 0),
-            "media_comentarios": round(media_comentarios, 0),
-            "taxa_engajamento": round(engajamento_medio, 2),
-        }
+        return metrics_engine.calcular_metricas(dados_perfil)
@@ -0,0 +1,271 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Campos com atributo próprio; os demais vão para "extras" e voltam no to_dict().
+# Campos próprios ausentes no dict de origem ficam em "ausentes" e também não
+# aparecem no to_dict(), para a ida e volta não mudar o JSON da API
+CAMPOS_POST = ("likes", "comments", "caption", "date", "is_video", "url")
+CAMPOS_PERFIL = (
+    "username",
+    "nome_completo",
+    "biografia",
+    "seguidores",
+    "seguindo",
+    "total_posts",
+    "foto_perfil",
+)
+CAMPOS_ANALISE = ("perfil", "metricas", "relatorio_ia", "status", "data_source")
+
+
+def _coluna_texto(valores: List[Optional[str]]) -> np.ndarray:
+    """Textos curtos (datas, URLs) como bytes UTF-8 de largura fixa; None vira b''"""
+    return np.array([(v or "").encode("utf-8") for v in valores], dtype=np.bytes_)
+
+
+def _extras(dados: Dict[str, Any], campos: tuple) -> Optional[Dict[str, Any]]:
+    extras = {k: v for k, v in dados.items() if k not in campos}
+    return extras or None
+
+
+def _ausentes(dados: Dict[str, Any], campos: tuple) -> Optional[Tuple[str, ...]]:
+    ausentes = tuple(campo for campo in campos if campo not in dados)
+    return ausentes or None
+
+
+def _completar(
+    dados: Dict[str, Any],
+    extras: Optional[Dict[str, Any]],
+    ausentes: Optional[Tuple[str, ...]],
+) -> Dict[str, Any]:
+    """Acrescenta os extras e remove os campos que a origem não tinha"""
+    if extras:
+        dados.update(extras)
+    for campo in ausentes or ():
+        del dados[campo]
+    return dados
+
+
+@dataclass(slots=True)
+class Post:
+    """Um post do Instagram; to_dict() devolve o formato JSON usado na API"""
+
+    likes: int = 0
+    comments: int = 0
+    caption: str = ""
+    date: Optional[str] = None
+    is_video: bool = False
+    url: str = ""
+    extras: Optional[Dict[str, Any]] = None
+    ausentes: Optional[Tuple[str, ...]] = None
+
+    @classmethod
+    def from_dict(cls, dados: Dict[str, Any]) -> "Post":
+        return cls(
+            likes=dados.get("likes", 0),
+            comments=dados.get("comments", 0),
+            caption=dados.get("caption", ""),
+            date=dados.get("date"),
+            is_video=dados.get("is_video", False),
+            url=dados.get("url", ""),
+            extras=_extras(dados, CAMPOS_POST),
+            ausentes=_ausentes(dados, CAMPOS_POST),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        dados = {
+            "likes": self.likes,
+            "comments": self.comments,
+            "caption": self.caption,
+            "date": self.date,
+            "is_video": self.is_video,
+            "url": self.url,
+        }
+        return _completar(dados, self.extras, self.ausentes)
+
+
+class PostColumns:
+    """
+    Lista de posts guardada em colunas.
+
+    Números e flags ficam em arrays NumPy, datas e URLs (curtas, quase sempre
+    do mesmo tamanho) em arrays de bytes e só as legendas em lista. Isso evita
+    um dict e um objeto Python por campo em cada post, que é o grosso da
+    memória de um perfil em cache. Campos extras (ex.: "id", "hashtags" dos
+    dados mock) ficam numa lista esparsa, None para posts sem extras; o
+    mesmo vale para os campos ausentes.
+    """
+
+    __slots__ = (
+        "likes",
+        "comments",
+        "is_video",
+        "captions",
+        "dates",
+        "urls",
+        "extras",
+        "ausentes",
+    )
+
+    def __init__(
+        self,
+        likes: np.ndarray,
+        comments: np.ndarray,
+        is_video: np.ndarray,
+        captions: List[str],
+        dates: np.ndarray,
+        urls: np.ndarray,
+        extras: Optional[List[Optional[Dict[str, Any]]]] = None,
+        ausentes: Optional[List[Optional[Tuple[str, ...]]]] = None,
+    ):
+        self.likes = likes
+        self.comments = comments
+        self.is_video = is_video
+        self.captions = captions
+        self.dates = dates
+        self.urls = urls
+        self.extras = extras
+        self.ausentes = ausentes
+
+    @classmethod
+    def from_list(cls, posts: List[Dict[str, Any]]) -> "PostColumns":
+        n = len(posts)
+        extras = [_extras(p, CAMPOS_POST) for p in posts]
+        ausentes = [_ausentes(p, CAMPOS_POST) for p in posts]
+        return cls(
+            likes=np.fromiter((p.get("likes") or 0 for p in posts), np.int64, n),
+            comments=np.fromiter((p.get("comments") or 0 for p in posts), np.int64, n),
+            is_video=np.fromiter((bool(p.get("is_video")) for p in posts), bool, n),
+            captions=[p.get("caption", "") for p in posts],
+            dates=_coluna_texto([p.get("date") for p in posts]),
+            urls=_coluna_texto([p.get("url") for p in posts]),
+            extras=extras if any(extras) else None,
+            ausentes=ausentes if any(ausentes) else None,
+        )
+
+    def __len__(self) -> int:
+        return len(self.captions)
+
+    def __getitem__(self, i: int) -> Post:
+        return Post(
+            likes=int(self.likes[i]),
+            comments=int(self.comments[i]),
+            caption=self.captions[i],
+            date=self.dates[i].decode("utf-8") or None,
+            is_video=bool(self.is_video[i]),
+            url=self.urls[i].decode("utf-8"),
+            extras=self.extras[i] if self.extras else None,
+            ausentes=self.ausentes[i] if self.ausentes else None,
+        )
+
+    def __iter__(self) -> Iterator[Post]:
+        return (self[i] for i in range(len(self)))
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Posts no formato JSON da API (uma lista de dicts novos)"""
+        colunas = zip(
+            self.likes.tolist(),
+            self.comments.tolist(),
+            self.captions,
+            self.dates.tolist(),
+            self.is_video.tolist(),
+            self.urls.tolist(),
+            self.extras or [None] * len(self),
+            self.ausentes or [None] * len(self),
+        )
+        posts = []
+        for likes, comments, caption, date, is_video, url, extras, ausentes in colunas:
+            post = {
+                "likes": likes,
+                "comments": comments,
+                "caption": caption,
+                "date": date.decode("utf-8") or None,
+                "is_video": is_video,
+                "url": url.decode("utf-8"),
+            }
+            posts.append(_completar(post, extras, ausentes))
+        return posts
+
+
+@dataclass(slots=True)
+class Profile:
+    """Perfil coletado, com os posts em PostColumns"""
+
+    username: str
+    nome_completo: str = ""
+    biografia: str = ""
+    seguidores: int = 0
+    seguindo: int = 0
+    total_posts: int = 0
+    foto_perfil: Optional[str] = None
+    posts: PostColumns = field(default_factory=lambda: PostColumns.from_list([]))
+    extras: Optional[Dict[str, Any]] = None
+    ausentes: Optional[Tuple[str, ...]] = None
+
+    @classmethod
+    def from_dict(cls, dados: Dict[str, Any]) -> "Profile":
+        return cls(
+            username=dados.get("username", ""),
+            nome_completo=dados.get("nome_completo", ""),
+            biografia=dados.get("biografia", ""),
+            seguidores=dados.get("seguidores", 0),
+            seguindo=dados.get("seguindo", 0),
+            total_posts=dados.get("total_posts", 0),
+            foto_perfil=dados.get("foto_perfil"),
+            posts=PostColumns.from_list(dados.get("posts") or []),
+            extras=_extras(dados, CAMPOS_PERFIL + ("posts",)),
+            ausentes=_ausentes(dados, CAMPOS_PERFIL + ("posts",)),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        dados = {
+            "username": self.username,
+            "nome_completo": self.nome_completo,
+            "biografia": self.biografia,
+            "seguidores": self.seguidores,
+            "seguindo": self.seguindo,
+            "total_posts": self.total_posts,
+            "foto_perfil": self.foto_perfil,
+            "posts": self.posts.to_list(),
+        }
+        return _completar(dados, self.extras, self.ausentes)
+
+
+@dataclass(slots=True)
+class Analise:
+    """Resposta de /analisar guardada no cache em memória"""
+
+    perfil: str
+    dados: Profile
+    metricas: Dict[str, Any]
+    relatorio_ia: Dict[str, Any]
+    status: str = "success"
+    data_source: str = ""
+    extras: Optional[Dict[str, Any]] = None
+    ausentes: Optional[Tuple[str, ...]] = None
+
+    @classmethod
+    def from_dict(cls, resposta: Dict[str, Any]) -> "Analise":
+        return cls(
+            perfil=resposta.get("perfil", ""),
+            dados=Profile.from_dict(resposta.get("dados") or {}),
+            metricas=resposta.get("metricas") or {},
+            relatorio_ia=resposta.get("relatorio_ia") or {},
+            status=resposta.get("status", "success"),
+            data_source=resposta.get("data_source", ""),
+            extras=_extras(resposta, CAMPOS_ANALISE + ("dados",)),
+            ausentes=_ausentes(resposta, CAMPOS_ANALISE + ("dados",)),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Cópia nova no formato JSON: quem recebe pode alterá-la à vontade"""
+        resposta = {
+            "perfil": self.perfil,
+            "dados": self.dados.to_dict(),
+            "metricas": dict(self.metricas),
+            "relatorio_ia": dict(self.relatorio_ia),
+            "status": self.status,
+            "data_source": self.data_source,
+        }
+        return _completar(resposta, self.extras, self.ausentes)
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+
+def abrir_conexao(caminho: str) -> sqlite3.Connection:
+    """Abre uma conexão SQLite em modo WAL, pronta para acesso multi-processo"""
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    conn = sqlite3.connect(caminho, timeout=5.0, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+class SQLiteCache:
+    """
+    Cache persistente em SQLite, compartilhado entre reinícios e workers.
+
+    O banco roda em modo WAL (leitores não bloqueiam o escritor) com
+    busy_timeout para serializar escritas concorrentes de vários processos.
+    As chaves são prefixadas por namespace e versão, de modo que mudar o
+    formato do valor basta incrementar a versão para ignorar entradas antigas.
+
+    No event loop, grave com set_async: uma escrita pode esperar até o
+    busy_timeout pelo lock de outro processo. Leituras não esperam (no WAL
+    o leitor vê o último commit, mesmo com uma escrita em andamento).
+    """
+
+    PRUNE_EVERY = 100  # escritas entre verificações do limite de entradas
+
+    def __init__(
+        self,
+        caminho: str,
+        namespace: str,
+        ttl_seconds: float,
+        max_entries: Optional[int] = None,
+        versao: int = 1,
+    ):
+        self.caminho = caminho
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.versao = versao
+        self._local = threading.local()
+        self._escritas = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        self._criar_tabela()
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Uma conexão por thread (sqlite3 não compartilha conexões entre threads)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = abrir_conexao(self.caminho)
+            self._local.conn = conn
+        return conn
+
+    def _criar_tabela(self):
+        conn = self._conexao()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                chave TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                valor TEXT NOT NULL,
+                criado_em REAL NOT NULL,
+                expira_em REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_ns ON cache (namespace, criado_em)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_exp ON cache (expira_em)")
+
+    def _chave(self, chave: str) -> str:
+        return f"{self.namespace}:v{self.versao}:{chave}"
+
+    def __contains__(self, chave: str) -> bool:
+        """Verifica presença de entrada válida sem alterar contadores"""
+        conn = self._conexao()
+        row = conn.execute(
+            "SELECT 1 FROM cache WHERE chave = ? AND expira_em > ?",
+            (self._chave(chave), time.time()),
+        ).fetchone()
+        return row is not None
+
+    def get_entry(self, chave: str) -> Optional[Tuple[Any, datetime]]:
+        """Retorna (valor, criado_em) ou None se ausente/expirado"""
+        conn = self._conexao()
+        row = conn.execute(
+            "SELECT valor, criado_em FROM cache WHERE chave = ? AND expira_em > ?",
+            (self._chave(chave), time.time()),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0]), datetime.fromtimestamp(row[1])
+
+    def get(self, chave: str) -> Optional[Any]:
+        """Retorna o valor ou None se ausente/expirado"""
+        entrada = self.get_entry(chave)
+        return entrada[0] if entrada else None
+
+    def set(self, chave: str, valor: Any):
+        """Grava (ou substitui) uma entrada com o TTL configurado"""
+        agora = time.time()
+        self._conexao().execute(
+            "INSERT OR REPLACE INTO cache (chave, namespace, valor, criado_em, expira_em)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (
+                self._chave(chave),
+                self.namespace,
+                json.dumps(valor, default=str, ensure_ascii=False),
+                agora,
+                agora + self.ttl_seconds,
+            ),
+        )
+
+        self._escritas += 1
+        if self.max_entries and self._escritas % self.PRUNE_EVERY == 0:
+            self._aplicar_limite()
+
+    async def set_async(self, chave: str, valor: Any):
+        """set() num thread, fora do event loop"""
+        await asyncio.to_thread(self.set, chave, valor)
+
+    def delete(self, chave: str):
+        """Remove uma entrada"""
+        self._conexao().execute(
+            "DELETE FROM cache WHERE chave = ?", (self._chave(chave),)
+        )
+
+    def _aplicar_limite(self):
+        """Remove as entradas mais antigas do namespace acima de max_entries"""
+        self._conexao().execute(
+            """
+            DELETE FROM cache WHERE chave IN (
+                SELECT chave FROM cache WHERE namespace = ?
+                ORDER BY criado_em DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.namespace, self.max_entries),
+        )
+
+    def purge_expired(self) -> int:
+        """Remove entradas expiradas (de qualquer namespace)"""
+        cursor = self._conexao().execute(
+            "DELETE FROM cache WHERE expira_em <= ?", (time.time(),)
+        )
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        conn = self._conexao()
+        row = conn.execute(
+            "SELECT COUNT(*) FROM cache WHERE namespace = ? AND expira_em > ?",
+            (self.namespace, time.time()),
+        ).fetchone()
+        return row[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para o endpoint /status (hits/misses são deste processo)"""
+        consultas = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "caminho": self.caminho,
+            "namespace": self.namespace,
+            "versao": self.versao,
+            "entradas": len(self),
+            "max_entradas": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / consultas, 4) if consultas else 0.0,
+        }
@@ -0,0 +1,193 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, NamedTuple, Sequence, Tuple
+
+from services.persistent_cache import abrir_conexao
+
+CAMPOS = ("tokens", "atualizado", "bloqueado_ate", "expoente")
+
+
+class Balde(NamedTuple):
+    tokens: float
+    bloqueado_ate: float  # timestamp; 0 sem bloqueio
+    expoente: int  # rate limits seguidos desde o último sucesso
+
+
+class EstadoLimite:
+    """
+    Estado do orçamento de requisições: tokens, bloqueio e backoff.
+
+    Cada operação de escrita lê, atualiza e grava o estado numa única
+    transação; ler() só consulta. Esta versão fica em memória (um processo);
+    EstadoLimiteSQLite guarda o mesmo estado num arquivo compartilhado por
+    todos os workers.
+    """
+
+    # Se as escritas podem esperar por outro processo (o agendador as roda
+    # fora do event loop)
+    em_disco = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._linha: Dict[str, Any] = {}
+
+    def _ler_linha(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._linha)
+
+    @contextmanager
+    def _transacao(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            linha = dict(self._linha)
+            yield linha
+            self._linha = linha
+
+    @staticmethod
+    def _reabastecer(linha: Dict[str, Any], taxa: float, capacidade: float, agora):
+        if not linha:
+            linha.update(
+                tokens=float(capacidade),
+                atualizado=agora,
+                bloqueado_ate=0.0,
+                expoente=0,
+            )
+        elif agora > linha["atualizado"]:
+            linha["tokens"] = min(
+                float(capacidade),
+                linha["tokens"] + (agora - linha["atualizado"]) * taxa,
+            )
+            linha["atualizado"] = agora
+
+    def ler(self, taxa: float, capacidade: float, agora: float) -> Balde:
+        """Estado atual, com os tokens acumulados até agora (sem gravar nada)"""
+        linha = self._ler_linha()
+        self._reabastecer(linha, taxa, capacidade, agora)
+        return Balde(linha["tokens"], linha["bloqueado_ate"], linha["expoente"])
+
+    def consumir(
+        self, custo: float, taxa: float, capacidade: float, agora: float
+    ) -> Tuple[bool, Balde]:
+        """Consome `custo` tokens se houver e não houver bloqueio"""
+        atendidas, balde = self.consumir_lote([custo], taxa, capacidade, agora)
+        return atendidas == 1, balde
+
+    def consumir_lote(
+        self, custos: Sequence[float], taxa: float, capacidade: float, agora: float
+    ) -> Tuple[int, Balde]:
+        """
+        Consome os custos em ordem numa só transação, parando no primeiro que
+        não couber. Retorna (quantos foram consumidos, estado final).
+        """
+        with self._transacao() as linha:
+            self._reabastecer(linha, taxa, capacidade, agora)
+            atendidas = 0
+            if agora >= linha["bloqueado_ate"]:
+                for custo in custos:
+                    if linha["tokens"] < custo:
+                        break
+                    linha["tokens"] -= custo
+                    atendidas += 1
+            balde = Balde(linha["tokens"], linha["bloqueado_ate"], linha["expoente"])
+            return atendidas, balde
+
+    def devolver(self, custo: float, taxa: float, capacidade: float, agora: float):
+        """Devolve tokens consumidos por uma requisição que não aconteceu"""
+        with self._transacao() as linha:
+            self._reabastecer(linha, taxa, capacidade, agora)
+            linha["tokens"] = min(float(capacidade), linha["tokens"] + custo)
+
+    def bloquear(self, ate: float, taxa: float, capacidade: float, agora: float):
+        """Bloqueia até o timestamp (um bloqueio maior já ativo prevalece)"""
+        with self._transacao() as linha:
+            self._reabastecer(linha, taxa, capacidade, agora)
+            linha["bloqueado_ate"] = max(linha["bloqueado_ate"], ate)
+
+    def registrar_rate_limit(
+        self,
+        minimo: float,
+        base: float,
+        maximo: float,
+        taxa: float,
+        capacidade: float,
+        agora: float,
+    ) -> Tuple[float, int]:
+        """
+        Conta mais um rate limit e bloqueia por base * 2^(expoente - 1)
+        segundos (entre minimo e maximo). Retorna (espera, expoente).
+        """
+        with self._transacao() as linha:
+            self._reabastecer(linha, taxa, capacidade, agora)
+            linha["expoente"] += 1
+            espera = max(minimo, min(base * 2 ** (linha["expoente"] - 1), maximo))
+            linha["bloqueado_ate"] = max(linha["bloqueado_ate"], agora + espera)
+            return linha["bloqueado_ate"] - agora, linha["expoente"]
+
+    def zerar_backoff(self):
+        """Uma requisição bem-sucedida encerra a sequência de rate limits"""
+        # Quase sempre já está zerado: só abre transação se houver o que zerar
+        if not self._ler_linha().get("expoente"):
+            return
+        with self._transacao() as linha:
+            if linha.get("expoente"):
+                linha["expoente"] = 0
+
+
+class EstadoLimiteSQLite(EstadoLimite):
+    """
+    Estado do orçamento compartilhado entre processos via SQLite.
+
+    Cada escrita roda numa transação IMMEDIATE: um worker por vez lê e
+    grava a linha, então tokens, bloqueio e contadores de backoff valem
+    para todos os workers que apontam para o mesmo arquivo. ler() é um
+    SELECT simples (em WAL, não espera pelos escritores).
+    """
+
+    em_disco = True
+
+    def __init__(self, caminho: str, nome: str = "instagram"):
+        self.caminho = caminho
+        self.nome = nome
+        self._local = threading.local()
+        self._conexao().execute(
+            """
+            CREATE TABLE IF NOT EXISTS limites (
+                nome TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                atualizado REAL NOT NULL,
+                bloqueado_ate REAL NOT NULL,
+                expoente INTEGER NOT NULL
+            )
+            """
+        )
+
+    def _conexao(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = abrir_conexao(self.caminho)
+            self._local.conn = conn
+        return conn
+
+    def _ler_linha(self) -> Dict[str, Any]:
+        cursor = self._conexao().execute(
+            f"SELECT {', '.join(CAMPOS)} FROM limites WHERE nome = ?", (self.nome,)
+        )
+        row = cursor.fetchone()
+        return dict(zip(CAMPOS, row)) if row else {}
+
+    @contextmanager
+    def _transacao(self) -> Iterator[Dict[str, Any]]:
+        conn = self._conexao()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            linha = self._ler_linha()
+            yield linha
+            if linha:
+                conn.execute(
+                    "INSERT OR REPLACE INTO limites (nome, tokens, atualizado,"
+                    " bloqueado_ate, expoente) VALUES (?, ?, ?, ?, ?)",
+                    (self.nome, *(linha[campo] for campo in CAMPOS)),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
@@ -0,0 +1,105 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+SEM_ANALISE = "Análise não disponível"
+
+# Seções do relatório e palavras que abrem cada uma, na ordem de prioridade
+SECOES = [
+    ("resumo_negocio", ["resumo", "negócio", "business"]),
+    ("pontos_fortes", ["fortes", "strengths", "pontos fortes"]),
+    ("pontos_fracos", ["fracos", "weaknesses", "pontos fracos"]),
+    ("oportunidades", ["oportunidades", "opportunities"]),
+    ("sugestao_prospeccao", ["prospecção", "prospecting", "abordagem"]),
+]
+NOMES_SECOES = [secao for secao, _ in SECOES]
+
+# Filtro único para descartar de uma vez as linhas de conteúdo (a maioria)
+_QUALQUER_CABECALHO = re.compile(
+    "|".join(re.escape(p) for _, palavras in SECOES for p in palavras)
+)
+
+
+def _secao_do_cabecalho(linha: str) -> Optional[str]:
+    """Seção aberta pela linha, ou None se ela for conteúdo"""
+    minuscula = linha.lower()
+    if not _QUALQUER_CABECALHO.search(minuscula):
+        return None
+    for secao, palavras in SECOES:
+        if any(palavra in minuscula for palavra in palavras):
+            return secao
+    return None
+
+
+class ParserSecoes:
+    """
+    Separa o texto do relatório em seções à medida que ele chega.
+
+    alimentar() recebe trechos arbitrários (tokens do streaming) e devolve as
+    seções que ficaram completas: uma seção fecha quando aparece o cabeçalho
+    da próxima. finalizar() fecha a última e completa as que não vieram com
+    SEM_ANALISE. Uma seção repetida é emitida de novo e substitui a anterior.
+    """
+
+    def __init__(self):
+        self.secoes: Dict[str, str] = {secao: SEM_ANALISE for secao in NOMES_SECOES}
+        self._emitidas = set()
+        self._pendente = ""
+        self._secao_atual: Optional[str] = None
+        self._conteudo: List[str] = []
+
+    def alimentar(self, trecho: str) -> List[Tuple[str, str]]:
+        """Processa um trecho e retorna as seções concluídas por ele"""
+        *linhas, self._pendente = (self._pendente + trecho).split("\n")
+        concluidas = []
+        for linha in linhas:
+            concluida = self._processar_linha(linha)
+            if concluida:
+                concluidas.append(concluida)
+        return concluidas
+
+    def finalizar(self) -> List[Tuple[str, str]]:
+        """Fecha a seção em aberto e emite as que não apareceram"""
+        concluidas = []
+        if self._pendente:
+            concluida = self._processar_linha(self._pendente)
+            self._pendente = ""
+            if concluida:
+                concluidas.append(concluida)
+        concluida = self._fechar_secao()
+        if concluida:
+            concluidas.append(concluida)
+        for secao in NOMES_SECOES:
+            if secao not in self._emitidas:
+                self._emitidas.add(secao)
+                concluidas.append((secao, self.secoes[secao]))
+        return concluidas
+
+    def _processar_linha(self, linha: str) -> Optional[Tuple[str, str]]:
+        linha = linha.strip()
+        if not linha:
+            return None
+        secao = _secao_do_cabecalho(linha)
+        if secao is None:
+            if self._secao_atual:
+                self._conteudo.append(linha)
+            return None
+        concluida = self._fechar_secao()
+        self._secao_atual = secao
+        self._conteudo = [linha]
+        return concluida
+
+    def _fechar_secao(self) -> Optional[Tuple[str, str]]:
+        if not self._secao_atual:
+            return None
+        texto = "\n".join(self._conteudo)
+        self.secoes[self._secao_atual] = texto
+        self._emitidas.add(self._secao_atual)
+        return self._secao_atual, texto
+
+
+def extrair_secoes(relatorio: str) -> Dict[str, str]:
+    """Seções de um relatório já completo"""
+    parser = ParserSecoes()
+    parser.alimentar(relatorio)
+    parser.finalizar()
+    return parser.secoes
@@ -11,65 +11,170 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+import asyncio
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import requests
 from io import BytesIO
+from config import Config
+from services import report_templates as templates
+from services.cache import TTLCache
+from services.single_flight import SingleFlight
+from services.telemetry import ETAPAS
+
+# Incrementar ao mudar o layout: invalida os PDFs já cacheados
+TEMPLATE_VERSION = 2
+
+
+def _data_da_coleta(dados_perfil: Dict[str, Any]) -> Optional[str]:
+    try:
+        coletado_em = datetime.fromisoformat(dados_perfil["coletado_em"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return coletado_em.strftime("%d/%m/%Y %H:%M")
+
+
+# Instância reaproveitada dentro de cada processo do pool de renderização
+_servico_do_processo = None
+
+
+def renderizar_pdf_bytes(
+    username: str,
+    dados_perfil: Dict[str, Any],
+    metricas: Dict[str, Any],
+    relatorio_ia: Dict[str, str],
+) -> bytes:
+    """Ponto de entrada dos processos do pool: renderiza o PDF em memória"""
+    global _servico_do_processo
+    if _servico_do_processo is None:
+        _servico_do_processo = ReportService()
+    return _servico_do_processo.renderizar_pdf(
+        username, dados_perfil, metricas, relatorio_ia
+    )
 
 
 class ReportService:
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._criar_estilos_personalizados()
-
-    def _criar_estilos_personalizados(self):
-        """Cria estilos personalizados para o relatório"""
-        # Título principal
-        self.styles.add(
-            ParagraphStyle(
-                name="TituloPrincipal",
-                parent=self.styles["Heading1"],
-                fontSize=24,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                textColor=colors.HexColor("#1DA1F2"),
-            )
+    def __init__(
+        self,
+        reports_dir: Optional[str] = None,
+        max_workers: int = Config.PDF_WORKERS,
+    ):
+        self.styles = templates.ESTILOS
+        self.reports_dir = reports_dir or Config.PDF_REPORTS_DIR
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        # PDFs renderizados, endereçados pelo hash das entradas
+        self.pdf_cache = TTLCache(
+            max_entries=Config.PDF_CACHE_MAX_ENTRIES,
+            ttl_seconds=Config.PDF_CACHE_TTL_HOURS * 3600,
+            max_weight=Config.PDF_CACHE_MAX_MB * 1024 * 1024,
+            peso=len,
         )
+        self._renderizacoes = SingleFlight()
 
-        # Subtítulo
-        self.styles.add(
-            ParagraphStyle(
-                name="Subtitulo",
-                parent=self.styles["Heading2"],
-                fontSize=16,
-                spaceAfter=20,
-                textColor=colors.HexColor("#333333"),
-            )
+    @staticmethod
+    def chave_conteudo(
+        username: str,
+        dados_perfil: Dict[str, Any],
+        metricas: Dict[str, Any],
+        relatorio_ia: Dict[str, str],
+    ) -> str:
+        """Hash SHA-256 das entradas do PDF (e da versão do template)"""
+        payload = json.dumps(
+            [TEMPLATE_VERSION, username, dados_perfil, metricas, relatorio_ia],
+            sort_keys=True,
+            default=str,
+            ensure_ascii=False,
         )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-        # Texto normal
-        self.styles.add(
-            ParagraphStyle(
-                name="TextoNormal",
-                parent=self.styles["Normal"],
-                fontSize=11,
-                spaceAfter=12,
-                alignment=TA_LEFT,
-            )
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Pool de processos criado sob demanda (layout do ReportLab é CPU-bound)"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def close(self):
+        """Encerra o pool de renderização"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    async def gerar_pdf_async(
+        self,
+        username: str,
+        dados_perfil: Dict[str, Any],
+        metricas: Dict[str, Any],
+        relatorio_ia: Dict[str, str],
+    ) -> bytes:
+        """Renderiza o PDF num processo separado, sem bloquear o event loop"""
+        chave = self.chave_conteudo(username, dados_perfil, metricas, relatorio_ia)
+        conteudo = self.pdf_cache.get(chave)
+        if conteudo is not None:
+            return conteudo
+
+        async def renderizar() -> bytes:
+            loop = asyncio.get_running_loop()
+            with ETAPAS.medir("pdf"):
+                resultado = await loop.run_in_executor(
+                    self._get_pool(),
+                    renderizar_pdf_bytes,
+                    username,
+                    dados_perfil,
+                    metricas,
+                    relatorio_ia,
+                )
+            self.pdf_cache.set(chave, resultado)
+            return resultado
+
+        # Pedidos simultâneos do mesmo conteúdo compartilham uma renderização
+        return await self._renderizacoes.do(chave, renderizar)
+
+    def salvar_pdf(self, username: str, conteudo: bytes) -> str:
+        """Grava o PDF em reports_dir e aplica a política de retenção"""
+        os.makedirs(self.reports_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(
+            self.reports_dir, f"relatorio_{username}_{timestamp}.pdf"
         )
+        with open(filepath, "wb") as f:
+            f.write(conteudo)
+        self.limpar_relatorios()
+        return filepath
 
-        # Destaque
-        self.styles.add(
-            ParagraphStyle(
-                name="Destaque",
-                parent=self.styles["Normal"],
-                fontSize=12,
-                spaceAfter=12,
-                textColor=colors.HexColor("#1DA1F2"),
-                fontName="Helvetica-Bold",
-            )
+    def limpar_relatorios(
+        self,
+        max_idade_horas: float = Config.PDF_RETENTION_HOURS,
+        max_arquivos: int = Config.PDF_MAX_FILES,
+    ) -> List[str]:
+        """Remove PDFs mais antigos que a retenção ou além do limite de arquivos"""
+        if not os.path.isdir(self.reports_dir):
+            return []
+
+        arquivos = sorted(
+            (
+                os.path.join(self.reports_dir, nome)
+                for nome in os.listdir(self.reports_dir)
+                if nome.endswith(".pdf")
+            ),
+            key=os.path.getmtime,
+            reverse=True,
         )
+        limite_idade = time.time() - max_idade_horas * 3600
+        removidos = [
+            caminho
+            for i, caminho in enumerate(arquivos)
+            if i >= max_arquivos or os.path.getmtime(caminho) < limite_idade
+        ]
+        for caminho in removidos:
+            os.remove(caminho)
+        return removidos
 
     def gerar_pdf(
         self,
@@ -79,46 +184,59 @@ class ReportService:
         relatorio_ia: Dict[str, str],
     ) -> str:
         """
-        Gera um relatório PDF completo
+        Gera um relatório PDF completo e salva em reports_dir
         """
-        # Criar diretório se não existir
-        os.makedirs("reports", exist_ok=True)
+        chave = self.chave_conteudo(username, dados_perfil, metricas, relatorio_ia)
+        conteudo = self.pdf_cache.get(chave)
+        if conteudo is None:
+            conteudo = self.renderizar_pdf(
+                username, dados_perfil, metricas, relatorio_ia
+            )
+            self.pdf_cache.set(chave, conteudo)
+        return self.salvar_pdf(username, conteudo)
 
-        # Nome do arquivo
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"relatorio_{username}_{timestamp}.pdf"
-        filepath = os.path.join("reports", filename)
+    def renderizar_pdf(
+        self,
+        username: str,
+        dados_perfil: Dict[str, Any],
+        metricas: Dict[str, Any],
+        relatorio_ia: Dict[str, str],
+    ) -> bytes:
+        """
+        Renderiza o relatório PDF em memória e retorna os bytes
+        """
+        buffer = BytesIO()
 
         # Criar documento PDF
         doc = SimpleDocTemplate(
-            filepath,
+            buffer,
             pagesize=A4,
             rightMargin=72,
             leftMargin=72,
             topMargin=72,
             bottomMargin=18,
+            # Sem data de criação nem ID aleatório nos metadados
+            invariant=True,
         )
 
-        # Elementos do relatório
-        story = []
-
-        # Cabeçalho
-        story.append(
-            Paragraph(
-                "📊 RELATÓRIO DE ANÁLISE INSTAGRAM", self.styles["TituloPrincipal"]
-            )
-        )
-        story.append(Paragraph(f"Perfil: @{username}", self.styles["Subtitulo"]))
-        story.append(
-            Paragraph(
-                f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}",
-                self.styles["TextoNormal"],
+        # Elementos do relatório (trechos fixos vêm de report_templates)
+        # Só entradas do hash entram no PDF: a data é a da coleta, não a de
+        # renderização, para um PDF do cache não sair com data velha
+        story = [
+            templates.novo(templates.TITULO),
+            Paragraph(f"Perfil: @{username}", self.styles["Subtitulo"]),
+        ]
+        coletado_em = _data_da_coleta(dados_perfil)
+        if coletado_em:
+            story.append(
+                Paragraph(
+                    f"Dados coletados em: {coletado_em}", self.styles["TextoNormal"]
+                )
             )
-        )
-        story.append(Spacer(1, 20))
+        story.append(templates.novo(templates.ESPACO_20))
 
         # Seção 1: Dados Básicos
-        story.append(Paragraph("📋 DADOS BÁSICOS DO PERFIL", self.styles["Subtitulo"]))
+        story.append(templates.novo(templates.SECAO_DADOS))
 
         dados_basicos = [
             ["Nome Completo", dados_perfil.get("nome_completo", "N/A")],
@@ -140,32 +258,22 @@ class ReportService:
             ],
         ]
 
-        tabela_dados = Table(dados_basicos, colWidths=[2 * inch, 4 * inch])
-        tabela_dados.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#F0F8FF")),
-                    ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, -1), 10),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 12),
-                    ("BACKGROUND", (1, 0), (1, -1), colors.white),
-                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                ]
+        story.append(
+            Table(
+                dados_basicos,
+                colWidths=templates.COLUNAS_TABELA,
+                style=templates.TABELA_DADOS,
             )
         )
-
-        story.append(tabela_dados)
-        story.append(Spacer(1, 20))
+        story.append(templates.novo(templates.ESPACO_20))
 
         # Seção 2: Métricas de Engajamento
-        story.append(Paragraph("📈 MÉTRICAS DE ENGAJAMENTO", self.styles["Subtitulo"]))
+        story.append(templates.novo(templates.SECAO_METRICAS))
 
         metricas_dados = [
             ["Engajamento Médio", metricas.get("engajamento_medio", "N/A")],
             ["Posts por Semana", str(metricas.get("posts_semanais", 0))],
-            ["Média de Curtidas", f"{metricas.get('media_curtidas', 0):,}"],
+            ["Média de Curtidas", f"{metricas.get('media_likes', 0):,}"],
             ["Média de Comentários", f"{metricas.get('media_comentarios', 0):,}"],
             [
                 "Principais Hashtags",
@@ -173,81 +281,33 @@ class ReportService:
             ],
         ]
 
-        tabela_metricas = Table(metricas_dados, colWidths=[2 * inch, 4 * inch])
-        tabela_metricas.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#E8F5E8")),
-                    ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, -1), 10),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 12),
-                    ("BACKGROUND", (1, 0), (1, -1), colors.white),
-                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                ]
-            )
-        )
-
-        story.append(tabela_metricas)
-        story.append(Spacer(1, 20))
-
-        # Seção 3: Análise de IA
-        story.append(Paragraph("🤖 ANÁLISE ESTRATÉGICA (IA)", self.styles["Subtitulo"]))
-
-        # Resumo do Negócio
-        story.append(Paragraph("Resumo do Negócio:", self.styles["Destaque"]))
-        story.append(
-            Paragraph(
-                relatorio_ia.get("resumo_negocio", "N/A"), self.styles["TextoNormal"]
-            )
-        )
-        story.append(Spacer(1, 12))
-
-        # Pontos Fortes
-        story.append(Paragraph("Pontos Fortes:", self.styles["Destaque"]))
         story.append(
-            Paragraph(
-                relatorio_ia.get("pontos_fortes", "N/A"), self.styles["TextoNormal"]
+            Table(
+                metricas_dados,
+                colWidths=templates.COLUNAS_TABELA,
+                style=templates.TABELA_METRICAS,
             )
         )
-        story.append(Spacer(1, 12))
+        story.append(templates.novo(templates.ESPACO_20))
 
-        # Pontos Fracos
-        story.append(Paragraph("Pontos Fracos:", self.styles["Destaque"]))
-        story.append(
-            Paragraph(
-                relatorio_ia.get("pontos_fracos", "N/A"), self.styles["TextoNormal"]
-            )
-        )
-        story.append(Spacer(1, 12))
-
-        # Oportunidades
-        story.append(Paragraph("Oportunidades:", self.styles["Destaque"]))
-        story.append(
-            Paragraph(
-                relatorio_ia.get("oportunidades", "N/A"), self.styles["TextoNormal"]
+        # Seção 3: Análise de IA
+        story.append(templates.novo(templates.SECAO_IA))
+        for i, (chave, rotulo) in enumerate(templates.SECOES_IA, 1):
+            story.append(templates.novo(rotulo))
+            story.append(
+                Paragraph(relatorio_ia.get(chave, "N/A"), self.styles["TextoNormal"])
             )
-        )
-        story.append(Spacer(1, 12))
-
-        # Sugestão de Prospecção
-        story.append(Paragraph("Sugestão de Abordagem:", self.styles["Destaque"]))
-        story.append(
-            Paragraph(
-                relatorio_ia.get("sugestao_prospeccao", "N/A"),
-                self.styles["TextoNormal"],
-            )
-        )
-        story.append(Spacer(1, 20))
+            ultima = i == len(templates.SECOES_IA)
+            espaco = templates.ESPACO_20 if ultima else templates.ESPACO_12
+            story.append(templates.novo(espaco))
 
         # Seção 4: Últimos Posts
-        story.append(Paragraph("📱 ÚLTIMOS POSTS ANALISADOS", self.styles["Subtitulo"]))
+        story.append(templates.novo(templates.SECAO_POSTS))
 
         posts = dados_perfil.get("posts", [])
         if posts:
-            for i, post in enumerate(posts[:3], 1):
-                story.append(Paragraph(f"Post {i}:", self.styles["Destaque"]))
+            for rotulo, post in zip(templates.ROTULOS_POST, posts[:3]):
+                story.append(templates.novo(rotulo))
 
                 post_info = [
                     [
@@ -264,41 +324,22 @@ class ReportService:
                     ["Data", post.get("data_postagem", "N/A")[:10]],
                 ]
 
-                tabela_post = Table(post_info, colWidths=[1.5 * inch, 4.5 * inch])
-                tabela_post.setStyle(
-                    TableStyle(
-                        [
-                            ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#FFF8DC")),
-                            ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
-                            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                            ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
-                            ("FONTSIZE", (0, 0), (-1, -1), 9),
-                            ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-                            ("BACKGROUND", (1, 0), (1, -1), colors.white),
-                            ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                        ]
+                story.append(
+                    Table(
+                        post_info,
+                        colWidths=templates.COLUNAS_POST,
+                        style=templates.TABELA_POST,
                     )
                 )
-
-                story.append(tabela_post)
-                story.append(Spacer(1, 15))
+                story.append(templates.novo(templates.ESPACO_15))
         else:
-            story.append(
-                Paragraph(
-                    "Nenhum post encontrado para análise.", self.styles["TextoNormal"]
-                )
-            )
+            story.append(templates.novo(templates.SEM_POSTS))
 
         # Rodapé
-        story.append(Spacer(1, 30))
-        story.append(
-            Paragraph(
-                "Relatório gerado automaticamente pelo Instagram Analyzer",
-                self.styles["TextoNormal"],
-            )
-        )
+        story.append(templates.novo(templates.ESPACO_30))
+        story.append(templates.novo(templates.RODAPE))
 
         # Construir PDF
         doc.build(story)
 
-        return filepath
+        return buffer.getvalue()
@@ -0,0 +1,134 @@
+"""
+Estilos e trechos estáticos do relatório PDF, criados uma única vez por processo.
+
+Montar a folha de estilos, os TableStyles e os parágrafos fixos (títulos de
+seção, rodapé) custa caro e o resultado é sempre o mesmo; o ReportService
+reaproveita estes objetos em todas as renderizações.
+
+Estilos e TableStyles são só lidos e podem ser compartilhados. Já os
+flowables guardam estado de layout (o doc.build marca _postponed e nunca
+limpa), então os trechos fixos são protótipos já parseados e cada uso pega
+uma cópia rasa com novo(), bem mais barata que montar o Paragraph de novo.
+"""
+from copy import copy
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.styles import ParagraphStyle, StyleSheet1, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Flowable, Paragraph, Spacer, TableStyle
+
+
+def _criar_estilos() -> StyleSheet1:
+    """Folha de estilos padrão mais os estilos personalizados do relatório"""
+    styles = getSampleStyleSheet()
+
+    # Título principal
+    styles.add(
+        ParagraphStyle(
+            name="TituloPrincipal",
+            parent=styles["Heading1"],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor("#1DA1F2"),
+        )
+    )
+
+    # Subtítulo
+    styles.add(
+        ParagraphStyle(
+            name="Subtitulo",
+            parent=styles["Heading2"],
+            fontSize=16,
+            spaceAfter=20,
+            textColor=colors.HexColor("#333333"),
+        )
+    )
+
+    # Texto normal
+    styles.add(
+        ParagraphStyle(
+            name="TextoNormal",
+            parent=styles["Normal"],
+            fontSize=11,
+            spaceAfter=12,
+            alignment=TA_LEFT,
+        )
+    )
+
+    # Destaque
+    styles.add(
+        ParagraphStyle(
+            name="Destaque",
+            parent=styles["Normal"],
+            fontSize=12,
+            spaceAfter=12,
+            textColor=colors.HexColor("#1DA1F2"),
+            fontName="Helvetica-Bold",
+        )
+    )
+    return styles
+
+
+def _estilo_tabela(cor_rotulos: str, fonte: int, padding: int) -> TableStyle:
+    """Tabela de duas colunas: rótulos em negrito à esquerda, valores à direita"""
+    return TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (0, -1), colors.HexColor(cor_rotulos)),
+            ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, -1), fonte),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), padding),
+            ("BACKGROUND", (1, 0), (1, -1), colors.white),
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),
+        ]
+    )
+
+
+def novo(prototipo: Flowable) -> Flowable:
+    """Cópia rasa de um flowable fixo, pronta para entrar numa story"""
+    return copy(prototipo)
+
+
+ESTILOS = _criar_estilos()
+
+# Tabelas
+TABELA_DADOS = _estilo_tabela("#F0F8FF", fonte=10, padding=12)
+TABELA_METRICAS = _estilo_tabela("#E8F5E8", fonte=10, padding=12)
+TABELA_POST = _estilo_tabela("#FFF8DC", fonte=9, padding=8)
+COLUNAS_TABELA = [2 * inch, 4 * inch]
+COLUNAS_POST = [1.5 * inch, 4.5 * inch]
+
+# Cabeçalho e títulos de seção
+TITULO = Paragraph("📊 RELATÓRIO DE ANÁLISE INSTAGRAM", ESTILOS["TituloPrincipal"])
+SECAO_DADOS = Paragraph("📋 DADOS BÁSICOS DO PERFIL", ESTILOS["Subtitulo"])
+SECAO_METRICAS = Paragraph("📈 MÉTRICAS DE ENGAJAMENTO", ESTILOS["Subtitulo"])
+SECAO_IA = Paragraph("🤖 ANÁLISE ESTRATÉGICA (IA)", ESTILOS["Subtitulo"])
+SECAO_POSTS = Paragraph("📱 ÚLTIMOS POSTS ANALISADOS", ESTILOS["Subtitulo"])
+
+# Seções da análise de IA: (chave no relatório, rótulo)
+SECOES_IA = [
+    (chave, Paragraph(rotulo, ESTILOS["Destaque"]))
+    for chave, rotulo in [
+        ("resumo_negocio", "Resumo do Negócio:"),
+        ("pontos_fortes", "Pontos Fortes:"),
+        ("pontos_fracos", "Pontos Fracos:"),
+        ("oportunidades", "Oportunidades:"),
+        ("sugestao_prospeccao", "Sugestão de Abordagem:"),
+    ]
+]
+ROTULOS_POST = [Paragraph(f"Post {i}:", ESTILOS["Destaque"]) for i in (1, 2, 3)]
+SEM_POSTS = Paragraph("Nenhum post encontrado para análise.", ESTILOS["TextoNormal"])
+
+# Rodapé
+RODAPE = Paragraph(
+    "Relatório gerado automaticamente pelo Instagram Analyzer", ESTILOS["TextoNormal"]
+)
+
+# Espaçadores
+ESPACO_12 = Spacer(1, 12)
+ESPACO_15 = Spacer(1, 15)
+ESPACO_20 = Spacer(1, 20)
+ESPACO_30 = Spacer(1, 30)
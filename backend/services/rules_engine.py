@@ -0,0 +1,253 @@
+import json
+import operator
+import os
+import string
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from services.report_parser import NOMES_SECOES, SEM_ANALISE
+
+REGRAS_PADRAO = os.path.join(os.path.dirname(__file__), "regras_relatorio.json")
+
+OPERADORES = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+# Mesmos operadores para um perfil só, sem o custo de criar arrays
+OPERADORES_ESCALARES = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# Campos disponíveis para condições e textos: (origem, chave, tipo). Uma
+# tupla de chaves vale a primeira presente: coletas reais trazem is_verified
+# e is_private; os dados mock, verificado e conta_privada
+CAMPOS = {
+    "username": ("dados", "username", str),
+    "seguidores": ("dados", "seguidores", np.int64),
+    "seguindo": ("dados", "seguindo", np.int64),
+    "total_posts": ("dados", "total_posts", np.int64),
+    "verificado": ("dados", ("is_verified", "verificado"), bool),
+    "conta_privada": ("dados", ("is_private", "conta_privada"), bool),
+    "taxa_engajamento": ("metricas", "taxa_engajamento", np.float64),
+    "posts_semanais": ("metricas", "posts_semanais", np.float64),
+    "media_likes": ("metricas", "media_likes", np.float64),
+    "media_comentarios": ("metricas", "media_comentarios", np.float64),
+}
+
+
+def _valor(item: Dict[str, Any], chave) -> Any:
+    if isinstance(chave, str):
+        return item.get(chave)
+    return next((item[c] for c in chave if c in item), None)
+
+
+def _escalar(tipo):
+    """Conversão de um valor avulso para o tipo Python da coluna"""
+    if tipo is str:
+        return lambda valor: "perfil" if valor is None else valor
+    if tipo is bool:
+        return bool
+    numero = int if tipo is np.int64 else float
+    return lambda valor: numero(valor or 0)
+
+
+CONVERSORES = {
+    campo: (origem, chave, _escalar(tipo))
+    for campo, (origem, chave, tipo) in CAMPOS.items()
+}
+
+
+def _campos_do_texto(texto: str) -> List[str]:
+    return [nome for _, nome, _, _ in string.Formatter().parse(texto) if nome]
+
+
+def _estatico(texto: str) -> bool:
+    """Texto sem chaves: sai como está, sem passar pelo format"""
+    return "{" not in texto and "}" not in texto
+
+
+class _Secao:
+    """
+    Uma seção do relatório: "escolha" usa o texto da primeira regra que
+    casar; "lista" junta os textos de todos os itens que casarem (ou o
+    padrão, se nenhum casar) com o separador.
+    """
+
+    def __init__(self, nome: str, definicao: Dict[str, Any]):
+        self.nome = nome
+        self.tipo = definicao.get("tipo")
+        if self.tipo == "escolha":
+            regras = definicao["regras"]
+        elif self.tipo == "lista":
+            regras = definicao["itens"]
+            self.separador = definicao.get("separador", " • ")
+            self.padrao = self.separador.join(definicao.get("padrao", []))
+        else:
+            raise ValueError(f"Seção {nome}: tipo inválido {self.tipo!r}")
+
+        self.condicoes = [regra.get("se", []) for regra in regras]
+        self.textos = [regra["texto"] for regra in regras]
+        for condicoes in self.condicoes:
+            for campo, operador, _ in condicoes:
+                if campo not in CAMPOS or operador not in OPERADORES:
+                    raise ValueError(
+                        f"Seção {nome}: condição inválida {campo} {operador}"
+                    )
+        for texto in self.textos + [getattr(self, "padrao", "")]:
+            for campo in _campos_do_texto(texto):
+                if campo not in CAMPOS:
+                    raise ValueError(f"Seção {nome}: campo desconhecido {campo}")
+        if self.tipo == "lista" and len(self.textos) > 62:
+            raise ValueError(f"Seção {nome}: no máximo 62 itens")
+        # Modelos montados por código de combinação (seções "lista")
+        self._combinacoes: Dict[int, str] = {}
+        self._condicoes_escalares = [
+            [(campo, OPERADORES_ESCALARES[op], valor) for campo, op, valor in regra]
+            for regra in self.condicoes
+        ]
+
+    def _modelo_lista(self, codigo: int) -> str:
+        modelo = self._combinacoes.get(codigo)
+        if modelo is None:
+            itens = [t for bit, t in enumerate(self.textos) if codigo >> bit & 1]
+            modelo = self.separador.join(itens) if itens else self.padrao
+            self._combinacoes[codigo] = modelo
+        return modelo
+
+    def modelo(self, valores: Dict[str, Any]) -> str:
+        """Texto-modelo de um único perfil (valores Python por campo)"""
+        codigo = 0
+        for bit, condicoes in enumerate(self._condicoes_escalares):
+            for campo, comparar, valor in condicoes:
+                if not comparar(valores[campo], valor):
+                    break
+            else:
+                if self.tipo == "escolha":
+                    return self.textos[bit]
+                codigo |= 1 << bit
+        if self.tipo == "escolha":
+            return SEM_ANALISE
+        return self._modelo_lista(codigo)
+
+    def _mascaras(self, colunas: Dict[str, np.ndarray], n: int) -> List[np.ndarray]:
+        """Uma máscara booleana por regra: perfis em que todas as condições valem"""
+        mascaras = []
+        for condicoes in self.condicoes:
+            mascara = np.ones(n, dtype=bool)
+            for campo, operador, valor in condicoes:
+                mascara &= OPERADORES[operador](colunas[campo], valor)
+            mascaras.append(mascara)
+        return mascaras
+
+    def modelos(self, colunas: Dict[str, np.ndarray], n: int) -> tuple:
+        """(lista de textos-modelo, índice do modelo de cada perfil)"""
+        mascaras = self._mascaras(colunas, n)
+        if self.tipo == "escolha":
+            indices = np.select(mascaras, np.arange(len(mascaras)), default=-1)
+            return self.textos + [SEM_ANALISE], indices
+
+        # Lista: cada combinação de itens vira um código de bits e cada
+        # código distinto é montado uma única vez
+        codigos = np.zeros(n, dtype=np.int64)
+        for bit, mascara in enumerate(mascaras):
+            codigos |= mascara.astype(np.int64) << bit
+        unicos, indices = np.unique(codigos, return_inverse=True)
+        return [self._modelo_lista(codigo) for codigo in unicos.tolist()], indices
+
+
+class MotorRegras:
+    """
+    Relatórios determinísticos a partir de limiares e modelos de texto.
+
+    As regras vêm de um JSON (REGRAS_PADRAO reproduz o antigo relatório
+    mock) com uma entrada por seção. As condições são avaliadas em colunas
+    NumPy para todos os perfis de uma vez; só a formatação final dos textos
+    é feita perfil a perfil.
+    """
+
+    def __init__(self, regras: Dict[str, Any]):
+        faltando = [secao for secao in NOMES_SECOES if secao not in regras]
+        if faltando:
+            raise ValueError(f"Regras sem as seções: {', '.join(faltando)}")
+        self.secoes = [_Secao(secao, regras[secao]) for secao in NOMES_SECOES]
+
+    @classmethod
+    def carregar(cls, caminho: Optional[str] = None) -> "MotorRegras":
+        """Lê as regras de um arquivo JSON (padrão: REGRAS_PADRAO)"""
+        with open(caminho or REGRAS_PADRAO, encoding="utf-8") as arquivo:
+            return cls(json.load(arquivo))
+
+    @staticmethod
+    def colunas(
+        perfis: Sequence[Dict[str, Any]], metricas: Sequence[Dict[str, Any]]
+    ) -> Dict[str, np.ndarray]:
+        """Campos de N perfis (e suas métricas) em colunas"""
+        origens = {"dados": perfis, "metricas": metricas}
+        colunas = {}
+        for campo, (origem, chave, tipo) in CAMPOS.items():
+            valores = (_valor(item, chave) for item in origens[origem])
+            if tipo is str:
+                colunas[campo] = np.array(
+                    ["perfil" if v is None else v for v in valores], dtype=object
+                )
+            else:
+                colunas[campo] = np.fromiter(
+                    (v or 0 for v in valores), dtype=tipo, count=len(perfis)
+                )
+        return colunas
+
+    def gerar_colunas(self, colunas: Dict[str, np.ndarray]) -> List[Dict[str, str]]:
+        """Relatórios de perfis já em colunas (ver colunas())"""
+        n = len(colunas["username"])
+        # Valores Python por perfil, para o str.format dos modelos
+        nomes = list(colunas)
+        linhas = [
+            dict(zip(nomes, valores))
+            for valores in zip(*(colunas[nome].tolist() for nome in nomes))
+        ]
+
+        textos_por_secao = []
+        for secao in self.secoes:
+            modelos, indices = secao.modelos(colunas, n)
+            estaticos = [_estatico(modelo) for modelo in modelos]
+            textos_por_secao.append(
+                [
+                    modelos[i] if estaticos[i] else modelos[i].format_map(linha)
+                    for i, linha in zip(indices.tolist(), linhas)
+                ]
+            )
+        return [dict(zip(NOMES_SECOES, textos)) for textos in zip(*textos_por_secao)]
+
+    def gerar_lote(
+        self, perfis: Sequence[Dict[str, Any]], metricas: Sequence[Dict[str, Any]]
+    ) -> List[Dict[str, str]]:
+        """Relatórios de vários perfis de uma vez"""
+        if not perfis:
+            return []
+        return self.gerar_colunas(self.colunas(perfis, metricas))
+
+    def gerar(self, dados_perfil: Dict[str, Any], metricas: Dict[str, Any]):
+        """Relatório de um único perfil (sem NumPy: arrays de 1 item custam mais)"""
+        origens = {"dados": dados_perfil, "metricas": metricas}
+        valores = {
+            campo: converter(_valor(origens[origem], chave))
+            for campo, (origem, chave, converter) in CONVERSORES.items()
+        }
+
+        relatorio = {}
+        for secao in self.secoes:
+            modelo = secao.modelo(valores)
+            relatorio[secao.nome] = (
+                modelo if _estatico(modelo) else modelo.format_map(valores)
+            )
+        return relatorio
@@ -0,0 +1,437 @@
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from services.rate_limit_state import Balde, EstadoLimite
+from services.telemetry import BLOQUEIOS
+
+logger = logging.getLogger(__name__)
+
+# Faixas de prioridade, da mais para a menos prioritária
+FAIXAS = ("interativo", "lote")
+
+
+class Admissao(NamedTuple):
+    aceita: bool
+    eta: float  # segundos até a vez da requisição
+
+
+class Vez(NamedTuple):
+    """Como uma chamada entra na fila do agendador"""
+
+    faixa: str = "interativo"
+    chamador: Hashable = None  # unidade do rodízio: perfil, lote, job...
+    espera_maxima: Optional[float] = None  # None: espera o quanto for preciso
+
+
+class RequisicaoRecusada(Exception):
+    """A vez da requisição demoraria mais que a espera aceita pelo chamador"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(
+            f"⏱️ Rate limiting ativo — aguarde {self.retry_after} segundos"
+        )
+
+
+class AgendadorRequisicoes:
+    """
+    Orçamento global de requisições ao Instagram (token bucket).
+
+    O balde enche a `por_hora / 3600` tokens por segundo até `rajada` tokens;
+    cada chamada consome `custo` tokens. Quem não encontra tokens entra na
+    fila da sua faixa: "interativo" sempre passa na frente de "lote" e,
+    dentro de cada faixa, os chamadores (perfil, lote, job...) são atendidos
+    em rodízio, uma requisição de cada por vez. bloquear() suspende todas as
+    faixas (429 do Instagram); o balde continua enchendo durante o bloqueio.
+
+    Tokens, bloqueio e contadores de backoff ficam em `estado` (EstadoLimite
+    em memória ou EstadoLimiteSQLite, compartilhado entre workers) e são
+    relidos a cada requisição; as filas são de cada processo.
+
+    admitir() calcula a ETA de uma nova requisição a partir da fila atual; ela
+    é exata enquanto não chegarem requisições de faixa mais prioritária (nem
+    de outros workers).
+
+    Consultas ao estado são leituras simples; todas as escritas (consumir e
+    devolver tokens, bloqueios e backoff) rodam numa thread quando o estado
+    fica em disco, para a espera pelo lock de outro worker não travar o event
+    loop. Cada rodada de despacho consome os tokens de toda a fila que cabe
+    no balde numa única transação.
+    """
+
+    def __init__(
+        self,
+        por_hora: float,
+        rajada: int = 3,
+        estado: Optional[EstadoLimite] = None,
+        backoff_base: float = 300,
+        backoff_maximo: float = 7200,
+        relogio: Callable[[], float] = time.time,
+    ):
+        if por_hora <= 0:
+            raise ValueError("por_hora deve ser positivo")
+        self.taxa = por_hora / 3600
+        self.capacidade = max(1, rajada)
+        self.estado = estado or EstadoLimite()
+        self.backoff_base = backoff_base
+        self.backoff_maximo = backoff_maximo
+        self.relogio = relogio
+
+        # Por faixa: chamador -> fila de (futuro, custo), na ordem do rodízio
+        self._filas: Dict[str, "OrderedDict[Hashable, Deque]"] = {
+            faixa: OrderedDict() for faixa in FAIXAS
+        }
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._rodada: Optional[asyncio.Task] = None
+        self._despachar_de_novo = False
+        self.admitidas = 0
+        self.recusadas = 0
+        self.espera_total = 0.0
+
+    # ----------------------------------------------------------
+    # Estado do balde
+    # ----------------------------------------------------------
+    def _balde(self, agora: float) -> Balde:
+        return self.estado.ler(self.taxa, self.capacidade, agora)
+
+    def _ha_fila(self) -> bool:
+        return any(self._filas.values())
+
+    async def _escrever(self, operacao: Callable, *args):
+        """Escrita no estado; fora do event loop se o estado estiver em disco"""
+        if self.estado.em_disco:
+            return await asyncio.to_thread(operacao, *args)
+        return operacao(*args)
+
+    async def bloquear(self, segundos: float):
+        """Suspende as requisições por N segundos (não encurta um bloqueio maior)"""
+        agora = self.relogio()
+        await self._escrever(
+            self.estado.bloquear, agora + segundos, self.taxa, self.capacidade, agora
+        )
+        BLOQUEIOS.observar(segundos, "bloqueio")
+        logger.warning(
+            "Requisições ao Instagram suspensas", extra={"segundos": round(segundos)}
+        )
+        self._agendar(segundos)
+
+    async def registrar_rate_limit(self, minimo: float = 0) -> Tuple[float, int]:
+        """
+        Rate limit do Instagram: bloqueia com backoff exponencial
+
+        O expoente é compartilhado (via estado) e só volta a zero com
+        zerar_backoff(). Retorna (segundos de bloqueio, expoente).
+        """
+        agora = self.relogio()
+        espera, expoente = await self._escrever(
+            self.estado.registrar_rate_limit,
+            minimo,
+            self.backoff_base,
+            self.backoff_maximo,
+            self.taxa,
+            self.capacidade,
+            agora,
+        )
+        BLOQUEIOS.observar(espera, "backoff")
+        logger.warning(
+            "Requisições ao Instagram suspensas",
+            extra={"segundos": round(espera), "backoff": expoente},
+        )
+        self._agendar(espera)
+        return espera, expoente
+
+    async def zerar_backoff(self):
+        """Chamada bem-sucedida: o próximo rate limit recomeça do backoff base"""
+        # Quase sempre já está zerado: nem sai do event loop
+        if self._balde(self.relogio()).expoente:
+            await self._escrever(self.estado.zerar_backoff)
+
+    def backoff(self) -> Dict:
+        """Expoente atual, bloqueio seguinte e quando sai a próxima requisição"""
+        agora = self.relogio()
+        balde = self._balde(agora)
+        inicio = max(agora, balde.bloqueado_ate)
+        tokens = min(self.capacidade, balde.tokens + (inicio - agora) * self.taxa)
+        proxima = inicio + max(0.0, 1 - tokens) / self.taxa
+        return {
+            "expoente": balde.expoente,
+            "proximo_bloqueio": min(
+                self.backoff_base * 2**balde.expoente, self.backoff_maximo
+            ),
+            "bloqueado_ate": (
+                datetime.fromtimestamp(balde.bloqueado_ate).isoformat()
+                if balde.bloqueado_ate > agora
+                else None
+            ),
+            "proxima_requisicao": datetime.fromtimestamp(proxima).isoformat(),
+        }
+
+    def bloqueado_ate(self) -> Optional[datetime]:
+        """Fim do bloqueio ativo, ou None"""
+        agora = self.relogio()
+        bloqueado_ate = self._balde(agora).bloqueado_ate
+        if bloqueado_ate <= agora:
+            return None
+        return datetime.fromtimestamp(bloqueado_ate)
+
+    # ----------------------------------------------------------
+    # Admissão
+    # ----------------------------------------------------------
+    def _custo_a_frente(self, faixa: str, chamador: Hashable) -> float:
+        """Tokens que a fila consome antes de uma nova requisição do chamador"""
+        # Custos de quem ainda espera (desistências saem da fila depois)
+        custos = {
+            (f, quem): [c for futuro, c in fila if not futuro.done()]
+            for f in FAIXAS
+            for quem, fila in self._filas[f].items()
+        }
+        total = 0.0
+        for outra in FAIXAS[: FAIXAS.index(faixa)]:
+            total += sum(sum(custos[outra, c]) for c in self._filas[outra])
+
+        rodada = len(custos.get((faixa, chamador), ()))
+        antes = True  # chamadores antes dele no rodízio são atendidos na rodada
+        for outro in self._filas[faixa]:
+            pendentes = custos[faixa, outro]
+            if outro == chamador:
+                antes = False
+                total += sum(pendentes)
+                continue
+            total += sum(pendentes[: rodada + 1 if antes else rodada])
+        return total
+
+    def estimar(self, faixa: str, chamador: Hashable, custo: float = 1) -> float:
+        """Segundos até uma nova requisição do chamador ser atendida"""
+        agora = self.relogio()
+        balde = self._balde(agora)
+        inicio = max(agora, balde.bloqueado_ate)
+        tokens = min(self.capacidade, balde.tokens + (inicio - agora) * self.taxa)
+        faltam = self._custo_a_frente(faixa, chamador) + custo - tokens
+        return (inicio - agora) + max(0.0, faltam) / self.taxa
+
+    def admitir(
+        self,
+        faixa: str,
+        chamador: Hashable,
+        custo: float = 1,
+        espera_maxima: Optional[float] = None,
+    ) -> Admissao:
+        """Decide se a requisição cabe na espera máxima, com a ETA calculada"""
+        if faixa not in self._filas:
+            raise ValueError(f"Faixa inválida: {faixa}")
+        eta = self.estimar(faixa, chamador, custo)
+        return Admissao(espera_maxima is None or eta <= espera_maxima, eta)
+
+    async def aguardar(
+        self,
+        faixa: str,
+        chamador: Hashable,
+        custo: float = 1,
+        espera_maxima: Optional[float] = None,
+    ) -> float:
+        """
+        Aguarda a vez da requisição e consome seus tokens
+
+        Levanta RequisicaoRecusada (com retry_after) se a ETA passar de
+        espera_maxima. Retorna os segundos esperados.
+        """
+        aceita, eta = self.admitir(faixa, chamador, custo, espera_maxima)
+        if not aceita:
+            self.recusadas += 1
+            raise RequisicaoRecusada(eta)
+
+        inicio = self.relogio()
+        atendida = eta <= 0 and not self._ha_fila()
+        if atendida:
+            # Outro worker pode ter levado os tokens desde a estimativa
+            atendida = await self._consumir(custo, inicio)
+        if not atendida:
+            futuro = asyncio.get_running_loop().create_future()
+            filas = self._filas[faixa]
+            filas.setdefault(chamador, deque()).append((futuro, custo))
+            self._despachar()
+            try:
+                await futuro
+            except asyncio.CancelledError:
+                # Desistiu na fila: se já tinha sido atendido, devolve os tokens
+                if futuro.done() and not futuro.cancelled():
+                    self._devolver(custo)
+                raise
+
+        espera = self.relogio() - inicio
+        self.admitidas += 1
+        self.espera_total += espera
+        return espera
+
+    # ----------------------------------------------------------
+    # Despacho
+    # ----------------------------------------------------------
+    async def _consumir(self, custo: float, agora: float) -> bool:
+        """Consome os tokens de uma requisição fora da fila"""
+        if not self.estado.em_disco:
+            return self.estado.consumir(custo, self.taxa, self.capacidade, agora)[0]
+        escrita = asyncio.ensure_future(
+            self._escrever(
+                self.estado.consumir, custo, self.taxa, self.capacidade, agora
+            )
+        )
+        try:
+            return (await asyncio.shield(escrita))[0]
+        except asyncio.CancelledError:
+            # Desistiu durante a escrita: devolve os tokens se foram consumidos
+            def devolver_se_consumiu(escrita):
+                if not escrita.cancelled() and escrita.result()[0]:
+                    self._devolver(custo)
+
+            escrita.add_done_callback(devolver_se_consumiu)
+            raise
+
+    def _devolver(self, custo: float):
+        """Devolve tokens sem esperar (o despacho segue quando a escrita acabar)"""
+        args = (custo, self.taxa, self.capacidade, self.relogio())
+        if not self.estado.em_disco:
+            self.estado.devolver(*args)
+            self._despachar()
+            return
+        escrita = asyncio.get_running_loop().run_in_executor(
+            None, self.estado.devolver, *args
+        )
+        escrita.add_done_callback(lambda _: self._despachar())
+
+    def _plano(self) -> List[Tuple[str, Hashable, asyncio.Future, float]]:
+        """
+        Próximas requisições na ordem de atendimento, até passar da capacidade
+
+        Descarta desistências e simula o rodízio sem alterar as filas: a
+        faixa mais prioritária primeiro e, nela, uma requisição de cada
+        chamador por volta.
+        """
+        plano, total = [], 0.0
+        for faixa in FAIXAS:
+            filas = self._filas[faixa]
+            for chamador in list(filas):
+                filas[chamador] = deque(i for i in filas[chamador] if not i[0].done())
+                if not filas[chamador]:
+                    del filas[chamador]
+            pendentes = [(chamador, list(fila)) for chamador, fila in filas.items()]
+            while pendentes:
+                for chamador, fila in pendentes:
+                    futuro, custo = fila.pop(0)
+                    plano.append((faixa, chamador, futuro, custo))
+                    total += custo
+                    if total > self.capacidade:
+                        return plano
+                pendentes = [(chamador, fila) for chamador, fila in pendentes if fila]
+        return plano
+
+    def _retirar(self, faixa: str, chamador: Hashable, item: Tuple):
+        """Tira a requisição atendida da fila; o chamador vai para o fim da faixa"""
+        filas = self._filas[faixa]
+        fila = filas[chamador]
+        fila.remove(item)
+        if fila:
+            filas.move_to_end(chamador)
+        else:
+            del filas[chamador]
+
+    def _despachar(self):
+        """Inicia uma rodada de despacho (ou pede outra ao fim da atual)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._rodada is not None:
+            self._despachar_de_novo = True
+            return
+        if not self._ha_fila():
+            return
+        self._rodada = asyncio.get_running_loop().create_task(self._despachar_rodada())
+
+    async def _despachar_rodada(self):
+        try:
+            while True:
+                plano = self._plano()
+                if not plano:
+                    return
+                agora = self.relogio()
+                atendidas, balde = await self._escrever(
+                    self.estado.consumir_lote,
+                    [custo for *_, custo in plano],
+                    self.taxa,
+                    self.capacidade,
+                    agora,
+                )
+                devolver = 0.0
+                for faixa, chamador, futuro, custo in plano[:atendidas]:
+                    self._retirar(faixa, chamador, (futuro, custo))
+                    if futuro.done():
+                        devolver += custo  # desistiu durante a escrita
+                    else:
+                        futuro.set_result(None)
+                if devolver:
+                    await self._escrever(
+                        self.estado.devolver,
+                        devolver,
+                        self.taxa,
+                        self.capacidade,
+                        self.relogio(),
+                    )
+                    continue
+                if atendidas < len(plano):
+                    # Bloqueio ou balde vazio (talvez por outro worker): tentar
+                    # de novo quando o bloqueio acabar e houver tokens
+                    custo = plano[atendidas][3]
+                    inicio = max(agora, balde.bloqueado_ate)
+                    tokens = min(
+                        self.capacidade, balde.tokens + (inicio - agora) * self.taxa
+                    )
+                    self._agendar(inicio - agora + max(0.0, custo - tokens) / self.taxa)
+                    return
+        finally:
+            self._rodada = None
+            if self._despachar_de_novo:
+                self._despachar_de_novo = False
+                self._despachar()
+
+    def _agendar(self, atraso: float):
+        if not self._ha_fila():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_later(max(atraso, 0), self._despachar)
+
+    def stats(self) -> Dict:
+        """Estado do orçamento para o endpoint /status"""
+        return {
+            "por_hora": round(self.taxa * 3600, 2),
+            "rajada": self.capacidade,
+            "tokens": round(self._balde(self.relogio()).tokens, 2),
+            "fila": {
+                faixa: sum(len(fila) for fila in filas.values())
+                for faixa, filas in self._filas.items()
+            },
+            "chamadores": {faixa: len(filas) for faixa, filas in self._filas.items()},
+            "backoff": self.backoff(),
+            "admitidas": self.admitidas,
+            "recusadas": self.recusadas,
+            "espera_media": (
+                round(self.espera_total / self.admitidas, 2) if self.admitidas else 0
+            ),
+        }
@@ -0,0 +1,48 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave em uma única execução.
+
+    O primeiro chamador dispara a corrotina; os demais aguardam o mesmo
+    resultado (ou a mesma exceção). A execução roda como task própria, então
+    um cliente que desconecta não cancela o trabalho dos outros.
+    """
+
+    def __init__(self):
+        self._em_andamento: Dict[Hashable, asyncio.Task] = {}
+        self.execucoes = 0
+        self.compartilhadas = 0
+
+    def em_andamento(self, chave: Hashable) -> bool:
+        """Indica se já existe uma execução ativa para a chave"""
+        return chave in self._em_andamento
+
+    async def do(self, chave: Hashable, fabrica: Callable[[], Awaitable[Any]]) -> Any:
+        """Executa fabrica() uma única vez por chave entre chamadores simultâneos"""
+        task = self._em_andamento.get(chave)
+        if task is None:
+            task = asyncio.ensure_future(fabrica())
+            self._em_andamento[chave] = task
+            task.add_done_callback(lambda t: self._finalizar(chave, t))
+            self.execucoes += 1
+        else:
+            self.compartilhadas += 1
+        return await asyncio.shield(task)
+
+    def _finalizar(self, chave: Hashable, task: asyncio.Task):
+        """Remove a chave do registro e marca a exceção como consumida"""
+        if self._em_andamento.get(chave) is task:
+            del self._em_andamento[chave]
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores para o endpoint /status"""
+        return {
+            "em_andamento": len(self._em_andamento),
+            "execucoes": self.execucoes,
+            "compartilhadas": self.compartilhadas,
+        }
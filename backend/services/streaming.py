@@ -0,0 +1,17 @@
+import json
+from typing import Any, Dict
+
+# Formatos de streaming aceitos pelos endpoints e seus media types
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def formatar_evento(evento: str, dados: Dict[str, Any], formato: str) -> str:
+    """Serializa um evento como linha NDJSON ou bloco SSE"""
+    if formato == "sse":
+        corpo = json.dumps(dados, default=str, ensure_ascii=False)
+        return f"event: {evento}\ndata: {corpo}\n\n"
+    corpo = json.dumps({"evento": evento, **dados}, default=str, ensure_ascii=False)
+    return corpo + "\n"
@@ -0,0 +1,345 @@
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+# Limites (em segundos) dos histogramas de latência
+LIMITES_LATENCIA = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+)
+# Bloqueios do Instagram: de um minuto ao teto do backoff (2 h)
+LIMITES_BLOQUEIO = (60, 300, 600, 1200, 1800, 3600, 7200)
+
+# O Response do Starlette acrescenta "; charset=utf-8"
+MEDIA_TYPE = "text/plain; version=0.0.4"
+
+Rotulos = Tuple[str, ...]
+
+
+def _numero(valor: float) -> str:
+    if valor == math.inf:
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _seletor(nomes: Sequence[str], valores: Sequence[str]) -> str:
+    if not nomes:
+        return ""
+    pares = ",".join(f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores))
+    return "{" + pares + "}"
+
+
+class _Metrica:
+    """
+    Base das métricas: nome, texto de ajuda e nomes dos rótulos.
+
+    Os valores de rótulo são passados na ordem de `rotulos`. Com `coletar`,
+    a métrica não guarda nada: a função é chamada só na exportação e devolve
+    {valores de rótulo: valor} (ou um número, sem rótulos) - o jeito de
+    expor contadores que os serviços já mantêm sem custo no caminho quente.
+    """
+
+    tipo = "untyped"
+
+    def __init__(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Sequence[str] = (),
+        coletar: Optional[Callable[[], object]] = None,
+    ):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.coletar = coletar
+        self._valores: Dict[Rotulos, float] = {}
+
+    def valor(self, *rotulos: str) -> float:
+        """Valor atual de uma série (0 se ela ainda não existe)"""
+        return self._amostras().get(rotulos, 0)
+
+    def _amostras(self) -> Dict[Rotulos, float]:
+        if self.coletar is None:
+            return self._valores
+        amostras = self.coletar()
+        if isinstance(amostras, dict):
+            return amostras
+        return {(): amostras}
+
+    def linhas(self) -> Iterator[str]:
+        for rotulos, valor in self._amostras().items():
+            seletor = _seletor(self.rotulos, rotulos)
+            yield f"{self.nome}{seletor} {_numero(valor)}"
+
+
+class Contador(_Metrica):
+    """Valor que só cresce (requisições, fallbacks, tokens...)"""
+
+    tipo = "counter"
+
+    def inc(self, *rotulos: str, valor: float = 1):
+        self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+
+class Medidor(_Metrica):
+    """Valor que sobe e desce (em andamento, tamanho de fila, taxa de acerto)"""
+
+    tipo = "gauge"
+
+    def set(self, valor: float, *rotulos: str):
+        self._valores[rotulos] = valor
+
+    def inc(self, *rotulos: str, valor: float = 1):
+        self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+    def dec(self, *rotulos: str, valor: float = 1):
+        self._valores[rotulos] = self._valores.get(rotulos, 0) - valor
+
+
+class _Cronometro:
+    """Context manager de Histograma.medir(): observa o tempo do bloco"""
+
+    __slots__ = ("histograma", "rotulos", "inicio")
+
+    def __init__(self, histograma: "Histograma", rotulos: Rotulos):
+        self.histograma = histograma
+        self.rotulos = rotulos
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.histograma.observar(time.perf_counter() - self.inicio, *self.rotulos)
+
+    # Também como `async with`, junto de outros context managers assíncronos
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *_):
+        self.__exit__()
+
+
+class Histograma(_Metrica):
+    """
+    Distribuição de valores (latências, durações) em faixas fixas.
+
+    Cada série guarda a contagem de cada faixa, não a acumulada: observar()
+    é uma busca binária e dois incrementos. A acumulação do formato
+    Prometheus (le="...") é feita na exportação.
+    """
+
+    tipo = "histogram"
+
+    def __init__(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Sequence[str] = (),
+        limites: Sequence[float] = LIMITES_LATENCIA,
+    ):
+        super().__init__(nome, ajuda, rotulos)
+        self.limites = tuple(sorted(limites))
+        # Por série: [contagem de cada faixa..., acima do último limite, soma]
+        self._series: Dict[Rotulos, list] = {}
+
+    def observar(self, valor: float, *rotulos: str):
+        serie = self._series.get(rotulos)
+        if serie is None:
+            serie = self._series[rotulos] = [0] * (len(self.limites) + 1) + [0.0]
+        serie[bisect_left(self.limites, valor)] += 1
+        serie[-1] += valor
+
+    def medir(self, *rotulos: str) -> _Cronometro:
+        """Context manager que observa a duração do bloco, em segundos"""
+        return _Cronometro(self, rotulos)
+
+    def contagem(self, *rotulos: str) -> int:
+        """Observações de uma série"""
+        serie = self._series.get(rotulos)
+        return sum(serie[:-1]) if serie else 0
+
+    def soma(self, *rotulos: str) -> float:
+        """Soma das observações de uma série"""
+        serie = self._series.get(rotulos)
+        return serie[-1] if serie else 0.0
+
+    def linhas(self) -> Iterator[str]:
+        nomes = self.rotulos + ("le",)
+        for rotulos, serie in self._series.items():
+            acumulado = 0
+            for limite, contagem in zip(self.limites + (math.inf,), serie):
+                acumulado += contagem
+                seletor = _seletor(nomes, rotulos + (_numero(limite),))
+                yield f"{self.nome}_bucket{seletor} {acumulado}"
+            seletor = _seletor(self.rotulos, rotulos)
+            yield f"{self.nome}_sum{seletor} {_numero(serie[-1])}"
+            yield f"{self.nome}_count{seletor} {acumulado}"
+
+
+class Registro:
+    """
+    Conjunto de métricas exportadas no formato texto do Prometheus.
+
+    Sem dependências e sem locks: as métricas são registradas no loop de
+    eventos, então um incremento é só uma operação de dict. Os nomes
+    recebem o prefixo do registro.
+    """
+
+    def __init__(self, prefixo: str = "instagram_analyzer"):
+        self.prefixo = prefixo
+        self._metricas: Dict[str, _Metrica] = {}
+
+    def _registrar(self, metrica: _Metrica) -> _Metrica:
+        metrica.nome = (
+            f"{self.prefixo}_{metrica.nome}" if self.prefixo else metrica.nome
+        )
+        if metrica.nome in self._metricas:
+            raise ValueError(f"Métrica já registrada: {metrica.nome}")
+        self._metricas[metrica.nome] = metrica
+        return metrica
+
+    def contador(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Sequence[str] = (),
+        coletar: Optional[Callable[[], object]] = None,
+    ) -> Contador:
+        return self._registrar(Contador(nome, ajuda, rotulos, coletar))
+
+    def medidor(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Sequence[str] = (),
+        coletar: Optional[Callable[[], object]] = None,
+    ) -> Medidor:
+        return self._registrar(Medidor(nome, ajuda, rotulos, coletar))
+
+    def histograma(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Sequence[str] = (),
+        limites: Sequence[float] = LIMITES_LATENCIA,
+    ) -> Histograma:
+        return self._registrar(Histograma(nome, ajuda, rotulos, limites))
+
+    def exportar(self) -> str:
+        """Todas as métricas no formato texto 0.0.4 (o do endpoint /metrics)"""
+        linhas = []
+        for metrica in self._metricas.values():
+            linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+            linhas.extend(metrica.linhas())
+        return "\n".join(linhas) + "\n"
+
+
+class MedirRequisicoes:
+    """
+    Middleware ASGI: latência e requisições em andamento por endpoint.
+
+    A rota é o caminho declarado ("/analisar/{username}"), não a URL, para
+    o número de séries não crescer com os perfis; respostas em streaming
+    contam até o último bloco. Requisições sem rota ficam como "outra".
+    """
+
+    def __init__(self, app, latencia: Histograma, em_andamento: Medidor):
+        self.app = app
+        self.latencia = latencia
+        self.em_andamento = em_andamento
+        self._rotas: Dict[Callable, str] = {}
+
+    def _rota(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "outra"
+        rota = self._rotas.get(endpoint)
+        if rota is None:
+            self._rotas = {
+                getattr(r, "endpoint", None): r.path for r in scope["app"].routes
+            }
+            rota = self._rotas.get(endpoint, "outra")
+        return rota
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = str(mensagem["status"])
+            await send(mensagem)
+
+        self.em_andamento.inc()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            self.em_andamento.dec()
+            self.latencia.observar(
+                time.perf_counter() - inicio,
+                scope["method"],
+                self._rota(scope),
+                status,
+            )
+
+
+# Registro da API e as métricas medidas no caminho quente; as que só leem
+# contadores dos serviços (caches, filas) são registradas em main.py
+REGISTRO = Registro()
+
+LATENCIA_HTTP = REGISTRO.histograma(
+    "http_requisicao_segundos",
+    "Latência das requisições HTTP por endpoint",
+    ("metodo", "rota", "status"),
+)
+HTTP_EM_ANDAMENTO = REGISTRO.medidor(
+    "http_em_andamento", "Requisições HTTP sendo atendidas"
+)
+ETAPAS = REGISTRO.histograma(
+    "etapa_segundos",
+    "Duração de cada etapa do pipeline de análise",
+    ("etapa",),
+)
+BLOQUEIOS = REGISTRO.histograma(
+    "instagram_bloqueio_segundos",
+    "Duração dos bloqueios de requisições ao Instagram",
+    ("tipo",),
+    limites=LIMITES_BLOQUEIO,
+)
+FALLBACK_MOCK = REGISTRO.contador(
+    "fallback_mock_total",
+    "Análises servidas com dados de demonstração, por motivo",
+    ("motivo",),
+)
+TOKENS_LLM = REGISTRO.contador(
+    "llm_tokens_total",
+    "Tokens consumidos na API da OpenAI",
+    ("tipo",),
+)
@@ -0,0 +1,254 @@
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from services.cache import TTLCache
+from services.metrics_engine import calcular_metricas
+
+# Um registro por coleta: 48 bytes, gravado do jeito que está no disco
+REGISTRO = np.dtype(
+    [
+        ("ts", "<f8"),
+        ("seguidores", "<i8"),
+        ("seguindo", "<i8"),
+        ("total_posts", "<i8"),
+        ("taxa_engajamento", "<f4"),
+        ("media_likes", "<f4"),
+        ("media_comentarios", "<f4"),
+        ("posts_semanais", "<f4"),
+    ]
+)
+USERNAME_VALIDO = re.compile(r"^[a-z0-9._]{1,30}$")
+SEGMENTO = re.compile(r"^seg_(\d+)_(\d+)\.npz$")
+
+
+@contextmanager
+def _travar(caminho: str, compartilhado: bool = False) -> Iterator[None]:
+    """
+    Lock de arquivo entre processos (flock; no Windows, msvcrt.locking)
+
+    compartilhado=True permite vários leitores ao mesmo tempo; no Windows o
+    lock é sempre exclusivo.
+    """
+    with open(caminho, "a+b") as arquivo:
+        if fcntl is not None:
+            fcntl.flock(arquivo, fcntl.LOCK_SH if compartilhado else fcntl.LOCK_EX)
+        else:
+            arquivo.seek(0)
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+            else:
+                arquivo.seek(0)
+                msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SerieTemporal:
+    """
+    Histórico de coletas por perfil, em colunas, só com inserções.
+
+    Cada perfil tem um diretório com um arquivo "head.bin" (registros de
+    tamanho fixo acrescentados ao final) e segmentos "seg_<ini>_<fim>.npz"
+    comprimidos, um array por coluna. Quando o head passa de `segmento`
+    registros ele vira um segmento novo e é zerado. Os nomes dos segmentos
+    trazem o intervalo de tempo, então consultas por período só abrem o que
+    precisam; segmentos são imutáveis e ficam num cache LRU em memória.
+
+    Cada perfil tem também um arquivo ".lock": escritas (acréscimo e
+    compactação) o travam com exclusividade e consultas de forma
+    compartilhada, então vários workers podem usar o mesmo diretório sem
+    perder registros nem ver um segmento e o head que o gerou ao mesmo tempo.
+    """
+
+    def __init__(self, diretorio: str, segmento: int = 512, cache_mb: int = 32):
+        self.diretorio = diretorio
+        self.segmento = segmento
+        self._lock = threading.Lock()
+        self._segmentos = TTLCache(
+            max_entries=10_000,
+            ttl_seconds=float("inf"),
+            max_weight=cache_mb * 1024 * 1024,
+            peso=lambda registros: registros.nbytes,
+        )
+
+    def _dir_perfil(self, username: str) -> str:
+        username = username.lower()
+        if not USERNAME_VALIDO.match(username):
+            raise ValueError(f"Username inválido: {username}")
+        # Prefixo de 2 letras para não juntar milhares de diretórios num só
+        return os.path.join(self.diretorio, username[:2], username)
+
+    @staticmethod
+    def _para_registro(dados_perfil: Dict[str, Any]) -> np.ndarray:
+        metricas = calcular_metricas(dados_perfil)
+        coletado_em = dados_perfil.get("coletado_em")
+        ts = (
+            datetime.fromisoformat(coletado_em).timestamp()
+            if coletado_em
+            else time.time()
+        )
+        registro = np.zeros(1, dtype=REGISTRO)
+        registro[0] = (
+            ts,
+            dados_perfil.get("seguidores") or 0,
+            dados_perfil.get("seguindo") or 0,
+            dados_perfil.get("total_posts") or 0,
+            metricas["taxa_engajamento"],
+            metricas["media_likes"],
+            metricas["media_comentarios"],
+            metricas["posts_semanais"],
+        )
+        return registro
+
+    def registrar(self, dados_perfil: Dict[str, Any]):
+        """Acrescenta uma coleta (dict de get_profile_data) ao histórico"""
+        self.acrescentar(dados_perfil["username"], self._para_registro(dados_perfil))
+
+    def acrescentar(self, username: str, registros: np.ndarray):
+        """Acrescenta registros (dtype REGISTRO, em ordem de ts) ao head"""
+        pasta = self._dir_perfil(username)
+        with self._lock:
+            os.makedirs(pasta, exist_ok=True)
+            with _travar(os.path.join(pasta, ".lock")):
+                self._acrescentar(pasta, registros)
+
+    def _acrescentar(self, pasta: str, registros: np.ndarray):
+        head = os.path.join(pasta, "head.bin")
+        with open(head, "ab") as arquivo:
+            arquivo.write(registros.astype(REGISTRO, copy=False).tobytes())
+        if os.path.getsize(head) >= self.segmento * REGISTRO.itemsize:
+            self._compactar(pasta, head)
+
+    def _compactar(self, pasta: str, head: str):
+        """Transforma o head num segmento comprimido e o zera"""
+        registros = np.fromfile(head, dtype=REGISTRO)
+        nome = f"seg_{int(registros['ts'].min())}_{int(np.ceil(registros['ts'].max()))}"
+        temporario = os.path.join(pasta, nome + ".tmp.npz")
+        np.savez_compressed(
+            temporario, **{campo: registros[campo] for campo in REGISTRO.names}
+        )
+        os.replace(temporario, os.path.join(pasta, nome + ".npz"))
+        open(head, "wb").close()
+
+    def _ler_segmento(self, caminho: str) -> np.ndarray:
+        registros = self._segmentos.get(caminho)
+        if registros is None:
+            with np.load(caminho) as colunas:
+                registros = np.empty(len(colunas["ts"]), dtype=REGISTRO)
+                for campo in REGISTRO.names:
+                    registros[campo] = colunas[campo]
+            self._segmentos.set(caminho, registros)
+        return registros
+
+    def consultar(
+        self,
+        username: str,
+        inicio: Optional[float] = None,
+        fim: Optional[float] = None,
+    ) -> np.ndarray:
+        """Registros do perfil com inicio <= ts <= fim, ordenados por ts"""
+        pasta = self._dir_perfil(username)
+        if not os.path.isdir(pasta):
+            return np.empty(0, dtype=REGISTRO)
+        inicio = -np.inf if inicio is None else inicio
+        fim = np.inf if fim is None else fim
+
+        partes: List[np.ndarray] = []
+        with _travar(os.path.join(pasta, ".lock"), compartilhado=True):
+            for nome in sorted(os.listdir(pasta)):
+                faixa = SEGMENTO.match(nome)
+                if faixa and int(faixa[2]) >= inicio and int(faixa[1]) <= fim:
+                    partes.append(self._ler_segmento(os.path.join(pasta, nome)))
+            head = os.path.join(pasta, "head.bin")
+            if os.path.exists(head):
+                partes.append(np.fromfile(head, dtype=REGISTRO))
+        if not partes:
+            return np.empty(0, dtype=REGISTRO)
+
+        registros = np.concatenate(partes)
+        if np.any(np.diff(registros["ts"]) < 0):
+            registros = registros[np.argsort(registros["ts"], kind="stable")]
+        a = np.searchsorted(registros["ts"], inicio, side="left")
+        b = np.searchsorted(registros["ts"], fim, side="right")
+        return registros[a:b]
+
+
+def resumir_historico(registros: np.ndarray, janela_dias: float = 7) -> Dict[str, Any]:
+    """Variações no período e taxas móveis (por dia) numa janela de N dias"""
+    if not len(registros):
+        return {"pontos": [], "resumo": None}
+
+    ts = registros["ts"]
+    seguidores = registros["seguidores"].astype(np.float64)
+    engajamento = registros["taxa_engajamento"].astype(np.float64)
+
+    # Para cada ponto, o primeiro ponto dentro da janela anterior a ele
+    inicio_janela = np.searchsorted(ts, ts - janela_dias * 86400, side="left")
+    dias = (ts - ts[inicio_janela]) / 86400
+    delta = seguidores - seguidores[inicio_janela]
+    seguidores_por_dia = np.divide(
+        delta, dias, out=np.zeros_like(delta), where=dias > 0
+    )
+    soma = np.concatenate([[0.0], np.cumsum(engajamento)])
+    indices = np.arange(len(ts))
+    engajamento_movel = (soma[indices + 1] - soma[inicio_janela]) / (
+        indices + 1 - inicio_janela
+    )
+
+    colunas = zip(
+        ts.tolist(),
+        registros["seguidores"].tolist(),
+        registros["seguindo"].tolist(),
+        registros["total_posts"].tolist(),
+        engajamento.round(2).tolist(),
+        seguidores_por_dia.round(2).tolist(),
+        engajamento_movel.round(2).tolist(),
+    )
+    pontos = [
+        {
+            "coletado_em": datetime.fromtimestamp(t).isoformat(),
+            "seguidores": seg,
+            "seguindo": sgd,
+            "total_posts": posts,
+            "taxa_engajamento": eng,
+            "seguidores_por_dia": spd,
+            "engajamento_movel": em,
+        }
+        for t, seg, sgd, posts, eng, spd, em in colunas
+    ]
+
+    dias_total = (ts[-1] - ts[0]) / 86400
+    variacao = seguidores[-1] - seguidores[0]
+    resumo = {
+        "primeira_coleta": pontos[0]["coletado_em"],
+        "ultima_coleta": pontos[-1]["coletado_em"],
+        "coletas": len(pontos),
+        "variacao_seguidores": int(variacao),
+        "crescimento_percentual": (
+            round(float(variacao / seguidores[0] * 100), 2) if seguidores[0] else None
+        ),
+        "seguidores_por_dia": (
+            round(float(variacao / dias_total), 2) if dias_total > 0 else 0.0
+        ),
+        "variacao_posts": int(
+            registros["total_posts"][-1] - registros["total_posts"][0]
+        ),
+        "variacao_engajamento": round(float(engajamento[-1] - engajamento[0]), 2),
+        "janela_dias": janela_dias,
+    }
+    return {"pontos": pontos, "resumo": resumo}
@@ -0,0 +1,184 @@
+import asyncio
+import time
+from services.ai_service import AIService
+from services import fake_openai_server
+from services.persistent_cache import SQLiteCache
+
+DADOS = {"username": "perfil_teste", "seguidores": 1500, "posts": []}
+METRICAS = {"taxa_engajamento": 3.2}
+
+
+def test_relatorio_via_servidor_fake():
+    async def cenario():
+        app = fake_openai_server.criar_app(latencia=0.2)
+        runner, base_url = await fake_openai_server.iniciar(app=app)
+        service = AIService(base_url=base_url)
+        try:
+            inicio = time.perf_counter()
+            relatorios = await asyncio.gather(
+                *[service.gerar_relatorio(DADOS, METRICAS) for _ in range(4)]
+            )
+            duracao = time.perf_counter() - inicio
+            client = service._client
+            await service.gerar_relatorio(DADOS, METRICAS)
+            return (
+                relatorios,
+                duracao,
+                client is service._client,
+                app[fake_openai_server.ESTATISTICAS]["chamadas"],
+            )
+        finally:
+            await service.aclose()
+            await runner.cleanup()
+
+    relatorios, duracao, mesmo_client, chamadas = asyncio.run(cenario())
+
+    assert chamadas == 5
+    assert mesmo_client
+    # As 4 chamadas concorrentes se sobrepõem em vez de serializar
+    assert duracao < 0.6
+    for relatorio in relatorios:
+        assert "Conteúdo visual" in relatorio["pontos_fortes"]
+        assert "reels" in relatorio["oportunidades"]
+
+
+def test_sem_chave_usa_relatorio_mock(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    service = AIService()
+    service.base_url = None
+
+    relatorio = asyncio.run(service.gerar_relatorio(DADOS, METRICAS))
+
+    assert relatorio["resumo_negocio"].startswith("@perfil_teste")
+    assert service._client is None
+
+
+def test_relatorio_em_streaming_emite_secoes_aos_poucos():
+    async def cenario():
+        app = fake_openai_server.criar_app(intervalo_tokens=0.005)
+        runner, base_url = await fake_openai_server.iniciar(app=app)
+        service = AIService(base_url=base_url)
+        try:
+            inicio = time.perf_counter()
+            chegadas = []
+            async for secao, texto in service.gerar_relatorio_stream(DADOS, METRICAS):
+                chegadas.append((secao, texto, time.perf_counter() - inicio))
+            completo = await service.gerar_relatorio(DADOS, METRICAS)
+            return chegadas, completo
+        finally:
+            await service.aclose()
+            await runner.cleanup()
+
+    chegadas, completo = asyncio.run(cenario())
+
+    assert [secao for secao, _, _ in chegadas] == list(completo)
+    assert {secao: texto for secao, texto, _ in chegadas} == completo
+    assert completo == AIService._extrair_secoes_relatorio(
+        None, fake_openai_server.RELATORIO_EXEMPLO
+    )
+    # A primeira seção chega bem antes do fim da resposta
+    assert chegadas[0][2] < chegadas[-1][2] / 2
+
+
+def test_cache_de_relatorios_ignora_pequenas_variacoes(tmp_path):
+    def cache():
+        return SQLiteCache(
+            str(tmp_path / "cache.sqlite3"), namespace="relatorios_ia", ttl_seconds=60
+        )
+
+    async def cenario():
+        app = fake_openai_server.criar_app()
+        runner, base_url = await fake_openai_server.iniciar(app=app)
+        try:
+            service = AIService(base_url=base_url, cache=cache())
+            primeiro = await service.gerar_relatorio(DADOS, METRICAS)
+            # Seguidores oscilaram pouco: mesmo relatório, sem chamar a API
+            oscilou = {**DADOS, "seguidores": 1510}
+            inicio = time.perf_counter()
+            repetido = await service.gerar_relatorio(oscilou, METRICAS)
+            duracao_hit = time.perf_counter() - inicio
+            # Outra instância (ex.: após reinício) reaproveita o banco
+            reiniciado = AIService(base_url=base_url, cache=cache())
+            await reiniciado.gerar_relatorio(DADOS, METRICAS)
+            # Mudança relevante gera um relatório novo
+            await service.gerar_relatorio({**DADOS, "seguidores": 3000}, METRICAS)
+            await service.aclose()
+            await reiniciado.aclose()
+            return primeiro, repetido, duracao_hit, service, reiniciado, app
+        finally:
+            await runner.cleanup()
+
+    primeiro, repetido, duracao_hit, service, reiniciado, app = asyncio.run(cenario())
+
+    assert repetido == primeiro
+    assert duracao_hit < 0.05
+    assert app[fake_openai_server.ESTATISTICAS]["chamadas"] == 2
+    assert reiniciado.stats()["chamadas_api"] == 0
+    assert service.stats()["cache"]["hits"] == 1
+    assert service.stats()["cache"]["misses"] == 2
+
+
+def test_relatorios_agrupados_num_unico_request():
+    perfis = [({**DADOS, "username": f"loja_{i}"}, METRICAS) for i in range(3)]
+
+    async def cenario():
+        # A resposta agrupada só traz 2 dos 3 perfis: o terceiro sai sozinho
+        app = fake_openai_server.criar_app(max_perfis_agrupados=2)
+        runner, base_url = await fake_openai_server.iniciar(app=app)
+        service = AIService(base_url=base_url)
+        service.tamanho_lote = 3
+        try:
+            relatorios = await asyncio.gather(
+                *[service.gerar_relatorio_agrupado(d, m) for d, m in perfis]
+            )
+            return relatorios, app[fake_openai_server.ESTATISTICAS]["chamadas"]
+        finally:
+            await service.aclose()
+            await runner.cleanup()
+
+    relatorios, chamadas = asyncio.run(cenario())
+
+    esperado = AIService._extrair_secoes_relatorio(
+        None, fake_openai_server.RELATORIO_EXEMPLO
+    )
+    assert relatorios == [esperado] * 3
+    assert chamadas == 2
+
+
+def test_politica_de_camadas():
+    service = AIService(base_url="http://127.0.0.1:1/v1")
+    service.min_seguidores_ia = 1000
+    pequeno = {**DADOS, "seguidores": 300}
+
+    assert service.escolher_camada(DADOS, METRICAS) == "ia"
+    assert service.escolher_camada(pequeno, METRICAS) == "regras"
+    assert service.escolher_camada(pequeno, METRICAS, "ia") == "ia"
+    assert service.escolher_camada(DADOS, METRICAS, "regras") == "regras"
+
+    # Relatório de IA já em cache: reaproveitado mesmo abaixo do limiar
+    service.cache = {service.chave_contexto(pequeno, METRICAS): {}}
+    assert service.escolher_camada(pequeno, METRICAS) == "ia"
+
+    # Camada de regras não chama a API (a URL acima nem existe)
+    relatorio = asyncio.run(service.gerar_relatorio(DADOS, METRICAS, "regras"))
+    assert relatorio == service.regras.gerar(DADOS, METRICAS)
+
+
+def test_chave_do_cache_usa_os_campos_da_coleta_real():
+    service = AIService(base_url="http://127.0.0.1:1/v1")
+    post = {"caption": "Promoção de inverno", "likes": 120, "comments": 8}
+    perfil = {**DADOS, "is_verified": False, "posts": [post]}
+    outra_legenda = {**perfil, "posts": [{**post, "caption": "Novo cardápio"}]}
+    video = {**perfil, "posts": [{**post, "is_video": True}]}
+    verificado = {**perfil, "is_verified": True}
+
+    chaves = {
+        service.chave_contexto(dados, METRICAS)
+        for dados in (perfil, outra_legenda, video, verificado)
+    }
+
+    assert len(chaves) == 4
+    contexto = service._preparar_contexto(verificado, METRICAS)
+    assert "Promoção de inverno" in contexto
+    assert "Verificado: Sim" in contexto
+    assert "Engajamento médio: 3.2%" in contexto
@@ -0,0 +1,105 @@
+import asyncio
+from services.batch_service import BatchAnalyzer
+
+
+def criar_lote(processar, cache=None, bloqueados=None, **kwargs):
+    cache = cache or {}
+    bloqueados = bloqueados or {}
+    return BatchAnalyzer(
+        processar=processar,
+        buscar_cache=cache.get,
+        verificar_limite=lambda u: (u not in bloqueados, bloqueados.get(u, 0)),
+        **kwargs,
+    )
+
+
+def coletar(lote, usernames):
+    async def cenario():
+        return [r async for r in lote.executar(usernames)]
+
+    return asyncio.run(cenario())
+
+
+def test_cache_primeiro_e_resultados_por_ordem_de_conclusao():
+    duracoes = {"lento": 0.1, "rapido": 0.01}
+
+    async def processar(username):
+        await asyncio.sleep(duracoes[username])
+        return {"perfil": f"@{username}"}
+
+    lote = criar_lote(processar, cache={"cacheado": {"perfil": "@cacheado"}})
+    resultados = coletar(lote, ["lento", "@rapido", "cacheado", "lento"])
+
+    assert [r["username"] for r in resultados] == ["cacheado", "rapido", "lento"]
+    assert [r["status"] for r in resultados] == ["cached", "ok", "ok"]
+
+
+def test_erros_e_rate_limit_nao_interrompem_o_lote():
+    async def processar(username):
+        if username == "quebrado":
+            raise Exception("Perfil @quebrado não encontrado.")
+        return {"perfil": f"@{username}"}
+
+    lote = criar_lote(processar, bloqueados={"bloqueado": 600})
+    resultados = {
+        r["username"]: r for r in coletar(lote, ["quebrado", "bloqueado", "ok"])
+    }
+
+    assert resultados["quebrado"]["status"] == "erro"
+    assert resultados["bloqueado"] == {
+        "username": "bloqueado",
+        "status": "rate_limited",
+        "retry_after": 600,
+    }
+    assert resultados["ok"]["status"] == "ok"
+
+
+def test_concorrencia_limitada():
+    ativos, pico = 0, 0
+
+    async def processar(username):
+        nonlocal ativos, pico
+        ativos += 1
+        pico = max(pico, ativos)
+        await asyncio.sleep(0.01)
+        ativos -= 1
+        return {}
+
+    lote = criar_lote(processar, concorrencia=3)
+    resultados = coletar(lote, [f"perfil{i}" for i in range(12)])
+
+    assert len(resultados) == 12
+    assert pico == 3
+
+
+def test_falha_ao_verificar_limite_vira_erro_e_o_lote_termina():
+    async def processar(username):
+        return {"perfil": f"@{username}"}
+
+    def verificar_limite(username):
+        if username == "quebrado":
+            raise RuntimeError("database is locked")
+        return True, None
+
+    lote = BatchAnalyzer(
+        processar=processar,
+        buscar_cache={}.get,
+        verificar_limite=verificar_limite,
+    )
+
+    async def cenario():
+        async def resultados():
+            return [r async for r in lote.executar(["quebrado", "ok", "outro"])]
+
+        return await asyncio.wait_for(resultados(), timeout=2)
+
+    resultados = {r["username"]: r for r in asyncio.run(cenario())}
+
+    assert len(resultados) == 3
+    assert resultados["quebrado"] == {
+        "username": "quebrado",
+        "status": "erro",
+        "erro": "database is locked",
+    }
+    assert resultados["ok"]["status"] == "ok"
+    assert resultados["outro"]["status"] == "ok"
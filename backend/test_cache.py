@@ -0,0 +1,51 @@
+import time
+from services.cache import TTLCache
+
+
+def test_lru_despeja_menos_usado():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("ana", {"perfil": "@ana"})
+    cache.set("bia", {"perfil": "@bia"})
+    cache.get("ana")
+    cache.set("caio", {"perfil": "@caio"})
+
+    assert "ana" in cache and "caio" in cache
+    assert "bia" not in cache
+    assert cache.evictions == 1
+
+
+def test_limite_de_peso():
+    cache = TTLCache(max_entries=100, ttl_seconds=60, max_weight=250)
+    for i in range(10):
+        cache.set(f"perfil{i}", {"biografia": "x" * 50})
+
+    assert cache.peso_total <= 250
+    assert len(cache) < 10
+    assert "perfil9" in cache
+
+
+def test_ttl_e_varredura():
+    cache = TTLCache(max_entries=10, ttl_seconds=0.05)
+    cache.set("ana", 1)
+    cache.set("bia", 2)
+    assert cache.get("ana") == 1
+
+    time.sleep(0.06)
+
+    assert cache.purge_expired() == 2
+    assert len(cache) == 0
+    assert cache.peso_total == 0
+    assert cache.get("ana") is None
+
+
+def test_estatisticas():
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    cache.set("ana", 1)
+    cache.get("ana")
+    cache.get("bia")
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+    assert cache.idade("ana") < 1
@@ -0,0 +1,255 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import instaloader
+import pytest
+
+from services.instagram_service import InstagramService
+from services.scheduler import RequisicaoRecusada, Vez
+
+
+def criar_servico(monkeypatch):
+    monkeypatch.setenv("USE_MOCK_DATA", "false")
+    return InstagramService()
+
+
+def test_construcao_nao_faz_login(monkeypatch):
+    inicio = time.perf_counter()
+    service = criar_servico(monkeypatch)
+
+    assert time.perf_counter() - inicio < 1
+    assert service.login_status == "pendente"
+    assert service.L is None
+    service.close()
+
+
+def test_run_blocking_nao_trava_event_loop(monkeypatch):
+    service = criar_servico(monkeypatch)
+
+    async def cenario():
+        ticks = 0
+
+        async def contador():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        tarefa = asyncio.create_task(contador())
+        inicio = time.perf_counter()
+        await asyncio.gather(
+            service._run_blocking(time.sleep, 0.3),
+            service._run_blocking(time.sleep, 0.3),
+        )
+        duracao = time.perf_counter() - inicio
+        tarefa.cancel()
+        return duracao, ticks
+
+    duracao, ticks = asyncio.run(cenario())
+
+    # As duas chamadas se sobrepõem e o loop continua respondendo
+    assert duracao < 0.55
+    assert ticks > 10
+    service.close()
+
+
+def test_run_blocking_respeita_timeout(monkeypatch):
+    service = criar_servico(monkeypatch)
+    service.call_timeout = 0.05
+
+    async def cenario():
+        try:
+            await service._run_blocking(time.sleep, 0.3)
+        except Exception as e:
+            return str(e)
+        return None
+
+    erro = asyncio.run(cenario())
+
+    assert erro is not None and "Tempo limite" in erro
+    service.close()
+
+
+def test_chamadas_presas_nao_tomam_o_pool_em_silencio(monkeypatch):
+    service = criar_servico(monkeypatch)
+    service.call_timeout = 0.05
+    service.max_threads = 2
+    liberar = threading.Event()
+
+    async def tentar(func, *args):
+        inicio = time.perf_counter()
+        try:
+            resultado = await service._run_blocking(func, *args)
+        except Exception as e:
+            resultado = str(e)
+        return resultado, time.perf_counter() - inicio
+
+    async def cenario():
+        # Duas chamadas que nunca voltam sozinhas: as duas vagas ficam presas
+        presas = await asyncio.gather(tentar(liberar.wait), tentar(liberar.wait))
+        travado = await tentar(lambda: "ok")
+        liberar.set()
+        await asyncio.sleep(0.05)
+        return presas, travado, await tentar(lambda: "ok")
+
+    presas, (erro, duracao), (resultado, _) = asyncio.run(cenario())
+
+    assert all("Tempo limite" in erro for erro, _ in presas)
+    # Falha na hora, sem esperar o timeout na fila de um pool sem vagas
+    assert "travadas" in erro and duracao < 0.01
+    assert resultado == "ok"
+    service.close()
+
+
+def test_falha_no_login_ativa_mock(monkeypatch):
+    service = criar_servico(monkeypatch)
+    chamadas = []
+
+    def login_falho():
+        chamadas.append(1)
+        raise Exception("Credenciais do Instagram não configuradas no .env")
+
+    service._login = login_falho
+
+    async def cenario():
+        return await asyncio.gather(service.ensure_login(), service.ensure_login())
+
+    resultados = asyncio.run(cenario())
+
+    assert resultados == [False, False]
+    assert len(chamadas) == 1
+    assert service.use_mock is True
+    assert service.login_info()["estado"] == "falhou"
+    service.close()
+
+
+def test_rate_limit_falha_na_hora_com_backoff(monkeypatch):
+    service = criar_servico(monkeypatch)
+    service.login_status = "pronto"
+    service.L = SimpleNamespace(context=None)
+
+    def from_username(context, username):
+        raise instaloader.exceptions.ConnectionException("429 Too Many Requests")
+
+    monkeypatch.setattr(instaloader.Profile, "from_username", from_username)
+
+    async def cenario():
+        erros = []
+        for _ in range(2):
+            # Depois do primeiro, o próprio bloqueio recusa sem ir ao Instagram
+            with pytest.raises(RequisicaoRecusada) as erro:
+                await service.get_profile_data("ana", vez=Vez(espera_maxima=60))
+            erros.append(erro.value)
+        return erros
+
+    inicio = time.perf_counter()
+    erros = asyncio.run(cenario())
+
+    assert time.perf_counter() - inicio < 1
+    assert erros[0].retry_after == 300
+    assert 299 <= erros[1].retry_after <= 300
+    backoff = service.agendador.backoff()
+    assert backoff["expoente"] == 1
+    assert backoff["proximo_bloqueio"] == 600
+    assert backoff["bloqueado_ate"] is not None
+    service.close()
+
+
+def feed(*shortcodes, fixados=()):
+    """Iterador de posts falsos do instaloader, do mais novo para o mais antigo"""
+    inicio = datetime(2024, 6, 30)
+    return iter(
+        SimpleNamespace(
+            shortcode=sc,
+            likes=100 + i,
+            comments=i,
+            caption=f"post {sc}",
+            date_local=inicio - timedelta(days=30 if sc in fixados else i),
+            is_video=False,
+            is_pinned=sc in fixados,
+        )
+        for i, sc in enumerate(shortcodes)
+    )
+
+
+def coletar(service, posts_iter, anteriores):
+    return asyncio.run(service._coletar_posts(posts_iter, anteriores))
+
+
+def test_coleta_atualiza_a_primeira_pagina_e_para_no_conhecido_seguinte(monkeypatch):
+    service = criar_servico(monkeypatch)
+    service.max_posts = 30
+    posts = [f"p{i}" for i in range(20)]
+    anteriores = [{"shortcode": sc} for sc in posts[2:] + ["fixo"]]
+    posts_iter = feed("fixo", *posts, fixados=("fixo",))
+
+    novos, atualizados = coletar(service, posts_iter, anteriores)
+
+    assert [p["shortcode"] for p in novos] == ["p0", "p1"]
+    # o fixado não interrompe; a primeira página (12 posts) vem de graça
+    assert [p["shortcode"] for p in atualizados] == ["fixo"] + posts[2:11]
+    assert next(posts_iter).shortcode == "p11"
+    service.close()
+
+
+def test_coleta_atualiza_recentes_configurados(monkeypatch):
+    service = criar_servico(monkeypatch)
+    service.max_posts = 30
+    service.refresh_recentes = 2
+    posts = [f"p{i}" for i in range(20)]
+    anteriores = [{"shortcode": sc} for sc in posts[1:]]
+    posts_iter = feed(*posts)
+
+    novos, atualizados = coletar(service, posts_iter, anteriores)
+
+    assert [p["shortcode"] for p in novos] == ["p0"]
+    # a primeira página inteira e mais 2 posts conhecidos depois dela
+    assert [p["shortcode"] for p in atualizados] == posts[1:14]
+    assert next(posts_iter).shortcode == "p14"
+    service.close()
+
+
+def test_primeira_coleta_respeita_limite(monkeypatch):
+    service = criar_servico(monkeypatch)
+    service.max_posts = 3
+
+    novos, atualizados = coletar(service, feed(*"abcdefgh"), [])
+
+    assert [p["shortcode"] for p in novos] == ["a", "b", "c"]
+    assert atualizados == []
+    service.close()
+
+
+def test_mesclar_posts_substitui_e_ordena():
+    anteriores = [
+        {"shortcode": "b", "likes": 1, "date": "2024-06-28T00:00:00"},
+        {"shortcode": "c", "likes": 1, "date": "2024-06-27T00:00:00"},
+    ]
+    coletados = [
+        {"shortcode": "a", "likes": 5, "date": "2024-06-29T00:00:00"},
+        {"shortcode": "b", "likes": 9, "date": "2024-06-28T00:00:00"},
+    ]
+
+    historico = InstagramService.mesclar_posts(anteriores, coletados, limite=2)
+
+    assert [(p["shortcode"], p["likes"]) for p in historico] == [("a", 5), ("b", 9)]
+
+
+def test_mesclar_posts_remove_apagados_no_intervalo_coletado():
+    anteriores = [
+        {"shortcode": "apagado", "date": "2024-06-28T12:00:00"},
+        {"shortcode": "b", "likes": 1, "date": "2024-06-28T00:00:00"},
+        {"shortcode": "antigo", "date": "2024-06-01T00:00:00"},
+    ]
+    coletados = [
+        {"shortcode": "fixo", "date": "2024-05-01T00:00:00", "is_pinned": True},
+        {"shortcode": "a", "date": "2024-06-29T00:00:00"},
+        {"shortcode": "b", "likes": 9, "date": "2024-06-28T00:00:00"},
+    ]
+
+    historico = InstagramService.mesclar_posts(anteriores, coletados, limite=10)
+
+    assert [p["shortcode"] for p in historico] == ["a", "b", "antigo", "fixo"]
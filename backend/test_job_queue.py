@@ -0,0 +1,175 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from services.job_queue import AdiarJob, JobQueue, JobStore
+
+
+async def analisar(params):
+    await asyncio.sleep(0.01)
+    if params["username"] == "quebrado":
+        raise Exception("Perfil @quebrado não encontrado.")
+    return {"perfil": f"@{params['username']}"}
+
+
+def test_job_concluido_e_falho(tmp_path):
+    async def cenario():
+        fila = JobQueue(
+            JobStore(str(tmp_path / "jobs.sqlite3")), {"analisar": analisar}
+        )
+        await fila.iniciar()
+        try:
+            inicio = time.perf_counter()
+            ok = await fila.enfileirar("analisar", {"username": "ana"})
+            erro = await fila.enfileirar("analisar", {"username": "quebrado"})
+            criacao = time.perf_counter() - inicio
+            return (
+                criacao,
+                await fila.aguardar(ok["id"], 2),
+                await fila.aguardar(erro["id"], 2),
+            )
+        finally:
+            await fila.parar()
+
+    criacao, ok, erro = asyncio.run(cenario())
+
+    assert criacao < 0.1
+    assert ok["status"] == "concluido"
+    assert ok["resultado"] == {"perfil": "@ana"}
+    assert erro["status"] == "falhou"
+    assert "não encontrado" in erro["erro"]
+
+
+def test_jobs_sobrevivem_a_reinicio(tmp_path):
+    caminho = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(caminho)
+    # Job que estava em execução quando o processo anterior morreu
+    orfao = store.criar("analisar", {"username": "bia"})
+    store.reivindicar_proximo()
+    store._conexao().execute(
+        "UPDATE jobs SET atualizado_em = 0 WHERE id = ?", (orfao["id"],)
+    )
+    pendente = store.criar("analisar", {"username": "ana"})
+
+    async def cenario():
+        fila = JobQueue(JobStore(caminho), {"analisar": analisar})
+        await fila.iniciar()
+        try:
+            return [await fila.aguardar(j["id"], 2) for j in (pendente, orfao)]
+        finally:
+            await fila.parar()
+
+    resultados = asyncio.run(cenario())
+
+    assert [j["status"] for j in resultados] == ["concluido", "concluido"]
+    assert resultados[1]["tentativas"] == 2
+
+
+def test_agendamento_respeita_executar_apos(tmp_path):
+    async def cenario():
+        fila = JobQueue(
+            JobStore(str(tmp_path / "jobs.sqlite3")),
+            {"analisar": analisar},
+            intervalo_busca=0.05,
+        )
+        await fila.iniciar()
+        try:
+            job = await fila.enfileirar(
+                "analisar", {"username": "ana"}, executar_apos=time.time() + 0.3
+            )
+            cedo = await fila.aguardar(job["id"], 0.1)
+            tarde = await fila.aguardar(job["id"], 2)
+            return cedo, tarde
+        finally:
+            await fila.parar()
+
+    cedo, tarde = asyncio.run(cenario())
+
+    assert cedo["status"] == "pendente"
+    assert tarde["status"] == "concluido"
+
+
+def test_job_adiado_volta_para_a_fila_e_retoma(tmp_path):
+    execucoes = []
+
+    async def bloqueado_uma_vez(params):
+        execucoes.append(time.perf_counter())
+        if len(execucoes) == 1:
+            raise AdiarJob(0.3, "Rate limiting: retomando em 0.3s")
+        return {"perfil": f"@{params['username']}"}
+
+    async def cenario():
+        fila = JobQueue(
+            JobStore(str(tmp_path / "jobs.sqlite3")),
+            {"analisar": bloqueado_uma_vez},
+            intervalo_busca=0.05,
+        )
+        await fila.iniciar()
+        try:
+            job = await fila.enfileirar("analisar", {"username": "ana"})
+            adiado = await fila.aguardar(job["id"], 0.1)
+            return adiado, await fila.aguardar(job["id"], 2)
+        finally:
+            await fila.parar()
+
+    adiado, final = asyncio.run(cenario())
+
+    assert adiado["status"] == "pendente"
+    assert "retomando" in adiado["erro"]
+    assert final["status"] == "concluido"
+    assert final["tentativas"] == 2
+    assert execucoes[1] - execucoes[0] >= 0.3
+
+
+def test_long_poll_nao_deixa_eventos_para_tras(tmp_path):
+    caminho = str(tmp_path / "jobs.sqlite3")
+
+    async def cenario():
+        fila = JobQueue(JobStore(caminho), {"analisar": analisar})
+        # Sem workers locais: o job só seria concluído por outro processo
+        job = await fila.enfileirar("analisar", {"username": "ana"})
+        primeira = asyncio.ensure_future(fila.aguardar(job["id"], 0.1))
+        segunda = asyncio.ensure_future(fila.aguardar(job["id"], 0.3))
+        await primeira
+        # A segunda espera ainda usa o evento do job
+        durante = dict(fila._concluidos)
+        await segunda
+        return durante, fila._concluidos, fila._aguardando
+
+    durante, concluidos, aguardando = asyncio.run(cenario())
+
+    assert len(durante) == 1
+    assert concluidos == {} and aguardando == {}
+
+
+def test_workers_ociosos_nao_travam_o_event_loop(tmp_path):
+    caminho = str(tmp_path / "jobs.sqlite3")
+
+    def outro_processo_escrevendo(segundos):
+        conn = sqlite3.connect(caminho, isolation_level=None)
+        conn.execute("BEGIN IMMEDIATE")
+        time.sleep(segundos)
+        conn.execute("COMMIT")
+        conn.close()
+
+    async def cenario():
+        fila = JobQueue(JobStore(caminho), {"analisar": analisar}, intervalo_busca=0.02)
+        await fila.iniciar()
+        maior_pausa = 0.0
+        threading.Thread(target=outro_processo_escrevendo, args=(0.3,)).start()
+        try:
+            fim = time.perf_counter() + 0.4
+            while time.perf_counter() < fim:
+                antes = time.perf_counter()
+                await asyncio.sleep(0.01)
+                maior_pausa = max(maior_pausa, time.perf_counter() - antes)
+            job = await fila.enfileirar("analisar", {"username": "ana"})
+            return maior_pausa, await fila.aguardar(job["id"], 2)
+        finally:
+            await fila.parar()
+
+    maior_pausa, job = asyncio.run(cenario())
+
+    # Os workers esperaram o lock em threads; o loop seguiu rodando
+    assert maior_pausa < 0.1
+    assert job["status"] == "concluido"
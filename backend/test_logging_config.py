@@ -0,0 +1,84 @@
+import io
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.logging_config import (
+    ID_REQUISICAO,
+    CorrelacionarRequisicoes,
+    configurar_logs,
+    encerrar_logs,
+)
+
+logger = logging.getLogger("services.teste")
+
+
+@pytest.fixture
+def saida():
+    destino = io.StringIO()
+    configurar_logs("INFO", "json", destino)
+    yield destino
+    encerrar_logs()
+
+
+def linhas(destino: io.StringIO) -> list:
+    encerrar_logs()  # esvazia a fila antes de ler
+    return [json.loads(linha) for linha in destino.getvalue().splitlines()]
+
+
+def test_json_com_campos_extras_nivel_e_id_de_correlacao(saida):
+    token = ID_REQUISICAO.set("abc123")
+    try:
+        logger.info("Dados coletados", extra={"username": "loja", "posts": 12})
+        logger.debug("Detalhe que o LOG_LEVEL=INFO descarta")
+    finally:
+        ID_REQUISICAO.reset(token)
+    try:
+        raise ValueError("falhou")
+    except ValueError:
+        logger.exception("Erro ao calcular métricas")
+    logging.getLogger("httpx").info("Biblioteca fica em WARNING")
+
+    registros = linhas(saida)
+
+    assert len(registros) == 2
+    assert registros[0]["msg"] == "Dados coletados"
+    assert registros[0]["nivel"] == "INFO"
+    assert registros[0]["logger"] == "services.teste"
+    assert registros[0]["id_requisicao"] == "abc123"
+    assert (registros[0]["username"], registros[0]["posts"]) == ("loja", 12)
+    assert registros[1]["id_requisicao"] == "-"
+    assert "ValueError: falhou" in registros[1]["erro"]
+
+
+def test_middleware_propaga_e_devolve_o_id_da_requisicao(saida):
+    app = FastAPI()
+    app.add_middleware(CorrelacionarRequisicoes)
+
+    @app.get("/perfil/{username}")
+    async def perfil(username: str):
+        logger.info("Perfil pedido", extra={"username": username})
+        return {}
+
+    cliente = TestClient(app)
+    enviado = cliente.get("/perfil/a", headers={"X-Request-ID": "cliente-1"})
+    gerado = cliente.get("/perfil/b")
+
+    registros = linhas(saida)
+
+    assert enviado.headers["x-request-id"] == "cliente-1"
+    assert len(gerado.headers["x-request-id"]) == 12
+    assert [r["id_requisicao"] for r in registros] == [
+        "cliente-1",
+        gerado.headers["x-request-id"],
+    ]
+
+
+def test_configuracao_invalida():
+    with pytest.raises(ValueError):
+        configurar_logs("INFO", "xml")
+    with pytest.raises(ValueError):
+        configurar_logs("VERBOSO", "json")
@@ -0,0 +1,174 @@
+import asyncio
+import importlib
+import json
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config import Config
+from services.report_parser import NOMES_SECOES
+from services.telemetry import REGISTRO
+
+
+def importar_main(tmp_path, monkeypatch, **config):
+    """main.py importado do zero, em modo mock e com os bancos em tmp_path"""
+    monkeypatch.setenv("USE_MOCK_DATA", "true")
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", None)
+    monkeypatch.setattr(Config, "INSTAGRAM_LOGIN_ON_STARTUP", False)
+    monkeypatch.setattr(Config, "CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(Config, "CACHE_DB_PATH", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(Config, "RATE_LIMIT_DB_PATH", str(tmp_path / "rl.sqlite3"))
+    monkeypatch.setattr(Config, "JOB_DB_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(Config, "HISTORICO_DIR", "")
+    for nome, valor in config.items():
+        monkeypatch.setattr(Config, nome, valor)
+    # main registra as métricas que leem os serviços no REGISTRO global
+    monkeypatch.setattr(REGISTRO, "_metricas", dict(REGISTRO._metricas))
+    sys.modules.pop("main", None)
+    return importlib.import_module("main")
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    yield importar_main(tmp_path, monkeypatch)
+    sys.modules.pop("main", None)
+
+
+def contar_coletas(main, monkeypatch) -> list:
+    """Substitui a coleta do InstagramService por uma que registra os usernames"""
+    coletas = []
+    coletar = main.instagram_service.get_profile_data
+
+    async def get_profile_data(username, *args, **kwargs):
+        coletas.append(username)
+        return await coletar(username, *args, **kwargs)
+
+    monkeypatch.setattr(main.instagram_service, "get_profile_data", get_profile_data)
+    return coletas
+
+
+def test_analise_persistida_e_servida_por_outro_rate_limiter(api, monkeypatch):
+    coletas = contar_coletas(api, monkeypatch)
+    with TestClient(api.app) as cliente:
+        primeira = cliente.get("/analisar/loja").json()
+
+        # Outro worker (ou a API reiniciada): memória vazia, mesmo SQLite
+        monkeypatch.setattr(api, "rate_limiter", api.RateLimiter(api.instagram_service))
+        segunda = cliente.get("/analisar/loja").json()
+        atualizada = cliente.get("/analisar/loja?refresh=true").json()
+
+    assert coletas == ["loja", "loja"]
+    assert "cached" not in primeira
+    assert segunda["cached"] is True
+    assert segunda["metricas"] == primeira["metricas"]
+    assert "cached" not in atualizada
+
+
+def eventos_ndjson(resposta) -> list:
+    return [json.loads(linha) for linha in resposta.text.splitlines()]
+
+
+def eventos_sse(resposta) -> list:
+    eventos = []
+    for bloco in resposta.text.strip().split("\n\n"):
+        evento, dados = bloco.split("\n")
+        eventos.append(
+            {"evento": evento[len("event: ") :], **json.loads(dados[len("data: ") :])}
+        )
+    return eventos
+
+
+def test_stream_envia_etapas_em_ordem_e_termina_com_a_resposta(api):
+    with TestClient(api.app) as cliente:
+        resposta = cliente.get("/analisar/loja/stream")
+        eventos = eventos_ndjson(resposta)
+
+    assert resposta.headers["content-type"] == "application/x-ndjson"
+    nomes = [e["evento"] for e in eventos]
+    assert nomes == ["perfil", "metricas"] + ["secao"] * len(NOMES_SECOES) + ["fim"]
+    assert [e["secao"] for e in eventos if e["evento"] == "secao"] == list(NOMES_SECOES)
+    fim = eventos[-1]
+    assert fim["status"] == "success"
+    assert fim["dados"] == eventos[0]["dados"]
+    assert fim["metricas"] == eventos[1]["metricas"]
+    assert list(fim["relatorio_ia"]) == list(NOMES_SECOES)
+
+
+def test_stream_do_cache_em_sse(api, monkeypatch):
+    coletas = contar_coletas(api, monkeypatch)
+    with TestClient(api.app) as cliente:
+        analise = cliente.get("/analisar/loja").json()
+        eventos = eventos_sse(cliente.get("/analisar/loja/stream?formato=sse"))
+
+    assert coletas == ["loja"]
+    assert [e["evento"] for e in eventos[:2]] == ["perfil", "metricas"]
+    assert eventos[-1]["evento"] == "fim"
+    assert eventos[-1]["cached"] is True
+    assert eventos[-1]["metricas"] == analise["metricas"]
+
+
+def test_stream_limitado_sem_cache_responde_429(api, monkeypatch):
+    monkeypatch.setattr(
+        api.rate_limiter, "check_rate_limit", lambda username, vez=None: (False, 120)
+    )
+    with TestClient(api.app) as cliente:
+        resposta = cliente.get("/analisar/loja/stream")
+
+    assert resposta.status_code == 429
+    assert resposta.json()["detail"]["retry_after"] == 120
+
+
+def test_stream_termina_com_erro_quando_a_analise_falha(api, monkeypatch):
+    async def relatorio_quebrado(dados_perfil, metricas, camada="auto"):
+        yield NOMES_SECOES[0], "Resumo"
+        raise RuntimeError("modelo indisponível")
+
+    monkeypatch.setattr(api.ai_service, "gerar_relatorio_stream", relatorio_quebrado)
+    with TestClient(api.app) as cliente:
+        resposta = cliente.get("/analisar/loja/stream")
+        eventos = eventos_ndjson(resposta)
+
+    assert resposta.status_code == 200
+    assert [e["evento"] for e in eventos[:3]] == ["perfil", "metricas", "secao"]
+    assert eventos[-1] == {"evento": "erro", "detail": "modelo indisponível"}
+    assert "fim" not in [e["evento"] for e in eventos]
+
+
+def test_historico_consultado_fora_do_event_loop(tmp_path, monkeypatch):
+    main = importar_main(
+        tmp_path, monkeypatch, HISTORICO_DIR=str(tmp_path / "historico")
+    )
+    no_loop = []
+    consultar = main.serie_temporal.consultar
+
+    def consultar_registrando(*args, **kwargs):
+        try:
+            no_loop.append(asyncio.get_running_loop() is not None)
+        except RuntimeError:
+            no_loop.append(False)
+        return consultar(*args, **kwargs)
+
+    monkeypatch.setattr(main.serie_temporal, "consultar", consultar_registrando)
+    with TestClient(main.app) as cliente:
+        # Coletas mock não gravam histórico: registra uma direto na série
+        dados = cliente.get("/perfil/loja").json()
+        main.serie_temporal.registrar(dados)
+        resposta = cliente.get("/historico/loja")
+
+    assert resposta.status_code == 200
+    assert resposta.json()["perfil"] == "@loja"
+    assert no_loop == [False]
+    sys.modules.pop("main", None)
+
+
+def test_pdf_gerado_na_hora_ja_sai_com_etag(api):
+    with TestClient(api.app) as cliente:
+        primeiro = cliente.get("/gerar-pdf/loja?use_cache=false")
+        etag = primeiro.headers["etag"]
+        revalidado = cliente.get("/gerar-pdf/loja", headers={"If-None-Match": etag})
+
+    assert primeiro.status_code == 200
+    assert primeiro.content.startswith(b"%PDF")
+    assert revalidado.status_code == 304
+    assert revalidado.headers["etag"] == etag
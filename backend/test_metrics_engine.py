@@ -0,0 +1,90 @@
+from services.metrics_engine import calcular_metricas, calcular_metricas_lote
+from services.mock_service import MockInstagramService
+
+
+def perfil(seguidores, posts):
+    return {"seguidores": seguidores, "posts": posts}
+
+
+POSTS = [
+    {
+        "likes": 100,
+        "comments": 10,
+        "caption": "Coleção nova #moda #look",
+        "date": "2024-01-01T10:00:00",
+        "is_video": True,
+        "url": "https://www.instagram.com/p/a/",
+    },
+    {
+        "likes": 300,
+        "comments": 20,
+        "caption": "Promo #promo #moda",
+        "date": "2024-01-15T10:00:00",
+        "is_video": False,
+        "url": "https://www.instagram.com/p/b/",
+    },
+    {
+        "likes": 200,
+        "comments": 120,
+        "caption": "Bastidores",
+        "date": "2024-01-29T10:00:00",
+        "is_video": False,
+        "url": "https://www.instagram.com/p/c/",
+    },
+]
+
+
+def test_metricas_de_um_perfil():
+    metricas = calcular_metricas(perfil(1000, POSTS))
+
+    assert metricas["posts_analisados"] == 3
+    assert metricas["total_interacoes"] == 750
+    assert metricas["media_likes"] == metricas["media_curtidas"] == 200
+    assert metricas["media_comentarios"] == 50
+    assert metricas["taxa_engajamento"] == 25.0
+    assert metricas["engajamento_medio"] == "25.0%"
+    assert metricas["razao_video_foto"] == 1 / 3
+    # 3 posts em 4 semanas
+    assert metricas["posts_semanais"] == 0.8
+    # empate em interações: vale o primeiro, como no max() anterior
+    assert metricas["melhor_post"]["url"] == "https://www.instagram.com/p/b/"
+    assert metricas["principais_hashtags"] == ["moda", "look", "promo"]
+
+
+def test_lote_igual_ao_calculo_individual():
+    perfis = [
+        perfil(1000, POSTS),
+        perfil(0, POSTS),
+        perfil(500, []),
+        perfil(50, POSTS[1:]),
+    ]
+
+    lote = calcular_metricas_lote(perfis)
+
+    assert lote == [calcular_metricas(p) for p in perfis]
+    assert lote[1]["posts_analisados"] == 0
+    assert lote[2]["melhor_post"] is None
+
+
+def test_campo_hashtags_tem_prioridade_e_datas_invalidas():
+    posts = [
+        {"likes": 1, "comments": 0, "hashtags": ["b", "a"], "date": "ontem"},
+        {"likes": 1, "comments": 0, "caption": "#a #c"},
+    ]
+
+    metricas = calcular_metricas(perfil(10, posts))
+
+    assert metricas["principais_hashtags"] == ["a", "b", "c"]
+    assert metricas["posts_semanais"] == 0
+
+
+def test_servicos_usam_o_mesmo_esquema():
+    from services.instagram_service import InstagramService
+
+    dados = perfil(1000, POSTS)
+    instagram = InstagramService()
+    try:
+        assert instagram.calcular_metricas(dados) == calcular_metricas(dados)
+    finally:
+        instagram.close()
+    assert MockInstagramService().calcular_metricas(dados) == calcular_metricas(dados)
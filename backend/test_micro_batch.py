@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from services.micro_batch import MicroLote
+
+
+def test_lote_sai_ao_encher_ou_ao_fim_da_espera():
+    lotes = []
+
+    async def processar(itens):
+        lotes.append(list(itens))
+        return [item * 10 for item in itens]
+
+    async def cenario():
+        lote = MicroLote(processar, tamanho=3, espera=0.2)
+        inicio = time.perf_counter()
+        cheios = await asyncio.gather(*[lote.submeter(i) for i in range(3)])
+        duracao_cheio = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        sobras = await asyncio.gather(*[lote.submeter(i) for i in (7, 8)])
+        duracao_sobras = time.perf_counter() - inicio
+        return cheios, duracao_cheio, sobras, duracao_sobras, lote.stats()
+
+    cheios, duracao_cheio, sobras, duracao_sobras, stats = asyncio.run(cenario())
+
+    assert cheios == [0, 10, 20]
+    assert sobras == [70, 80]
+    assert lotes == [[0, 1, 2], [7, 8]]
+    # O lote cheio não espera a janela; o incompleto sai quando ela fecha
+    assert duracao_cheio < 0.1
+    assert 0.15 < duracao_sobras < 0.5
+    assert stats["lotes"] == 2 and stats["itens"] == 5
+
+
+def test_falha_do_lote_chega_a_todos_os_itens():
+    async def processar(itens):
+        raise RuntimeError("api fora do ar")
+
+    async def cenario():
+        lote = MicroLote(processar, tamanho=2, espera=0.05)
+        return await asyncio.gather(
+            lote.submeter(1), lote.submeter(2), return_exceptions=True
+        )
+
+    resultados = asyncio.run(cenario())
+
+    assert all(isinstance(r, RuntimeError) for r in resultados)
+    assert [str(r) for r in resultados] == ["api fora do ar"] * 2
@@ -0,0 +1,91 @@
+from services.models import Analise, Post, PostColumns, Profile
+
+POSTS = [
+    {
+        "likes": 120,
+        "comments": 8,
+        "caption": "Coleção nova ✨ #moda",
+        "date": "2024-01-15T10:00:00",
+        "is_video": False,
+        "url": "https://www.instagram.com/p/abc/",
+    },
+    {
+        "id": "mock_post_2",
+        "likes": 80,
+        "comments": 3,
+        "caption": "Bastidores",
+        "date": None,
+        "is_video": True,
+        "url": "#",
+        "hashtags": ["moda"],
+    },
+]
+RESPOSTA = {
+    "perfil": "@loja",
+    "dados": {
+        "username": "loja",
+        "nome_completo": "Loja",
+        "biografia": "Moda feminina",
+        "seguidores": 1500,
+        "seguindo": 300,
+        "total_posts": 42,
+        "foto_perfil": None,
+        "is_business": True,
+        "_real_data": True,
+        "posts": POSTS,
+    },
+    "metricas": {"taxa_engajamento": 7.07, "principais_hashtags": ["moda"]},
+    "relatorio_ia": {"resumo_negocio": "Resumo"},
+    "status": "success",
+    "data_source": "instagram",
+    "cached": False,
+}
+
+
+def test_ida_e_volta_preserva_o_formato_json():
+    analise = Analise.from_dict(RESPOSTA)
+
+    assert analise.to_dict() == RESPOSTA
+    assert isinstance(analise.dados, Profile)
+    assert analise.dados.extras == {"is_business": True, "_real_data": True}
+
+
+def test_posts_em_colunas():
+    colunas = PostColumns.from_list(POSTS)
+
+    assert len(colunas) == 2
+    assert colunas.likes.tolist() == [120, 80]
+    assert colunas.is_video.tolist() == [False, True]
+    assert colunas.to_list() == POSTS
+    assert [p.to_dict() for p in colunas] == POSTS
+    assert colunas[1] == Post.from_dict(POSTS[1])
+
+
+def test_to_dict_devolve_copia_independente():
+    analise = Analise.from_dict(RESPOSTA)
+
+    resposta = analise.to_dict()
+    resposta["dados"]["_mock_data"] = True
+    resposta["dados"]["posts"][0]["likes"] = 0
+    resposta["relatorio_ia"]["resumo_negocio"] = "alterado"
+
+    assert analise.to_dict() == RESPOSTA
+
+
+def test_registros_sem_dict_por_instancia():
+    for objeto in (Post(), Profile("loja"), PostColumns.from_list([])):
+        assert not hasattr(objeto, "__dict__")
+
+
+def test_campos_ausentes_nao_aparecem_na_volta():
+    parcial = {
+        "perfil": "@loja",
+        "dados": {"username": "loja", "posts": [{"likes": 5, "caption": "Oi"}]},
+        "status": "limited",
+    }
+
+    assert Analise.from_dict(parcial).to_dict() == parcial
+    assert PostColumns.from_list(parcial["dados"]["posts"])[0].to_dict() == {
+        "likes": 5,
+        "caption": "Oi",
+    }
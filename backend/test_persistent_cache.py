@@ -0,0 +1,107 @@
+import asyncio
+import multiprocessing
+import sqlite3
+import threading
+import time
+from services.persistent_cache import SQLiteCache
+
+
+def criar_cache(caminho, **kwargs):
+    kwargs.setdefault("ttl_seconds", 60)
+    return SQLiteCache(str(caminho), namespace="analisar", **kwargs)
+
+
+def test_sobrevive_a_reinicio(tmp_path):
+    caminho = tmp_path / "cache.sqlite3"
+    criar_cache(caminho).set("ana", {"perfil": "@ana", "metricas": {"taxa": 3.5}})
+
+    valor, criado_em = criar_cache(caminho).get_entry("ana")
+
+    assert valor == {"perfil": "@ana", "metricas": {"taxa": 3.5}}
+    assert time.time() - criado_em.timestamp() < 5
+
+
+def test_versao_e_ttl(tmp_path):
+    caminho = tmp_path / "cache.sqlite3"
+    criar_cache(caminho).set("ana", {"perfil": "@ana"})
+
+    assert "ana" not in criar_cache(caminho, versao=2)
+
+    curto = criar_cache(caminho, ttl_seconds=0.05)
+    curto.set("bia", {"perfil": "@bia"})
+    time.sleep(0.06)
+    assert curto.get("bia") is None
+    assert curto.purge_expired() == 1
+
+
+def test_limite_de_entradas(tmp_path):
+    cache = criar_cache(tmp_path / "cache.sqlite3", max_entries=10)
+    cache.PRUNE_EVERY = 5
+    for i in range(30):
+        cache.set(f"perfil{i}", {"i": i})
+
+    assert len(cache) == 10
+    assert "perfil29" in cache and "perfil0" not in cache
+
+
+def _escrever(caminho, worker):
+    cache = criar_cache(caminho)
+    for i in range(50):
+        cache.set(f"w{worker}-{i}", {"worker": worker, "i": i})
+
+
+def test_escritas_concorrentes_de_varios_processos(tmp_path):
+    caminho = str(tmp_path / "cache.sqlite3")
+    criar_cache(caminho)
+    processos = [
+        multiprocessing.Process(target=_escrever, args=(caminho, w)) for w in range(4)
+    ]
+    for p in processos:
+        p.start()
+    for p in processos:
+        p.join()
+
+    cache = criar_cache(caminho)
+    assert all(p.exitcode == 0 for p in processos)
+    assert len(cache) == 200
+    assert cache.get("w3-49") == {"worker": 3, "i": 49}
+
+
+def test_set_async_nao_trava_o_event_loop(tmp_path):
+    caminho = str(tmp_path / "cache.sqlite3")
+    cache = criar_cache(caminho)
+    travado, liberar = threading.Event(), threading.Event()
+
+    def outro_worker_escrevendo():
+        conn = sqlite3.connect(caminho, isolation_level=None)
+        conn.execute("BEGIN IMMEDIATE")
+        travado.set()
+        liberar.wait()
+        conn.execute("COMMIT")
+        conn.close()
+
+    async def cenario():
+        maior_pausa = 0.0
+
+        async def contador():
+            nonlocal maior_pausa
+            while True:
+                antes = time.perf_counter()
+                await asyncio.sleep(0.01)
+                maior_pausa = max(maior_pausa, time.perf_counter() - antes)
+
+        threading.Thread(target=outro_worker_escrevendo).start()
+        travado.wait()
+        tarefa = asyncio.ensure_future(contador())
+        await asyncio.sleep(0.02)
+        threading.Timer(0.3, liberar.set).start()
+        await cache.set_async("ana", {"perfil": "@ana"})
+        # O contador mede a pausa quando volta a rodar
+        await asyncio.sleep(0.02)
+        tarefa.cancel()
+        return maior_pausa
+
+    maior_pausa = asyncio.run(cenario())
+
+    assert maior_pausa < 0.1
+    assert cache.get("ana") == {"perfil": "@ana"}
@@ -0,0 +1,173 @@
+import asyncio
+import multiprocessing
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from services.rate_limit_state import EstadoLimite, EstadoLimiteSQLite
+from services.scheduler import AgendadorRequisicoes
+
+# Balde praticamente sem reposição: só a capacidade inicial conta
+TAXA = 1e-9
+
+
+def consumir_varias(caminho, tentativas, saida):
+    estado = EstadoLimiteSQLite(caminho)
+    sucessos = sum(
+        estado.consumir(1, TAXA, 20, time.time())[0] for _ in range(tentativas)
+    )
+    saida.put(sucessos)
+
+
+def test_consumo_atomico_entre_processos(tmp_path):
+    caminho = str(tmp_path / "limites.sqlite3")
+    EstadoLimiteSQLite(caminho).ler(TAXA, 20, time.time())
+    saida = multiprocessing.Queue()
+    processos = [
+        multiprocessing.Process(target=consumir_varias, args=(caminho, 10, saida))
+        for _ in range(4)
+    ]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join(timeout=30)
+
+    assert sum(saida.get() for _ in processos) == 20
+
+
+def test_workers_compartilham_tokens_bloqueio_e_backoff(tmp_path):
+    caminho = str(tmp_path / "limites.sqlite3")
+    worker_a = AgendadorRequisicoes(3600, rajada=2, estado=EstadoLimiteSQLite(caminho))
+    worker_b = AgendadorRequisicoes(3600, rajada=2, estado=EstadoLimiteSQLite(caminho))
+
+    async def cenario():
+        await worker_a.aguardar("interativo", "a")
+        await worker_a.aguardar("interativo", "a")
+
+    asyncio.run(cenario())
+    # O worker B enxerga o balde vazio que o A deixou
+    assert worker_b.admitir("interativo", "b").eta == pytest.approx(1, abs=0.05)
+
+    espera, expoente = asyncio.run(worker_a.registrar_rate_limit(minimo=10))
+    assert (round(espera), expoente) == (300, 1)
+    espera, expoente = asyncio.run(worker_b.registrar_rate_limit(minimo=10))
+    assert (round(espera), expoente) == (600, 2)
+    assert worker_a.bloqueado_ate() == worker_b.bloqueado_ate()
+    assert worker_b.admitir("interativo", "b", espera_maxima=60).aceita is False
+
+    asyncio.run(worker_a.zerar_backoff())
+    assert worker_b.backoff()["expoente"] == 0
+
+
+def test_backoff_dobra_ate_o_maximo_e_respeita_o_minimo():
+    estado = EstadoLimite()
+    agora = time.time()
+    esperas = [
+        estado.registrar_rate_limit(600, 300, 7200, 1, 1, agora)[0] for _ in range(7)
+    ]
+
+    assert esperas == [600, 600, 1200, 2400, 4800, 7200, 7200]
+
+
+def segurar_lock_de_escrita(caminho, segundos):
+    """Outro worker no meio de uma transação de escrita por N segundos"""
+    travado = threading.Event()
+
+    def segurar():
+        conn = sqlite3.connect(caminho, isolation_level=None)
+        conn.execute("BEGIN IMMEDIATE")
+        travado.set()
+        time.sleep(segundos)
+        conn.execute("COMMIT")
+        conn.close()
+
+    threading.Thread(target=segurar).start()
+    travado.wait()
+
+
+def test_leitura_nao_grava_nem_espera_pelo_lock(tmp_path):
+    caminho = str(tmp_path / "limites.sqlite3")
+    estado = EstadoLimiteSQLite(caminho)
+    estado.consumir(1, TAXA, 20, time.time())
+    segurar_lock_de_escrita(caminho, 0.5)
+
+    inicio = time.perf_counter()
+    balde = estado.ler(TAXA, 20, time.time())
+    duracao = time.perf_counter() - inicio
+    time.sleep(0.6)
+
+    assert duracao < 0.1
+    assert balde.tokens == pytest.approx(19)
+    linhas = sqlite3.connect(caminho).execute("SELECT tokens FROM limites")
+    assert linhas.fetchall() == [(pytest.approx(19),)]
+
+
+def test_escritas_nao_travam_o_event_loop(tmp_path):
+    caminho = str(tmp_path / "limites.sqlite3")
+    agendador = AgendadorRequisicoes(
+        36_000, rajada=2, estado=EstadoLimiteSQLite(caminho)
+    )
+    agendador.estado.ler(agendador.taxa, agendador.capacidade, time.time())
+
+    async def cenario():
+        maior_pausa = 0.0
+
+        async def contador():
+            nonlocal maior_pausa
+            while True:
+                antes = time.perf_counter()
+                await asyncio.sleep(0.01)
+                maior_pausa = max(maior_pausa, time.perf_counter() - antes)
+
+        tarefa = asyncio.ensure_future(contador())
+        await asyncio.sleep(0.02)
+        segurar_lock_de_escrita(caminho, 0.3)
+        # Uma pelo caminho direto e três pela rodada de despacho
+        esperas = await asyncio.gather(
+            *(agendador.aguardar("interativo", f"perfil{i}") for i in range(4))
+        )
+        tarefa.cancel()
+        return maior_pausa, esperas
+
+    maior_pausa, esperas = asyncio.run(cenario())
+
+    # O loop seguiu rodando enquanto as escritas esperavam o outro worker
+    assert maior_pausa < 0.1
+    assert min(esperas) >= 0.25
+    assert agendador.stats()["admitidas"] == 4
+
+
+def test_bloqueio_e_backoff_nao_travam_o_event_loop(tmp_path):
+    caminho = str(tmp_path / "limites.sqlite3")
+    agendador = AgendadorRequisicoes(3600, estado=EstadoLimiteSQLite(caminho))
+
+    async def cenario():
+        maior_pausa = 0.0
+
+        async def contador():
+            nonlocal maior_pausa
+            while True:
+                antes = time.perf_counter()
+                await asyncio.sleep(0.01)
+                maior_pausa = max(maior_pausa, time.perf_counter() - antes)
+
+        tarefa = asyncio.ensure_future(contador())
+        await asyncio.sleep(0.02)
+        segurar_lock_de_escrita(caminho, 0.2)
+        await agendador.registrar_rate_limit(minimo=10)
+        segurar_lock_de_escrita(caminho, 0.2)
+        await agendador.zerar_backoff()
+        segurar_lock_de_escrita(caminho, 0.2)
+        await agendador.bloquear(60)
+        # O contador mede a pausa quando volta a rodar
+        await asyncio.sleep(0.02)
+        tarefa.cancel()
+        return maior_pausa
+
+    maior_pausa = asyncio.run(cenario())
+
+    assert maior_pausa < 0.1
+    assert agendador.backoff()["expoente"] == 0
+    assert agendador.bloqueado_ate() is not None
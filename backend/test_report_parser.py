@@ -0,0 +1,47 @@
+from services.report_parser import SEM_ANALISE, ParserSecoes, extrair_secoes
+
+RELATORIO = """Resumo do negócio
+Loja de roupas com público jovem.
+
+Pontos fortes
+- Fotos bem produzidas
+
+Oportunidades
+- Mais vídeos curtos
+"""
+
+
+def _em_trechos(texto, tamanho):
+    parser = ParserSecoes()
+    emitidas = []
+    for i in range(0, len(texto), tamanho):
+        emitidas.extend(parser.alimentar(texto[i : i + tamanho]))
+    return emitidas, parser.finalizar()
+
+
+def test_secao_fecha_quando_chega_o_proximo_cabecalho():
+    parser = ParserSecoes()
+
+    assert parser.alimentar("Resumo do negócio\nLoja de roupas") == []
+    assert parser.alimentar(" com público jovem.\nPontos") == []
+    assert parser.alimentar(" fortes\n") == [
+        ("resumo_negocio", "Resumo do negócio\nLoja de roupas com público jovem.")
+    ]
+
+
+def test_resultado_nao_depende_do_tamanho_dos_trechos():
+    esperado = extrair_secoes(RELATORIO)
+    for tamanho in (1, 3, 7, len(RELATORIO)):
+        emitidas, finais = _em_trechos(RELATORIO, tamanho)
+        assert dict(emitidas + finais) == esperado
+
+
+def test_secoes_ausentes_saem_no_final_sem_analise():
+    emitidas, finais = _em_trechos(RELATORIO, 5)
+
+    assert [secao for secao, _ in emitidas] == ["resumo_negocio", "pontos_fortes"]
+    assert finais == [
+        ("oportunidades", "Oportunidades\n- Mais vídeos curtos"),
+        ("pontos_fracos", SEM_ANALISE),
+        ("sugestao_prospeccao", SEM_ANALISE),
+    ]
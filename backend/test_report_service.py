@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+from services import report_templates as templates
+from services.report_service import ReportService
+
+DADOS = {
+    "username": "perfil_teste",
+    "nome_completo": "Perfil Teste",
+    "biografia": "Bio de teste",
+    "seguidores": 1500,
+    "seguindo": 300,
+    "total_posts": 42,
+    "posts": [{"legenda": "Post 1", "curtidas": 10, "comentarios": 2}],
+}
+METRICAS = {"engajamento_medio": "3.2%", "media_likes": 10}
+RELATORIO = {"resumo_negocio": "Resumo", "pontos_fortes": "Fortes"}
+
+
+def test_renderiza_em_memoria_sem_gravar_arquivo(tmp_path):
+    service = ReportService(reports_dir=str(tmp_path))
+
+    conteudo = service.renderizar_pdf("perfil_teste", DADOS, METRICAS, RELATORIO)
+
+    assert conteudo.startswith(b"%PDF")
+    assert os.listdir(tmp_path) == []
+
+
+def test_mesmas_entradas_mesmo_pdf(tmp_path):
+    service = ReportService(reports_dir=str(tmp_path))
+    dados = {**DADOS, "coletado_em": "2024-01-29T10:30:00"}
+
+    primeiro = service.renderizar_pdf("perfil_teste", dados, METRICAS, RELATORIO)
+    time.sleep(1.1)
+    segundo = service.renderizar_pdf("perfil_teste", dados, METRICAS, RELATORIO)
+
+    # O ETag (hash das entradas) vale para os bytes: nada da hora da renderização
+    assert primeiro == segundo
+
+
+def test_renderiza_no_pool_de_processos(tmp_path):
+    service = ReportService(reports_dir=str(tmp_path), max_workers=1)
+    try:
+        conteudo = asyncio.run(
+            service.gerar_pdf_async("perfil_teste", DADOS, METRICAS, RELATORIO)
+        )
+    finally:
+        service.close()
+
+    assert conteudo.startswith(b"%PDF")
+
+
+def test_retencao_de_relatorios(tmp_path):
+    service = ReportService(reports_dir=str(tmp_path))
+    for i in range(4):
+        caminho = tmp_path / f"relatorio_{i}.pdf"
+        caminho.write_bytes(b"%PDF")
+        idade = (10 - i) * 3600
+        os.utime(caminho, (time.time() - idade, time.time() - idade))
+
+    removidos = service.limpar_relatorios(max_idade_horas=8.5, max_arquivos=2)
+
+    # relatorio_0 e _1 passam da idade; além disso só os 2 mais novos ficam
+    assert sorted(os.listdir(tmp_path)) == ["relatorio_2.pdf", "relatorio_3.pdf"]
+    assert len(removidos) == 2
+
+
+def test_pdf_repetido_vem_do_cache(tmp_path):
+    service = ReportService(reports_dir=str(tmp_path), max_workers=1)
+    chave = service.chave_conteudo("perfil_teste", DADOS, METRICAS, RELATORIO)
+
+    try:
+        primeiro = asyncio.run(
+            service.gerar_pdf_async("perfil_teste", DADOS, METRICAS, RELATORIO)
+        )
+        service._get_pool = None  # um segundo render quebraria aqui
+        segundo = asyncio.run(
+            service.gerar_pdf_async("perfil_teste", DADOS, METRICAS, RELATORIO)
+        )
+    finally:
+        service.close()
+
+    assert segundo is primeiro
+    assert chave in service.pdf_cache
+    assert service.pdf_cache.stats()["hits"] == 1
+    outra = service.chave_conteudo("perfil_teste", DADOS, METRICAS, {"resumo": "x"})
+    assert outra != chave
+
+
+def test_trechos_fixos_nao_carregam_estado_entre_renderizacoes(tmp_path):
+    service = ReportService(reports_dir=str(tmp_path))
+    # Textos de tamanhos variados empurram títulos e espaçadores para a
+    # virada de página em posições diferentes a cada renderização
+    for tamanho in range(5, 60, 6):
+        relatorio = {chave: "Texto longo. " * tamanho * 8 for chave in RELATORIO}
+        relatorio["pontos_fracos"] = "Curto."
+        conteudo = service.renderizar_pdf("perfil_teste", DADOS, METRICAS, relatorio)
+        assert conteudo.startswith(b"%PDF")
+
+    assert not hasattr(templates.TITULO, "_postponed")
+    assert all(not hasattr(r, "_postponed") for _, r in templates.SECOES_IA)
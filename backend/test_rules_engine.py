@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from services.rules_engine import REGRAS_PADRAO, MotorRegras
+
+PERFIS = [
+    {"username": "grande", "seguidores": 25000, "verificado": True},
+    {"username": "medio", "seguidores": 3000, "conta_privada": True},
+    {"username": "pequeno", "seguidores": 200},
+]
+METRICAS = [
+    {"taxa_engajamento": 6.25, "posts_semanais": 4},
+    {"taxa_engajamento": 1.5, "posts_semanais": 0.5},
+    {},
+]
+
+
+def test_regras_padrao_por_faixa_de_seguidores():
+    grande, medio, pequeno = MotorRegras.carregar().gerar_lote(PERFIS, METRICAS)
+
+    assert grande["resumo_negocio"].startswith(
+        "@grande é um perfil estabelecido com 25,000"
+    )
+    assert grande["pontos_fortes"] == (
+        "Alta taxa de engajamento (6.2%) • "
+        "Frequência consistente de posts (4.0 posts/semana) • "
+        "Perfil verificado (maior credibilidade) • "
+        "Perfil público (conteúdo acessível)"
+    )
+    assert grande["sugestao_prospeccao"].startswith("Abordagem direta")
+    assert medio["pontos_fortes"] == (
+        "Perfil ativo no Instagram • Presença digital estabelecida"
+    )
+    assert medio["pontos_fracos"] == (
+        "Baixa taxa de engajamento (1.5%) • Frequência baixa de posts • "
+        "Perfil privado (conteúdo restrito)"
+    )
+    assert pequeno["resumo_negocio"].startswith("@pequeno é um perfil emergente")
+    assert pequeno["sugestao_prospeccao"].startswith("Abordagem de mentoria")
+
+
+def test_lote_igual_a_um_por_vez():
+    motor = MotorRegras.carregar()
+
+    lote = motor.gerar_lote(PERFIS, METRICAS)
+
+    assert lote == [motor.gerar(p, m) for p, m in zip(PERFIS, METRICAS)]
+
+
+def test_regras_carregadas_de_arquivo(tmp_path):
+    regras = json.load(open(REGRAS_PADRAO, encoding="utf-8"))
+    regras["resumo_negocio"] = {
+        "tipo": "escolha",
+        "regras": [
+            {
+                "se": [["seguidores", ">=", 1000], ["verificado", "==", True]],
+                "texto": "@{username}: marca verificada",
+            },
+            {"texto": "@{username}: {seguidores} seguidores"},
+        ],
+    }
+    caminho = tmp_path / "regras.json"
+    caminho.write_text(json.dumps(regras), encoding="utf-8")
+
+    relatorios = MotorRegras.carregar(str(caminho)).gerar_lote(PERFIS, METRICAS)
+
+    assert [r["resumo_negocio"] for r in relatorios] == [
+        "@grande: marca verificada",
+        "@medio: 3000 seguidores",
+        "@pequeno: 200 seguidores",
+    ]
+
+
+def test_regra_com_campo_desconhecido_e_rejeitada():
+    regras = json.load(open(REGRAS_PADRAO, encoding="utf-8"))
+    regras["pontos_fortes"]["itens"].append({"texto": "{cidade}"})
+
+    with pytest.raises(ValueError):
+        MotorRegras(regras)
+
+
+def test_flags_da_coleta_real():
+    motor = MotorRegras.carregar()
+    real = {"username": "loja", "seguidores": 3000, "is_private": True}
+    verificado = {"username": "marca", "seguidores": 3000, "is_verified": True}
+
+    privado, publico = motor.gerar_lote([real, verificado], [{}, {}])
+
+    assert "Perfil privado (conteúdo restrito)" in privado["pontos_fracos"]
+    assert "Perfil público" not in privado["pontos_fortes"]
+    assert "Perfil verificado" in publico["pontos_fortes"]
+    assert motor.gerar(real, {}) == privado
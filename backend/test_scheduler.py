@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+
+from services.scheduler import AgendadorRequisicoes, RequisicaoRecusada
+
+# 36.000 por hora: 10 tokens por segundo, um a cada 0,1 s
+POR_HORA = 36_000
+
+
+def test_rajada_imediata_e_depois_no_ritmo_do_balde():
+    agendador = AgendadorRequisicoes(POR_HORA, rajada=2)
+
+    async def cenario():
+        inicio = time.perf_counter()
+        tempos = []
+
+        async def chamar(i):
+            await agendador.aguardar("interativo", f"perfil{i}")
+            tempos.append(time.perf_counter() - inicio)
+
+        await asyncio.gather(*(chamar(i) for i in range(4)))
+        return sorted(tempos)
+
+    tempos = asyncio.run(cenario())
+
+    assert tempos[1] < 0.05
+    assert tempos[2] == pytest.approx(0.1, abs=0.04)
+    assert tempos[3] == pytest.approx(0.2, abs=0.04)
+    assert agendador.stats()["admitidas"] == 4
+
+
+def test_interativo_passa_na_frente_e_chamadores_em_rodizio():
+    agendador = AgendadorRequisicoes(POR_HORA, rajada=1)
+    ordem = []
+
+    async def chamar(faixa, chamador):
+        await agendador.aguardar(faixa, chamador)
+        ordem.append(chamador)
+
+    async def cenario():
+        await agendador.aguardar("interativo", "aquecimento")  # esvazia o balde
+        tarefas = [
+            asyncio.ensure_future(chamar(faixa, chamador))
+            for faixa, chamador in [
+                ("lote", "lote-1"),
+                ("lote", "lote-1"),
+                ("lote", "lote-1"),
+                ("lote", "lote-2"),
+                ("interativo", "perfil"),
+            ]
+        ]
+        await asyncio.gather(*tarefas)
+
+    asyncio.run(cenario())
+
+    assert ordem == ["perfil", "lote-1", "lote-2", "lote-1", "lote-1"]
+
+
+def test_eta_da_admissao_bate_com_a_espera_real():
+    agendador = AgendadorRequisicoes(POR_HORA, rajada=1)
+
+    async def cenario():
+        await agendador.aguardar("interativo", "aquecimento")
+        fila = [
+            asyncio.ensure_future(agendador.aguardar("lote", "lote-1"))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        # Na faixa interativa, o lote inteiro fica atrás; no lote, ele espera
+        # uma rodada do lote-1 e depois o próprio token
+        eta_interativo = agendador.admitir("interativo", "perfil").eta
+        eta_lote = agendador.admitir("lote", "lote-2").eta
+        espera = await agendador.aguardar("lote", "lote-2")
+        await asyncio.gather(*fila)
+        return eta_interativo, eta_lote, espera
+
+    eta_interativo, eta_lote, espera = asyncio.run(cenario())
+
+    assert eta_interativo == pytest.approx(0.1, abs=0.02)
+    assert eta_lote == pytest.approx(0.2, abs=0.02)
+    assert espera == pytest.approx(eta_lote, abs=0.04)
+
+
+def test_recusa_quando_a_eta_passa_da_espera_maxima():
+    agendador = AgendadorRequisicoes(3600, rajada=1)
+
+    async def cenario():
+        await agendador.aguardar("interativo", "a")
+        with pytest.raises(RequisicaoRecusada) as erro:
+            await agendador.aguardar("interativo", "b", espera_maxima=0.5)
+        return erro.value
+
+    erro = asyncio.run(cenario())
+
+    assert erro.retry_after == 1
+    assert "aguarde 1 segundos" in str(erro)
+    assert agendador.stats()["recusadas"] == 1
+    assert agendador.stats()["fila"] == {"interativo": 0, "lote": 0}
+
+
+def test_bloqueio_suspende_as_requisicoes():
+    agendador = AgendadorRequisicoes(POR_HORA, rajada=3)
+
+    async def cenario():
+        await agendador.bloquear(0.15)
+        assert agendador.bloqueado_ate() is not None
+        assert agendador.admitir("interativo", "a").eta == pytest.approx(0.15, abs=0.02)
+        return await agendador.aguardar("interativo", "a")
+
+    espera = asyncio.run(cenario())
+
+    assert espera == pytest.approx(0.15, abs=0.04)
+    assert agendador.bloqueado_ate() is None
+
+
+def test_desistencia_na_fila_nao_consome_tokens():
+    agendador = AgendadorRequisicoes(POR_HORA, rajada=1)
+
+    async def cenario():
+        await agendador.aguardar("interativo", "a")
+        desistente = asyncio.ensure_future(agendador.aguardar("interativo", "b"))
+        await asyncio.sleep(0.01)
+        desistente.cancel()
+        await asyncio.sleep(0)
+        eta = agendador.admitir("interativo", "c").eta
+        return eta, await agendador.aguardar("interativo", "c")
+
+    eta, espera = asyncio.run(cenario())
+
+    assert eta == pytest.approx(0.09, abs=0.02)
+    assert espera == pytest.approx(eta, abs=0.04)
+    assert agendador.stats()["admitidas"] == 2
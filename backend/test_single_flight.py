@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from services.single_flight import SingleFlight
+
+
+def test_chamadas_simultaneas_compartilham_execucao():
+    grupo = SingleFlight()
+    execucoes = []
+
+    async def coletar(username):
+        execucoes.append(username)
+        await asyncio.sleep(0.05)
+        return {"perfil": f"@{username}"}
+
+    async def cenario():
+        return await asyncio.gather(
+            *[grupo.do(("analisar", "ana"), lambda: coletar("ana")) for _ in range(5)],
+            grupo.do(("analisar", "bia"), lambda: coletar("bia")),
+        )
+
+    resultados = asyncio.run(cenario())
+
+    assert execucoes == ["ana", "bia"]
+    assert all(r is resultados[0] for r in resultados[:5])
+    assert resultados[5] == {"perfil": "@bia"}
+    assert grupo.stats() == {"em_andamento": 0, "execucoes": 2, "compartilhadas": 4}
+
+
+def test_excecao_propagada_para_todos_e_chave_liberada():
+    grupo = SingleFlight()
+
+    async def falhar():
+        await asyncio.sleep(0.01)
+        raise Exception("Perfil @ana não encontrado.")
+
+    async def cenario():
+        resultados = await asyncio.gather(
+            grupo.do("ana", falhar), grupo.do("ana", falhar), return_exceptions=True
+        )
+        # Depois de concluída, uma nova chamada dispara outra execução
+        segunda = await grupo.do("ana", lambda: asyncio.sleep(0, result="ok"))
+        return resultados, segunda
+
+    resultados, segunda = asyncio.run(cenario())
+
+    assert all("não encontrado" in str(r) for r in resultados)
+    assert segunda == "ok"
+    assert not grupo.em_andamento("ana")
+
+
+def test_cancelar_um_chamador_nao_cancela_os_outros():
+    grupo = SingleFlight()
+
+    async def coletar():
+        await asyncio.sleep(0.05)
+        return "dados"
+
+    async def cenario():
+        primeiro = asyncio.ensure_future(grupo.do("ana", coletar))
+        segundo = asyncio.ensure_future(grupo.do("ana", coletar))
+        await asyncio.sleep(0.01)
+        primeiro.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await primeiro
+        return await segundo
+
+    assert asyncio.run(cenario()) == "dados"
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services import fake_openai_server
+from services.ai_service import AIService
+from services.telemetry import ETAPAS, TOKENS_LLM, MedirRequisicoes, Registro
+
+
+def test_histograma_exporta_faixas_acumuladas_soma_e_contagem():
+    registro = Registro()
+    latencia = registro.histograma(
+        "etapa_segundos", "Duração", ("etapa",), limites=(0.1, 1)
+    )
+    for valor in (0.05, 0.1, 0.5, 3):
+        latencia.observar(valor, "pdf")
+
+    texto = registro.exportar()
+
+    assert "# TYPE instagram_analyzer_etapa_segundos histogram" in texto
+    assert 'instagram_analyzer_etapa_segundos_bucket{etapa="pdf",le="0.1"} 2' in texto
+    assert 'instagram_analyzer_etapa_segundos_bucket{etapa="pdf",le="1"} 3' in texto
+    assert 'instagram_analyzer_etapa_segundos_bucket{etapa="pdf",le="+Inf"} 4' in texto
+    assert 'instagram_analyzer_etapa_segundos_sum{etapa="pdf"} 3.65' in texto
+    assert 'instagram_analyzer_etapa_segundos_count{etapa="pdf"} 4' in texto
+
+
+def test_contadores_medidores_e_coleta_na_exportacao():
+    registro = Registro()
+    fallbacks = registro.contador("fallback_mock_total", "Fallbacks", ("motivo",))
+    fallbacks.inc("rate_limited")
+    fallbacks.inc("rate_limited")
+    fallbacks.inc("forced")
+    hits = {"pdf": 3}
+    registro.contador(
+        "cache_hits_total",
+        "Hits",
+        ("cache",),
+        coletar=lambda: {(nome,): n for nome, n in hits.items()},
+    )
+    hits["pdf"] = 5
+    registro.medidor("fila", "Fila", coletar=lambda: 7)
+
+    texto = registro.exportar()
+
+    assert fallbacks.valor("rate_limited") == 2
+    assert 'instagram_analyzer_fallback_mock_total{motivo="forced"} 1' in texto
+    assert 'instagram_analyzer_cache_hits_total{cache="pdf"} 5' in texto
+    assert "instagram_analyzer_fila 7" in texto
+    with pytest.raises(ValueError):
+        registro.medidor("fila", "Fila de novo")
+
+
+def test_middleware_mede_por_rota_declarada_e_status():
+    registro = Registro()
+    latencia = registro.histograma(
+        "http_segundos", "HTTP", ("metodo", "rota", "status")
+    )
+    em_andamento = registro.medidor("http_em_andamento", "Em andamento")
+    app = FastAPI()
+    app.add_middleware(MedirRequisicoes, latencia=latencia, em_andamento=em_andamento)
+
+    @app.get("/perfil/{username}")
+    async def perfil(username: str):
+        return {"username": username}
+
+    cliente = TestClient(app)
+    cliente.get("/perfil/a")
+    cliente.get("/perfil/b")
+    cliente.get("/nao-existe")
+
+    assert latencia.contagem("GET", "/perfil/{username}", "200") == 2
+    assert latencia.contagem("GET", "outra", "404") == 1
+    assert em_andamento.valor() == 0
+
+
+def test_relatorio_ia_registra_tokens_e_duracao_da_chamada():
+    async def cenario():
+        app = fake_openai_server.criar_app()
+        runner, base_url = await fake_openai_server.iniciar(app=app)
+        service = AIService(base_url=base_url)
+        try:
+            await service.gerar_relatorio({"username": "loja"}, {}, camada="ia")
+            return app[fake_openai_server.ESTATISTICAS]["prompt_tokens"]
+        finally:
+            await service.aclose()
+            await runner.cleanup()
+
+    prompt, completion = TOKENS_LLM.valor("prompt"), TOKENS_LLM.valor("completion")
+    chamadas = ETAPAS.contagem("openai")
+    prompt_tokens = asyncio.run(cenario())
+
+    assert TOKENS_LLM.valor("prompt") == prompt + prompt_tokens
+    assert TOKENS_LLM.valor("completion") > completion
+    assert ETAPAS.contagem("openai") == chamadas + 1
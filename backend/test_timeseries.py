@@ -0,0 +1,101 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+from services.timeseries import REGISTRO, SerieTemporal, resumir_historico
+
+DIA = 86400
+
+
+def serie(n, inicio=1_700_000_000.0):
+    registros = np.zeros(n, dtype=REGISTRO)
+    registros["ts"] = inicio + np.arange(n) * DIA
+    registros["seguidores"] = 1000 + np.arange(n) * 10
+    registros["total_posts"] = 50 + np.arange(n) // 7
+    registros["taxa_engajamento"] = 2.0
+    return registros
+
+
+def test_acrescenta_compacta_e_consulta_por_periodo(tmp_path):
+    store = SerieTemporal(str(tmp_path), segmento=100)
+    registros = serie(365)
+    for inicio in range(0, 365, 50):
+        store.acrescentar("loja.teste", registros[inicio : inicio + 50])
+
+    pasta = tmp_path / "lo" / "loja.teste"
+    segmentos = sorted(p.name for p in pasta.iterdir() if p.suffix == ".npz")
+    assert len(segmentos) == 3
+    assert (pasta / "head.bin").stat().st_size == 65 * REGISTRO.itemsize
+
+    tudo = store.consultar("loja.teste")
+    assert np.array_equal(tudo, registros)
+
+    meio = store.consultar(
+        "LOJA.teste", inicio=registros["ts"][120], fim=registros["ts"][130]
+    )
+    assert meio["seguidores"].tolist() == registros["seguidores"][120:131].tolist()
+
+
+def _acrescentar_um_a_um(diretorio, worker):
+    store = SerieTemporal(diretorio, segmento=16)
+    registros = serie(200, inicio=1_700_000_000.0 + worker)
+    for i in range(len(registros)):
+        store.acrescentar("loja", registros[i : i + 1])
+
+
+def test_varios_processos_no_mesmo_diretorio(tmp_path):
+    processos = [
+        multiprocessing.Process(target=_acrescentar_um_a_um, args=(str(tmp_path), w))
+        for w in range(4)
+    ]
+    for p in processos:
+        p.start()
+    for p in processos:
+        p.join()
+
+    registros = SerieTemporal(str(tmp_path)).consultar("loja")
+
+    assert all(p.exitcode == 0 for p in processos)
+    # Nenhum registro perdido entre a leitura do head e o zeramento, nem
+    # compactado duas vezes
+    assert len(registros) == 800
+    assert len(np.unique(registros["ts"])) == 800
+
+
+def test_registrar_coleta(tmp_path):
+    store = SerieTemporal(str(tmp_path))
+    dados = {
+        "username": "loja",
+        "seguidores": 200,
+        "seguindo": 10,
+        "total_posts": 3,
+        "coletado_em": "2024-06-01T10:00:00",
+        "posts": [{"likes": 18, "comments": 2, "date": "2024-05-30T10:00:00"}],
+    }
+
+    store.registrar(dados)
+    registro = store.consultar("loja")[0]
+
+    assert registro["seguidores"] == 200
+    assert registro["taxa_engajamento"] == np.float32(10.0)
+    assert store.consultar("sem_coletas").size == 0
+
+
+def test_resumo_com_deltas_e_taxas_moveis():
+    resultado = resumir_historico(serie(30), janela_dias=7)
+
+    resumo = resultado["resumo"]
+    assert resumo["coletas"] == 30
+    assert resumo["variacao_seguidores"] == 290
+    assert resumo["seguidores_por_dia"] == 10.0
+    assert resumo["crescimento_percentual"] == 29.0
+    assert resumo["variacao_posts"] == 4
+    assert resultado["pontos"][0]["seguidores_por_dia"] == 0
+    assert resultado["pontos"][-1]["seguidores_por_dia"] == 10.0
+    assert resultado["pontos"][-1]["engajamento_movel"] == 2.0
+
+
+def test_username_invalido(tmp_path):
+    store = SerieTemporal(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.consultar("../etc")